@@ -1,11 +1,14 @@
 import os
+import threading
 from flask import Flask 
 
 # 1. Importar las extensiones desde el nuevo módulo 'extensions.py'
-from .extensions import db, ma, jwt, bcrypt, login_manager, migrate  # <-- Agregado migrate
+from .extensions import db, ma, jwt, bcrypt, login_manager, response_cache, categorias_cache, password_hasher, user_cache, sql_instrumentation, metrics, cola_escrituras, contador_vistas, tendencias
 
-# Importamos los modelos para que SQLAlchemy los conozca antes de db.create_all()
+# Importamos los modelos para que SQLAlchemy los conozca antes de db.create_all().
+# Vistas y schemas NO: se importan dentro de create_app, al registrar las rutas.
 from . import models
+from .services import contadores, engine_profiles, replicas, search
 
 # Función principal para crear la aplicación (Patrón Factory)
 def create_app(test_config=None):
@@ -23,12 +26,17 @@ def create_app(test_config=None):
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         JWT_SECRET_KEY='super-secreto', # ¡Cambia esto en producción!
         JWT_TOKEN_LOCATION=['headers'],
+        POSTS_PER_PAGE=20,
+        POSTS_MAX_PER_PAGE=100,
     )
 
     if test_config is None:
         # Cargar la configuración desde config.py al mismo nivel que app/
         from config import Config
         app.config.from_object(Config)
+    else:
+        # Tests y benchmarks: configuración explícita, sin depender del entorno
+        app.config.from_mapping(test_config)
 
     # Asegurarse de que el directorio de instancia exista
     try:
@@ -39,16 +47,33 @@ def create_app(test_config=None):
     # -----------------------------------------------------------
     # INICIALIZAR EXTENSIONES
     # -----------------------------------------------------------
+    engine_profiles.aplicar_perfil(app)  # pool / PRAGMA según DB_ENGINE_PROFILE
+    replicas.configurar(app)  # binds de las réplicas de lectura
     db.init_app(app)
+    engine_profiles.init_app(app)
+    replicas.init_app(app)
     ma.init_app(app)
     jwt.init_app(app)
     bcrypt.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)  # <-- Habilita Flask-Migrate
+    response_cache.init_app(app)
+    categorias_cache.init_app(app)
+    password_hasher.init_app(app)
+    user_cache.init_app(app)
+    sql_instrumentation.init_app(app)
+    metrics.init_app(app)
+    cola_escrituras.init_app(app)
+    contador_vistas.init_app(app)
+    tendencias.init_app(app)
+    contadores.init_app(app)
+    search.init_app(app)
 
-    # Crear las tablas de la base de datos si no existen
-    with app.app_context():
-        db.create_all()
+    # El esquema lo crea `flask db upgrade` (o `flask init-db`); crear la app
+    # no se conecta a la base salvo que DB_CREATE_ALL lo pida explícitamente.
+    app.config.setdefault('DB_CREATE_ALL', False)
+    if app.config['DB_CREATE_ALL']:
+        with app.app_context():
+            db.create_all(bind_key=None)  # solo el primario: las réplicas no se tocan
 
     # -----------------------------------------------------------
     # REGISTRAR RUTAS Y BLUEPRINTS (Importaciones al final)
@@ -65,6 +90,10 @@ def create_app(test_config=None):
     from .api_routes import api_bp
     app.register_blueprint(api_bp)
 
+    # Comandos CLI (flask db ..., flask init-db, flask counters rebuild, ...)
+    from .commands import register_commands
+    register_commands(app)
+
     # Ruta de ejemplo
     @app.route('/hello')
     def hello():
@@ -89,5 +118,23 @@ def create_app(test_config=None):
 
     return app
 
-# La aplicación debe ser accesible globalmente para el comando 'flask run'
-app = create_app()
+# -----------------------------------------------------------
+# INSTANCIA GLOBAL PEREZOSA
+# -----------------------------------------------------------
+# `import app` no construye ninguna aplicación: run.py (flask run, gunicorn
+# run:app), los benchmarks y los scripts llaman a create_app(). Para quien
+# todavía use `from app import app` o `flask --app app`, la instancia se
+# crea la primera vez que se pide y se reutiliza después.
+_app = None
+_app_lock = threading.Lock()
+
+
+def __getattr__(name):
+    global _app
+    if name != 'app':
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
@@ -1,15 +1,18 @@
 from flask import Blueprint, jsonify
 from flask_restful import Api
-from flask_jwt_extended import jwt_required
 
 # Importaciones de vistas
 from .views.auth_views import RegisterAPI, LoginAPI, UserDetailAPI, UserListAPI 
 from .views.category_views import CategoryListAPI, CategoryDetailAPI 
-from .views.post_views import PostListAPI, PostDetailAPI 
+from .views.post_views import PostListAPI, PostDetailAPI, PostSearchAPI, PostTrendingAPI, PostBulkImportAPI 
 from .views.comment_views import CommentListAPI, CommentDetailAPI 
+from .views.export_views import ExportAPI
+from .views.moderation_views import ModerationQueueAPI, ModerationBulkAPI
 
-from app.models import Post, Comentario, Usuario
+from app.extensions import db
 from app.decorators.auth_decorators import roles_required
+from app.services import contadores
+from app.services.replicas import solo_lectura
 
 # -----------------------------------------------------------
 # CONFIGURACIÓN DEL BLUEPRINT PARA LA API
@@ -35,6 +38,9 @@ api_bp.add_url_rule('/categories/<int:category_id>', view_func=CategoryDetailAPI
 # POSTS
 # -----------------------------------------------------------
 api_bp.add_url_rule('/posts/', view_func=PostListAPI.as_view('post_list_api'), methods=['GET', 'POST']) 
+api_bp.add_url_rule('/posts/bulk', view_func=PostBulkImportAPI.as_view('post_bulk_import_api'), methods=['POST']) 
+api_bp.add_url_rule('/posts/search', view_func=PostSearchAPI.as_view('post_search_api'), methods=['GET']) 
+api_bp.add_url_rule('/posts/trending', view_func=PostTrendingAPI.as_view('post_trending_api'), methods=['GET'])
 api_bp.add_url_rule('/posts/<int:post_id>', view_func=PostDetailAPI.as_view('post_detail_api'), methods=['GET', 'PUT', 'DELETE']) 
 
 # -----------------------------------------------------------
@@ -43,21 +49,33 @@ api_bp.add_url_rule('/posts/<int:post_id>', view_func=PostDetailAPI.as_view('pos
 api.add_resource(CommentListAPI, '/posts/<int:post_id>/comments')
 api.add_resource(CommentDetailAPI, '/comments/<int:comment_id>')
 
+# -----------------------------------------------------------
+# MODERACIÓN (Moderador/Admin)
+# -----------------------------------------------------------
+api_bp.add_url_rule('/moderation/comments', view_func=ModerationQueueAPI.as_view('moderation_queue_api'), methods=['GET'])
+api_bp.add_url_rule('/moderation/comments/bulk', view_func=ModerationBulkAPI.as_view('moderation_bulk_api'), methods=['POST'])
+
+# -----------------------------------------------------------
+# EXPORTACIÓN (Admin)
+# -----------------------------------------------------------
+api_bp.add_url_rule('/export/<recurso>', view_func=ExportAPI.as_view('export_api'), methods=['GET'])
+
 # -----------------------------------------------------------
 # ESTADÍSTICAS BÁSICAS (Moderador/Admin)
 # -----------------------------------------------------------
 @api_bp.route('/stats', methods=['GET'])
-@jwt_required()
 @roles_required('admin', 'moderator')
+@solo_lectura
 def stats():
     try:
-        total_posts = Post.query.count()
-        total_comments = Comentario.query.count()
-        total_users = Usuario.query.count()
+        # Contadores materializados: una lectura por clave primaria en vez de tres COUNT(*)
+        valores = contadores.leer(db.session)
         return jsonify({
-            "total_posts": total_posts,
-            "total_comments": total_comments,
-            "total_users": total_users
+            "total_posts": valores[contadores.POSTS],
+            "total_comments": valores[contadores.COMENTARIOS_VISIBLES] + valores[contadores.COMENTARIOS_OCULTOS],
+            "visible_comments": valores[contadores.COMENTARIOS_VISIBLES],
+            "hidden_comments": valores[contadores.COMENTARIOS_OCULTOS],
+            "total_users": valores[contadores.USUARIOS]
         }), 200
     except Exception as e:
         return jsonify({"error": "Error al obtener estadísticas", "details": str(e)}), 500
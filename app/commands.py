@@ -0,0 +1,146 @@
+import click
+from flask.cli import AppGroup
+
+from app.extensions import db
+
+# -----------------------------------------------------------
+# COMANDOS DE MANTENIMIENTO (flask <grupo> <comando>)
+# -----------------------------------------------------------
+
+class MigrateGroup(click.Group):
+    """
+    `flask db ...` de Flask-Migrate, cargado recién al usarlo: importar
+    flask_migrate arrastra alembic (y mako), que los workers no necesitan.
+    """
+
+    def __init__(self, app):
+        super().__init__('db', help='Migraciones de la base (Flask-Migrate / Alembic).')
+        self._app = app
+        self._grupo = None
+
+    def _cargar(self):
+        if self._grupo is None:
+            from flask_migrate import Migrate
+            from flask_migrate.cli import db as grupo
+            from app.services import search
+
+            Migrate(self._app, db, include_object=search.include_object)
+            self._grupo = grupo
+        return self._grupo
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # El contexto (opciones -d/-x, subcomandos, --help) es el del grupo real
+        return self._cargar().make_context(info_name, args, parent=parent, **extra)
+
+
+@click.command('init-db')
+def init_db_command():
+    """Crea las tablas que falten en la base primaria (desarrollo, pruebas).
+
+    Una base creada así se marca para las migraciones con `flask db stamp head`.
+    """
+    db.create_all(bind_key=None)
+    click.echo('Tablas creadas.')
+
+
+counters_cli = AppGroup('counters', help='Contadores materializados (/api/stats y por post).')
+
+
+@counters_cli.command('rebuild')
+@click.option('--posts/--no-posts', default=True, show_default=True,
+              help='También comment_count y last_comment_at de cada post.')
+@click.option('--batch-size', default=10000, show_default=True, help='Posts por transacción.')
+def counters_rebuild(posts, batch_size):
+    """Recalcula los contadores desde las tablas."""
+    from app.services import contadores
+
+    valores = contadores.reconstruir(db.session)
+    for nombre, valor in valores.items():
+        click.echo(f'{nombre}: {valor}')
+    if posts:
+        total = contadores.reconstruir_posts(db.session, lote=batch_size)
+        click.echo(f'posts recalculados: {total}')
+
+
+search_cli = AppGroup('search', help='Índice de texto completo de posts.')
+
+
+@search_cli.command('reindex')
+def search_reindex():
+    """Crea (si falta) y reconstruye el índice de búsqueda."""
+    from app.services import search
+
+    total = search.reindexar(db.session)
+    click.echo(f'{total} posts indexados.')
+
+
+trending_cli = AppGroup('trending', help='Ranking de posts en tendencia (/api/posts/trending).')
+
+
+@trending_cli.command('rebuild')
+@click.option('--batch-size', default=10000, show_default=True, help='Comentarios leídos por vez.')
+def trending_rebuild(batch_size):
+    """Recalcula post_tendencia desde los comentarios (las vistas no tienen fecha: no se cuentan)."""
+    from app.services import tendencias
+
+    total = tendencias.reconstruir(db.session, lote=batch_size)
+    click.echo(f'{total} posts con tendencia.')
+
+
+def _parse_since(ctx, param, value):
+    from app.services import export
+
+    try:
+        return export.parse_since(value)
+    except ValueError:
+        raise click.BadParameter('use formato ISO 8601 (p.ej. 2025-01-31 o 2025-01-31T12:00:00).')
+
+
+@click.command('export')
+@click.argument('recurso', type=click.Choice(['posts', 'comments', 'users']))
+@click.option('--format', 'formato', type=click.Choice(['ndjson', 'csv']), default='ndjson')
+@click.option('--since', default=None, callback=_parse_since, help='Solo filas desde esta fecha (ISO 8601).')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Archivo destino (por defecto stdout).')
+def export_command(recurso, formato, since, output):
+    """Exporta posts, comentarios o usuarios en streaming."""
+    from app.services import export
+
+    for chunk in export.generar(db.session, recurso, formato, since):
+        output.write(chunk)
+
+
+@click.command('seed')
+@click.option('--users', 'usuarios', default=1000, show_default=True)
+@click.option('--posts', default=10000, show_default=True)
+@click.option('--comments', 'comentarios', default=50000, show_default=True)
+@click.option('--categories', 'categorias', default=14, show_default=True)
+@click.option('--hidden-ratio', default=0.05, show_default=True, help='Fracción de comentarios ocultos.')
+@click.option('--seed', default=42, show_default=True, help='Semilla: mismos valores, mismos datos.')
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option('--reset', is_flag=True, help='Borra y recrea todas las tablas antes de generar.')
+def seed_command(usuarios, posts, comentarios, categorias, hidden_ratio, seed, batch_size, reset):
+    """Genera datos sintéticos a escala (usuarios, posts, categorías, comentarios)."""
+    from app.services import seed as generador
+
+    if reset:
+        click.confirm('Se borrarán TODOS los datos. ¿Continuar?', abort=True)
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+
+    totales = generador.generar(
+        db.session, usuarios=usuarios, posts=posts, comentarios=comentarios,
+        categorias=categorias, seed=seed, batch_size=batch_size,
+        hidden_ratio=hidden_ratio, echo=click.echo,
+    )
+    click.echo(f'Listo: {sum(totales.values()):,} filas. Contraseña de todos los usuarios: '
+               f'{generador.PASSWORD}')
+
+
+def register_commands(app):
+    app.cli.add_command(MigrateGroup(app))
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(trending_cli)
+    app.cli.add_command(export_command)
+    app.cli.add_command(seed_command)
@@ -1,30 +1,44 @@
+import logging
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from ..services.identity import current_identity
+
+logger = logging.getLogger(__name__)
+
+# --- Decorador de Autenticación (JWT verificado una sola vez) ---
+def identity_required():
+    """
+    Equivalente a @jwt_required(), pero deja la identidad en el request
+    (ver services/identity.py) para que los demás decoradores y la vista
+    no vuelvan a decodificar el token.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            current_identity()
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
 
 # --- Decorador de Verificación de Roles ---
 def roles_required(*roles):
     """
     Verifica que el usuario tenga uno de los roles permitidos.
-    Usar después de @jwt_required().
+    Verifica el JWT por sí mismo: no hace falta @jwt_required() encima.
     """
     def wrapper(fn):
         @wraps(fn)
-        @jwt_required()
         def decorator(*args, **kwargs):
-            try:
-                claims = get_jwt()
-                user_role = claims.get('role')
-            except Exception as e:
-                return jsonify({"msg": "Error al obtener roles del token.", "details": str(e)}), 500
-            
-            if user_role not in roles:
+            identity = current_identity()
+
+            if identity.role not in roles:
                 return jsonify(
-                    msg="Acceso denegado. Rol insuficiente.", 
+                    msg="Acceso denegado. Rol insuficiente.",
                     required_roles=roles,
-                    user_role=user_role
+                    user_role=identity.role
                 ), 403
-            
+
             return fn(*args, **kwargs)
         return decorator
     return wrapper
@@ -36,36 +50,32 @@ def check_ownership(resource_owner_id):
     Admin y moderator siempre tienen acceso.
     """
     try:
-        current_user_id = get_jwt_identity()
-        if current_user_id is None:
+        identity = current_identity(optional=True)
+        if identity is None:
             return False
-        current_user_id = int(current_user_id)
-        
-        claims = get_jwt()
-        user_role = claims.get('role', '')
 
         # Admin o moderator siempre pueden
-        if user_role in ['admin', 'moderator']:
+        if identity.is_staff:
             return True
 
         # Comparar con el owner_id
         if resource_owner_id is None:
             return False
 
-        return current_user_id == int(resource_owner_id)
-    except Exception as e:
-        print(f"[check_ownership] Error: {e}")
+        return identity.user_id == int(resource_owner_id)
+    except Exception:
+        logger.exception("check_ownership: error al verificar propiedad")
         return False
 
 # --- Decorador auxiliar para endpoints de post ---
 def post_owner_required():
     """
     Verifica que el usuario sea el dueño del post o admin/moderator.
-    Debe aplicarse después de @jwt_required().
+    Verifica el JWT por sí mismo: no hace falta @jwt_required() encima.
     """
     def wrapper(fn):
         @wraps(fn)
-        @jwt_required()
+        @identity_required()
         def decorated(*args, **kwargs):
             from ..models import Post  # Import local para evitar circularidad
             post_id = kwargs.get('post_id')
@@ -3,15 +3,32 @@ from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
-from flask_migrate import Migrate  # <-- IMPORTAR Migrate
+from app.services.cache import ResponseCache
+from app.services.categorias import CategoriaCache
+from app.services.escrituras import ColaEscrituras
+from app.services.passwords import PasswordHasher
+from app.services.identity import UserCache
+from app.services.instrumentation import SqlInstrumentation
+from app.services.metrics import Metrics
+from app.services.replicas import RoutingSession
+from app.services.tendencias import Tendencias
+from app.services.vistas import ContadorVistas
 
 # Inicializamos las extensiones sin vincularlas a la aplicación
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Lecturas a réplicas (services/replicas.py)
 ma = Marshmallow()
 jwt = JWTManager()
 bcrypt = Bcrypt()
 login_manager = LoginManager()  # <-- NUEVA DEFINICIÓN
-migrate = Migrate()              # <-- NUEVA DEFINICIÓN
+response_cache = ResponseCache()  # Caché de respuestas GET públicas
+categorias_cache = CategoriaCache()  # Foto en memoria de la tabla Categoria
+password_hasher = PasswordHasher()  # Hashing de contraseñas en un pool de procesos
+user_cache = UserCache()  # Caché corta de usuarios para Flask-Login
+sql_instrumentation = SqlInstrumentation()  # Server-Timing, consultas lentas y N+1
+metrics = Metrics()  # GET /metrics (Prometheus)
+cola_escrituras = ColaEscrituras()  # Group commit de las escrituras (SQLite)
+contador_vistas = ContadorVistas()  # Vistas de posts acumuladas y volcadas por lotes
+tendencias = Tendencias()  # Ranking de posts en tendencia (top-K en memoria + tabla)
 
 # Opcional: Configuración del gestor de inicio de sesión
 login_manager.login_view = 'main.login'  # Define la vista de login si usas un Blueprint 'main'
@@ -48,4 +48,11 @@ class PostForm(FlaskForm):
 class ComentarioForm(FlaskForm):
     # 🚨 CAMBIO CLAVE: Renombrado de 'texto' a 'contenido'
     contenido = TextAreaField('Comentario', validators=[DataRequired(), Length(min=5)])
-    submit = SubmitField('Comentar')
\ No newline at end of file
+    submit = SubmitField('Comentar')
+
+# ==================================================
+# Formulario de Moderación en lote (los ids llegan como checkboxes `ids`)
+# ==================================================
+class ModeracionForm(FlaskForm):
+    ocultar = SubmitField('Ocultar seleccionados')
+    mostrar = SubmitField('Restaurar seleccionados')
@@ -4,27 +4,48 @@ ROLE_ADMIN = 'admin'
 
 from datetime import datetime
 # --- CORRECCIÓN CRÍTICA: Importación absoluta para evitar el error de Flask Run ---
-from app.extensions import db, login_manager 
+from app.extensions import db, login_manager, password_hasher, user_cache
 # -----------------------------------------------------------------------------------
 
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.ext.hybrid import hybrid_property
 from itsdangerous import URLSafeTimedSerializer as Serializer
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 @login_manager.user_loader
 def load_user(user_id):
-    # Asume que ya tienes definido el modelo Usuario
-    return Usuario.query.get(int(user_id))
+    # Con USER_CACHE_TTL > 0 evita el SELECT en cada request web
+    return user_cache.get(db.session, int(user_id))
+
+# Resumen guardado de Post.contenido para listados (index.html, ?fields=excerpt)
+EXCERPT_LONGITUD = 200
+
+
+def hacer_excerpt(contenido):
+    """Primeros EXCERPT_LONGITUD caracteres del contenido, con '...' si se cortó."""
+    if contenido is None or len(contenido) <= EXCERPT_LONGITUD:
+        return contenido
+    return contenido[:EXCERPT_LONGITUD] + '...'
 
 # Tabla de relación muchos a muchos entre Post y Categoria
 post_categoria = db.Table(
     'post_categoria',
-    db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
-    db.Column('categoria_id', db.Integer, db.ForeignKey('categoria.id'), primary_key=True)
+    db.Column('post_id', db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('categoria_id', db.Integer, db.ForeignKey('categoria.id', ondelete='CASCADE'), primary_key=True),
+    # La PK empieza por post_id: para filtrar o borrar por categoría
+    db.Index('ix_post_categoria_categoria_id', 'categoria_id'),
 )
 
-class Usuario(db.Model):
+# Borrados: las relaciones con muchas filas del otro lado llevan
+# passive_deletes, así session.delete() no las carga ni las recorre fila por
+# fila. Las FK declaran lo que hace la base (CASCADE / SET NULL) y
+# services/borrado.py lo hace por lotes antes de borrar el objeto.
+
+class Usuario(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -33,14 +54,18 @@ class Usuario(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     
-    posts = db.relationship('Post', backref='autor', lazy='dynamic')
-    comentarios = db.relationship('Comentario', backref='autor', lazy='dynamic')
+    posts = db.relationship('Post', backref='autor', lazy='dynamic', passive_deletes=True)
+    comentarios = db.relationship('Comentario', backref='autor', lazy='dynamic', passive_deletes=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        # El hash se generó con otro algoritmo o costo que el configurado
+        return password_hasher.needs_rehash(self.password_hash)
 
     def get_reset_token(self, expires_sec=1800):
         try:
@@ -48,7 +73,7 @@ class Usuario(db.Model):
             s = Serializer(key, expires_sec)
             return s.dumps({'user_id': self.id}).decode('utf-8')
         except Exception as e:
-            print(f"Advertencia: Error al crear token: {e}")
+            logger.warning("Error al crear token de reseteo: %s", e)
             return None 
 
     @staticmethod
@@ -65,29 +90,86 @@ class Usuario(db.Model):
         return f'<Usuario {self.username}>'
 
 class Post(db.Model):
+    # Índice compuesto para el feed paginado por cursor: cubre el filtro
+    # is_published y el orden (timestamp, id) sin ordenar en memoria.
+    __table_args__ = (
+        db.Index('ix_post_published_timestamp_id', 'is_published', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(140), nullable=False)
     contenido = db.Column(db.Text, nullable=False)
+    # Se mantiene al asignar `contenido` (ORM) y en los INSERT de Core
+    # (importación masiva, seed): los listados no leen el Text completo.
+    excerpt = db.Column(db.String(EXCERPT_LONGITUD + 3))
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     is_published = db.Column(db.Boolean, default=True)
+    # Comentarios visibles y fecha del último: los mantienen los eventos de
+    # services/contadores.py en la misma transacción que el comentario.
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_comment_at = db.Column(db.DateTime)
+    # Lecturas del detalle: se acumulan en memoria y se suman por lotes
+    # (services/vistas.py), así que puede ir unos segundos atrasado.
+    view_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'))
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id', ondelete='SET NULL'))
     
-    comentarios = db.relationship('Comentario', backref='post', lazy='dynamic', cascade="all, delete-orphan")
-    categorias = db.relationship('Categoria', secondary=post_categoria, backref=db.backref('posts', lazy='dynamic'))
+    comentarios = db.relationship('Comentario', backref='post', lazy='dynamic', cascade="all, delete-orphan",
+                                  passive_deletes=True)
+    # Lectura no dinámica (solo visibles) para poder cargarla en lote con selectinload;
+    # las escrituras siguen pasando por `comentarios`.
+    comentarios_visibles = db.relationship(
+        'Comentario',
+        primaryjoin='and_(Post.id == Comentario.post_id, Comentario.is_visible == True)',
+        order_by='Comentario.id',
+        viewonly=True
+    )
+    categorias = db.relationship('Categoria', secondary=post_categoria, passive_deletes=True,
+                                 backref=db.backref('posts', lazy='dynamic', passive_deletes=True))
+
+    @hybrid_property
+    def actividad(self):
+        """Último comentario o, si no tiene, la publicación (?sort=activity)."""
+        return self.last_comment_at or self.timestamp
+
+    @actividad.expression
+    def actividad(cls):
+        return db.func.coalesce(cls.last_comment_at, cls.timestamp)
 
     def __repr__(self):
         return f'<Post {self.titulo}>'
 
+
+# Índices de los órdenes ?sort=comments, ?sort=activity y ?sort=views de /api/posts/
+db.Index('ix_post_published_comment_count_id', Post.is_published, Post.comment_count, Post.id)
+db.Index('ix_post_published_view_count_id', Post.is_published, Post.view_count, Post.id)
+db.Index('ix_post_published_actividad_id', Post.is_published, Post.actividad, Post.id)
+
+
+@event.listens_for(Post.contenido, 'set')
+def _actualizar_excerpt(post, valor, anterior, initiator):
+    post.excerpt = hacer_excerpt(valor)
+
 class Comentario(db.Model):
+    # Comentarios visibles de un post por fecha: listados y el recálculo de
+    # Post.last_comment_at al ocultar o borrar el último. Sin post, la cola
+    # de moderación filtrada por visibilidad (services/moderacion.py).
+    __table_args__ = (
+        db.Index('ix_comentario_post_visible_created', 'post_id', 'is_visible', 'created_at'),
+        db.Index('ix_comentario_visible_created', 'is_visible', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     contenido = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, index=True, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_visible = db.Column(db.Boolean, default=True)
+    # active_history: los contadores (services/contadores.py) necesitan el
+    # valor anterior aunque el objeto esté expirado al modificarlo.
+    is_visible = db.column_property(db.Column(db.Boolean, default=True), active_history=True)
     
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'))
-    post_id = db.Column(db.Integer, db.ForeignKey('post.id'))
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id', ondelete='SET NULL'))
+    post_id = db.column_property(db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE')),
+                                 active_history=True)
 
     def __repr__(self):
         return f'<Comentario {self.contenido[:20]}>'
@@ -97,4 +179,27 @@ class Categoria(db.Model):
     nombre = db.Column(db.String(64), index=True, unique=True, nullable=False)
 
     def __repr__(self):
-        return f'<Categoria {self.nombre}>'
\ No newline at end of file
+        return f'<Categoria {self.nombre}>'
+
+class Contador(db.Model):
+    """Contadores materializados (ver services/contadores.py)."""
+    nombre = db.Column(db.String(64), primary_key=True)
+    # Cada contador se reparte en varias filas: el valor es la suma
+    shard = db.Column(db.Integer, primary_key=True, default=0, autoincrement=False)
+    valor = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Contador {self.nombre}[{self.shard}]={self.valor}>'
+
+class PostTendencia(db.Model):
+    """Puntaje de tendencia de un post (ver services/tendencias.py)."""
+    __tablename__ = 'post_tendencia'
+
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+    # log2 de la suma de pesos con decaimiento, relativo a una época fija:
+    # ordenar por esta columna es ordenar por tendencia en cualquier momento.
+    puntaje = db.Column(db.Float, nullable=False, index=True)
+    actualizado_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PostTendencia {self.post_id}={self.puntaje:.3f}>'
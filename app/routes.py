@@ -1,8 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
+from sqlalchemy.orm import joinedload
 from flask_login import login_user, logout_user, current_user, login_required
-from app.forms import LoginForm, RegisterForm, PostForm, ComentarioForm
-from app.models import Usuario, Post, Comentario, Categoria
-from app.extensions import db
+from app.forms import LoginForm, RegisterForm, PostForm, ComentarioForm, ModeracionForm
+from app.models import Usuario, Post, Comentario, Categoria, post_categoria
+from app.extensions import db, categorias_cache, contador_vistas
+from app.services.pagination import paginate_posts, paginate_keyset, parse_limit, InvalidCursor
+from app.services import borrado, moderacion
+from app.services.passwords import PasswordHasherBusy
+from app.services.loaders import post_feed_options, comentario_schema_options
 from datetime import datetime
 from functools import wraps
 
@@ -33,7 +38,7 @@ bp = Blueprint('main', __name__)
 
 @bp.app_context_processor
 def inject_categorias():
-    categorias = Categoria.query.all()
+    categorias = categorias_cache.snapshot().items
     return dict(categorias=categorias)
 
 # ----------------------------
@@ -42,8 +47,11 @@ def inject_categorias():
 @bp.route('/')
 @bp.route('/index')
 def index():
-    page = request.args.get('page', 1, type=int)
-    posts = Post.query.filter_by(is_published=True).order_by(Post.timestamp.desc()).paginate(page=page, per_page=5, error_out=False)
+    try:
+        query = Post.query.filter_by(is_published=True).options(*post_feed_options())
+        posts = paginate_posts(query, 5, request.args.get('cursor'))
+    except InvalidCursor:
+        return redirect(url_for('main.index'))
     return render_template('index.html', posts=posts)
 
 # ----------------------------
@@ -56,7 +64,15 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = Usuario.query.filter_by(email=form.email.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            valida = user is not None and user.check_password(form.password.data)
+            if valida and user.password_needs_rehash():
+                user.set_password(form.password.data)
+                db.session.commit()
+        except PasswordHasherBusy:
+            flash('Servidor ocupado, intente nuevamente.', 'warning')
+            return render_template('login.html', form=form), 503
+        if valida:
             login_user(user, remember=form.remember_me.data)
             next_page = request.args.get('next')
             flash(f'Inicio de sesión exitoso. Rol: {user.role.upper()}', 'success')
@@ -72,7 +88,11 @@ def register():
     form = RegisterForm()
     if form.validate_on_submit():
         user = Usuario(username=form.username.data, email=form.email.data)
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except PasswordHasherBusy:
+            flash('Servidor ocupado, intente nuevamente.', 'warning')
+            return render_template('register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
         flash('Usuario registrado con éxito', 'success')
@@ -92,17 +112,16 @@ def logout():
 @login_required
 def crear_post():
     form = PostForm()
-    form.categorias.choices = [(c.id, c.nombre) for c in Categoria.query.all()]
+    form.categorias.choices = categorias_cache.snapshot().choices()
     if form.validate_on_submit():
-        categoria = Categoria.query.get(form.categorias.data)
+        categorias = categorias_cache.resolve([form.categorias.data], db.session) or []
         post = Post(
             titulo=form.titulo.data,
             contenido=form.contenido.data,
             autor=current_user,
             is_published=True
         )
-        if categoria:
-            post.categorias.append(categoria)
+        post.categorias.extend(categorias)
         db.session.add(post)
         db.session.commit()
         flash('Post creado con éxito', 'success')
@@ -117,9 +136,9 @@ def ver_post(post_id):
     form = ComentarioForm()
     
     if current_user.is_authenticated and current_user.role in ['admin', 'moderator']:
-        comentarios = Comentario.query.filter_by(post_id=post_id).order_by(Comentario.created_at.asc()).all()
+        comentarios = Comentario.query.filter_by(post_id=post_id).options(*comentario_schema_options()).order_by(Comentario.created_at.asc()).all()
     else:
-        comentarios = Comentario.query.filter_by(post_id=post_id, is_visible=True).order_by(Comentario.created_at.asc()).all()
+        comentarios = Comentario.query.filter_by(post_id=post_id, is_visible=True).options(*comentario_schema_options()).order_by(Comentario.created_at.asc()).all()
     
     if form.validate_on_submit():
         if current_user.is_authenticated:
@@ -136,7 +155,9 @@ def ver_post(post_id):
         else:
             flash('Debes iniciar sesión para comentar', 'warning')
             return redirect(url_for('main.login', next=request.url))
-            
+
+    if request.method == 'GET':
+        contador_vistas.registrar(post.id)
     return render_template('post.html', post=post, form=form, comentarios=comentarios)
 
 # ----------------------------
@@ -152,15 +173,12 @@ def editar_post(post_id):
         return redirect(url_for('main.ver_post', post_id=post.id))
         
     form = PostForm()
-    form.categorias.choices = [(c.id, c.nombre) for c in Categoria.query.all()]
+    form.categorias.choices = categorias_cache.snapshot().choices()
     
     if form.validate_on_submit():
         post.titulo = form.titulo.data
         post.contenido = form.contenido.data
-        post.categorias = []
-        categoria = Categoria.query.get(form.categorias.data)
-        if categoria:
-            post.categorias.append(categoria)
+        post.categorias = categorias_cache.resolve([form.categorias.data], db.session) or []
         db.session.commit()
         flash('Tu post ha sido actualizado.', 'success')
         return redirect(url_for('main.ver_post', post_id=post.id))
@@ -180,9 +198,9 @@ def editar_post(post_id):
 @role_required('admin')  # Solo Admin
 def eliminar_post(post_id):
     post = Post.query.get_or_404(post_id)
-    db.session.delete(post)
-    db.session.commit()
-    flash(f'El post "{post.titulo}" ha sido eliminado permanentemente por un Admin.', 'success')
+    titulo = post.titulo
+    borrado.borrar_post(db.session, post, lote=current_app.config.get('DELETE_BATCH_SIZE', borrado.LOTE))
+    flash(f'El post "{titulo}" ha sido eliminado permanentemente por un Admin.', 'success')
     return redirect(url_for('main.index'))
 
 # ----------------------------
@@ -205,11 +223,16 @@ def eliminar_comentario(comentario_id):
 # POSTS POR CATEGORÍA
 @bp.route('/categoria/<nombre>')
 def posts_por_categoria(nombre):
-    page = request.args.get('page', 1, type=int)
-    categoria = Categoria.query.filter_by(nombre=nombre).first_or_404()
-    posts = Post.query.join(Post.categorias).filter(
-        Categoria.id == categoria.id, Post.is_published == True
-    ).order_by(Post.timestamp.desc()).paginate(page=page, per_page=5, error_out=False)
+    categoria_id = categorias_cache.snapshot().por_nombre.get(nombre)
+    if categoria_id is None:
+        abort(404)
+    query = Post.query.join(post_categoria, post_categoria.c.post_id == Post.id).filter(
+        post_categoria.c.categoria_id == categoria_id, Post.is_published == True
+    ).options(*post_feed_options())
+    try:
+        posts = paginate_posts(query, 5, request.args.get('cursor'))
+    except InvalidCursor:
+        return redirect(url_for('main.posts_por_categoria', nombre=nombre))
     
     return render_template('index.html', posts=posts, title=f'Posts en {nombre}')
 
@@ -224,9 +247,38 @@ def admin_panel():
 
 # ----------------------------
 # PANEL DE MODERACIÓN
-@bp.route('/moderator')
+# Cola paginada por cursor con los mismos filtros que /api/moderation/comments
+# (?is_visible=&post_id=&autor_id=&since=&until=); el autor viene en la misma
+# consulta. El POST oculta o restaura los seleccionados con un solo UPDATE.
+@bp.route('/moderator', methods=['GET', 'POST'])
 @login_required
 @role_required('moderator')
 def moderator_panel():
-    comentarios = Comentario.query.order_by(Comentario.created_at.desc()).all()
-    return render_template('moderator_panel.html', title='Panel de Moderación', comentarios=comentarios)
+    form = ModeracionForm()
+    if form.validate_on_submit():
+        ids = [int(i) for i in request.form.getlist('ids') if i.isdecimal()]
+        if ids:
+            visible = bool(form.mostrar.data)
+            cambiados = moderacion.cambiar_visibilidad(db.session, ids, visible)
+            db.session.commit()
+            flash(f"{cambiados} comentario(s) {'restaurados' if visible else 'ocultados'}.", 'success')
+        else:
+            flash('No seleccionaste ningún comentario.', 'warning')
+        return redirect(url_for('main.moderator_panel', **request.args))
+
+    limit = parse_limit(
+        request.args.get('limit'),
+        default=current_app.config.get('MODERATION_PER_PAGE', 50),
+        maximum=current_app.config.get('MODERATION_MAX_PER_PAGE', 200),
+    )
+    try:
+        filtros = moderacion.parse_filtros(request.args)
+        query = moderacion.filtrar(Comentario.query.options(joinedload(Comentario.autor)), filtros)
+        comentarios = paginate_keyset(query, moderacion.orden_cola(), limit, request.args.get('cursor'))
+    except (InvalidCursor, moderacion.FiltrosInvalidos) as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('main.moderator_panel'))
+
+    filtros_actuales = {k: v for k, v in request.args.items() if k != 'cursor' and v}
+    return render_template('moderator_panel.html', title='Panel de Moderación', comentarios=comentarios,
+                           form=form, filtros=filtros_actuales)
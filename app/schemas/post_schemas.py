@@ -13,6 +13,8 @@ class PostSchema(ma.Schema):
     # Campos requeridos
     titulo = fields.Str(required=True, validate=validate.Length(min=5, max=120))
     contenido = fields.Str(required=True, validate=validate.Length(min=10))
+    # Resumen guardado (ver models.hacer_excerpt): solo sale con ?fields=excerpt
+    excerpt = fields.Str(dump_only=True)
     
     # Campo para recibir las CATEGORIAS (lista de IDs al cargar/validar)
     categoria_ids = fields.List(fields.Int(), load_only=True, required=False)
@@ -21,10 +23,16 @@ class PostSchema(ma.Schema):
     categorias = fields.List(fields.Nested(CategoriaSchema(only=('id', 'nombre'))), dump_only=True)
     
     # 🚨 CAMBIO CLAVE: Usamos la cadena 'ComentarioSchema'.
-    comentarios = fields.List(fields.Nested('ComentarioSchema'), dump_only=True)
+    # Se lee de la relación no dinámica para poder precargarla (ver services/loaders.py).
+    comentarios = fields.List(fields.Nested('ComentarioSchema'), dump_only=True, attribute='comentarios_visibles')
     
     # Campos de relaciones y metadata (solo lectura al enviar datos)
     autor_id = fields.Int(dump_only=True, attribute='usuario_id')
+    # Desnormalizados en la tabla post (ver services/contadores.py)
+    comment_count = fields.Int(dump_only=True)
+    last_comment_at = fields.DateTime(dump_only=True)
+    # Con escritura diferida (ver services/vistas.py)
+    view_count = fields.Int(dump_only=True)
     created_at = fields.DateTime(dump_only=True, attribute='created_at')
     updated_at = fields.DateTime(dump_only=True, attribute='updated_at')
     is_published = fields.Bool()
@@ -32,5 +40,5 @@ class PostSchema(ma.Schema):
     class Meta:
         load_instance = True
 
-post_schema = PostSchema()
-posts_schema = PostSchema(many=True)
\ No newline at end of file
+post_schema = PostSchema(exclude=('excerpt',))
+posts_schema = PostSchema(many=True, exclude=('excerpt',))
\ No newline at end of file
@@ -0,0 +1,130 @@
+from sqlalchemy import delete, select, update
+
+# -----------------------------------------------------------
+# BORRADOS POR LOTES (posts, usuarios, categorías)
+# -----------------------------------------------------------
+# session.delete(post) con la cascada del ORM cargaba cada comentario y lo
+# borraba fila por fila; borrar un usuario o una categoría recorría igual
+# sus posts, comentarios o filas de post_categoria. Aquí las filas
+# dependientes se borran (o se desvinculan, SET NULL) con DELETE/UPDATE
+# ... WHERE id IN (...) de a `lote` filas, con un commit por lote para no
+# retener los locks de escritura durante todo el borrado. Al final se borra
+# el objeto con el ORM: las relaciones tienen passive_deletes, así que no
+# carga nada más, y sus eventos mantienen contadores, índice de búsqueda y
+# cachés.
+#
+# Los DELETE/UPDATE de Core no disparan los eventos del ORM: cada lote
+# ajusta a mano lo que ellos harían. Si el borrado se interrumpe, lo hecho
+# en los lotes anteriores queda confirmado y consistente; repetirlo
+# continúa donde quedó.
+
+LOTE = 5000
+
+
+def _lotes(session, consulta, columna, lote):
+    """
+    Filas de `consulta` en listas de hasta `lote`, en orden de `columna` (la
+    primera columna seleccionada). Cada lote sigue después del último, así
+    una columna sin índice se recorre una sola vez.
+    """
+    ultimo = None
+    while True:
+        pagina = consulta if ultimo is None else consulta.where(columna > ultimo)
+        filas = session.execute(pagina.order_by(columna).limit(lote)).all()
+        if not filas:
+            return
+        yield filas
+        ultimo = filas[-1][0]
+
+
+def borrar_comentarios_de_post(session, post_id, lote=LOTE):
+    """Borra los comentarios de `post_id` por lotes. Devuelve cuántos borró."""
+    from app.extensions import response_cache
+    from app.models import Comentario
+    from app.services import contadores
+
+    consulta = select(Comentario.id, Comentario.is_visible).where(Comentario.post_id == post_id)
+    total = 0
+    for filas in _lotes(session, consulta, Comentario.id, lote):
+        ids = [fila.id for fila in filas]
+        # Igual que contadores: is_visible=None cuenta como visible
+        visibles = sum(1 for fila in filas if fila.is_visible is not False)
+        session.execute(
+            delete(Comentario).where(Comentario.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        connection = session.connection()
+        contadores.ajustar(connection, contadores.COMENTARIOS_VISIBLES, -visibles)
+        contadores.ajustar(connection, contadores.COMENTARIOS_OCULTOS, visibles - len(ids))
+        contadores.recalcular_posts(connection, [post_id])
+        response_cache.mark_dirty(session, 'posts', f'post:{post_id}', f'comments:{post_id}')
+        session.commit()
+        total += len(ids)
+    return total
+
+
+def borrar_post(session, post, lote=LOTE):
+    """Borra `post` con sus comentarios y sus filas de post_categoria. Hace commit."""
+    from app.models import post_categoria
+
+    post_id = post.id
+    comentarios = borrar_comentarios_de_post(session, post_id, lote)
+    session.execute(delete(post_categoria).where(post_categoria.c.post_id == post_id))
+    session.delete(post)
+    session.commit()
+    return {'comments': comentarios}
+
+
+def _desvincular(session, modelo, usuario_id, lote):
+    """UPDATE <modelo> SET usuario_id = NULL por lotes (lo que haría ON DELETE SET NULL)."""
+    from app.extensions import response_cache
+
+    consulta = select(modelo.id).where(modelo.usuario_id == usuario_id)
+    total = 0
+    for filas in _lotes(session, consulta, modelo.id, lote):
+        ids = [fila.id for fila in filas]
+        session.execute(
+            update(modelo).where(modelo.id.in_(ids)).values(usuario_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        # 'autores' cubre todo lo que muestra autor_id o el autor anidado
+        response_cache.mark_dirty(session, 'autores')
+        session.commit()
+        total += len(ids)
+    return total
+
+
+def borrar_usuario(session, usuario, lote=LOTE):
+    """
+    Borra `usuario`; sus posts y comentarios quedan sin autor, como antes
+    (el ORM les ponía usuario_id = NULL uno por uno). Hace commit.
+    """
+    from app.models import Comentario, Post
+
+    usuario_id = usuario.id
+    posts = _desvincular(session, Post, usuario_id, lote)
+    comentarios = _desvincular(session, Comentario, usuario_id, lote)
+    session.delete(usuario)
+    session.commit()
+    return {'posts': posts, 'comments': comentarios}
+
+
+def borrar_categoria(session, categoria, lote=LOTE):
+    """Borra `categoria` y sus filas de post_categoria por lotes. Hace commit."""
+    from app.extensions import response_cache
+    from app.models import post_categoria
+
+    categoria_id = categoria.id
+    consulta = select(post_categoria.c.post_id).where(post_categoria.c.categoria_id == categoria_id)
+    total = 0
+    for filas in _lotes(session, consulta, post_categoria.c.post_id, lote):
+        ids = [fila.post_id for fila in filas]
+        session.execute(delete(post_categoria).where(
+            post_categoria.c.categoria_id == categoria_id, post_categoria.c.post_id.in_(ids)
+        ))
+        response_cache.mark_dirty(session, 'posts', 'categories')
+        session.commit()
+        total += len(ids)
+    session.delete(categoria)
+    session.commit()
+    return {'posts': total}
@@ -0,0 +1,196 @@
+import json
+from datetime import datetime
+
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+
+# -----------------------------------------------------------
+# IMPORTACIÓN MASIVA DE POSTS (NDJSON)
+# -----------------------------------------------------------
+# Cada línea del cuerpo es un objeto JSON con el mismo formato que
+# POST /api/posts/. Las líneas se validan a medida que llegan y se insertan
+# en lotes (executemany) de `batch_size`, con commit por lote: la memoria
+# depende del tamaño del lote, no del tamaño del archivo. Como el insert es
+# por Core, los contadores, el índice de búsqueda y la caché de respuestas
+# se actualizan aquí explícitamente.
+#
+# Las categorías se filtran primero contra la foto de categorias_cache y,
+# como puede estar vieja, cada lote confirma las suyas en la base antes de
+# insertar (igual que categorias_cache.resolve en el alta de un post).
+#
+# Si un lote falla (la base, no la validación), los anteriores ya quedaron
+# confirmados: la importación se corta ahí y el resumen dice cuántos se
+# crearon y desde qué línea reintentar.
+
+
+class ResultadoImportacion:
+    def __init__(self, max_errores):
+        self.creados = 0
+        self.fallidos = 0
+        self.lotes = 0
+        self.errores = []
+        self.max_errores = max_errores
+        self.abortado = None
+
+    def abortar(self, linea, error):
+        """El lote que empieza en `linea` no se pudo insertar: se corta la importación."""
+        self.abortado = {'line': linea, 'error': str(error)}
+
+    def error(self, linea, detalle):
+        self.fallidos += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append({'line': linea, 'errors': detalle})
+
+    def as_dict(self):
+        return {
+            'created': self.creados,
+            'failed': self.fallidos,
+            'batches': self.lotes,
+            'errors': self.errores,
+            'errors_truncated': self.fallidos - len(self.errores),
+            'aborted': self.abortado,
+        }
+
+
+def _confirmar_categorias(session, lote, resultado):
+    """
+    Confirma en la base, en la transacción del lote, las categorías que
+    nombra (bloqueadas en modo compartido hasta el commit en MySQL): la foto
+    de categorias_cache pudo quedar vieja. Las líneas con un id que ya no
+    existe pasan a ser errores y se quitan del lote.
+    """
+    from app.extensions import categorias_cache
+    from app.models import Categoria
+
+    ids = {i for _, categoria_ids, _ in lote for i in categoria_ids}
+    if not ids:
+        return lote
+    existentes = set(session.scalars(
+        select(Categoria.id).where(Categoria.id.in_(sorted(ids))).with_for_update(read=True)
+    ))
+    if len(existentes) == len(ids):
+        return lote
+    categorias_cache.invalidate()
+    validas = []
+    for fila, categoria_ids, numero in lote:
+        invalidas = [i for i in categoria_ids if i not in existentes]
+        if invalidas:
+            resultado.error(numero, {'categoria_ids': f'IDs de categoría inválidas: {invalidas}'})
+        else:
+            validas.append((fila, categoria_ids, numero))
+    return validas
+
+
+def _insertar_lote(session, lote, resultado):
+    """
+    Inserta posts y sus filas post_categoria. `lote` es
+    [(fila_post, categoria_ids, número de línea)].
+    """
+    from app.extensions import response_cache
+    from app.models import Post, post_categoria
+    from app.services import contadores, search
+
+    lote = _confirmar_categorias(session, lote, resultado)
+    if not lote:
+        session.rollback()
+        return 0
+    connection = session.connection()
+    filas = [fila for fila, _, _ in lote]
+
+    if connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+        ids = session.execute(
+            insert(Post.__table__).returning(Post.__table__.c.id, sort_by_parameter_order=True),
+            filas
+        ).scalars().all()
+    elif connection.dialect.name == 'mysql':
+        # Sin RETURNING: un solo INSERT multi-fila. InnoDB reserva de una vez
+        # los ids de un INSERT con cantidad de filas conocida (consecutivos en
+        # cualquier innodb_autoinc_lock_mode) y lastrowid es el primero.
+        resultado = session.execute(insert(Post.__table__).values(filas))
+        paso = _paso_autoincrement(connection)
+        ids = [resultado.lastrowid + i * paso for i in range(resultado.rowcount)]
+    else:
+        # SQLite sin RETURNING (< 3.35): lastrowid es el último; uno por fila
+        ids = [session.execute(insert(Post.__table__).values(**fila)).inserted_primary_key[0] for fila in filas]
+
+    enlaces = [
+        {'post_id': post_id, 'categoria_id': categoria_id}
+        for post_id, (_, categoria_ids, _) in zip(ids, lote)
+        for categoria_id in categoria_ids
+    ]
+    if enlaces:
+        session.execute(insert(post_categoria), enlaces)
+
+    contadores.ajustar(connection, contadores.POSTS, len(ids))
+    search.indexar_posts(connection, [(i, f['titulo'], f['contenido']) for i, f in zip(ids, filas)])
+    response_cache.mark_dirty(session, 'posts')
+    session.commit()
+    return len(ids)
+
+
+def _paso_autoincrement(connection):
+    paso = connection.info.get('auto_increment_increment')
+    if paso is None:
+        paso = connection.info['auto_increment_increment'] = int(
+            connection.exec_driver_sql('SELECT @@auto_increment_increment').scalar())
+    return paso
+
+
+def importar_posts(lineas, usuario_id, session, schema, batch_size=500, max_errores=1000):
+    """Procesa un iterable de líneas NDJSON (bytes o str) y devuelve el resumen."""
+    from app.extensions import categorias_cache
+    from app.models import hacer_excerpt
+
+    resultado = ResultadoImportacion(max_errores)
+    categorias = categorias_cache.snapshot().por_id
+    lote, desde = [], None
+
+    def insertar():
+        try:
+            resultado.creados += _insertar_lote(session, lote, resultado)
+        except Exception as e:
+            session.rollback()
+            resultado.abortar(desde, e)
+            return False
+        resultado.lotes += 1
+        return True
+
+    for numero, linea in enumerate(lineas, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            data = schema.load(json.loads(linea))
+        except ValidationError as e:
+            resultado.error(numero, e.messages)
+            continue
+        except (ValueError, TypeError) as e:
+            resultado.error(numero, f'JSON inválido: {e}')
+            continue
+
+        categoria_ids = list(dict.fromkeys(data.get('categoria_ids', [])))
+        invalidas = [i for i in categoria_ids if i not in categorias]
+        if invalidas:
+            resultado.error(numero, {'categoria_ids': f'IDs de categoría inválidas: {invalidas}'})
+            continue
+
+        if not lote:
+            desde = numero
+        lote.append(({
+            'titulo': data['titulo'],
+            'contenido': data['contenido'],
+            'excerpt': hacer_excerpt(data['contenido']),
+            'is_published': data.get('is_published', True),
+            'usuario_id': usuario_id,
+            'timestamp': datetime.utcnow(),
+        }, categoria_ids, numero))
+
+        if len(lote) >= batch_size:
+            if not insertar():
+                return resultado
+            lote = []
+
+    if lote:
+        insertar()
+
+    return resultado
@@ -0,0 +1,367 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import quote, urlencode
+
+from flask import request, make_response, current_app
+from sqlalchemy import inspect
+from werkzeug.utils import import_string
+
+from app.services.replicas import leer_del_primario
+
+# -----------------------------------------------------------
+# CACHÉ DE RESPUESTAS PARA LECTURAS PÚBLICAS
+# -----------------------------------------------------------
+# Las respuestas GET anónimas se guardan ya serializadas (bytes) junto con
+# un ETag fuerte. Cada entrada lleva "tags" (p.ej. 'posts', 'post:5') y los
+# eventos de sesión de SQLAlchemy invalidan exactamente los tags afectados
+# cuando se confirma (commit) una escritura sobre Post, Categoria o Comentario.
+#
+# Con réplicas de lectura, un MISS justo después de invalidar puede leer de
+# una réplica que todavía no tiene la escritura y guardar lo viejo por todo
+# el TTL. Por eso, durante REPLICA_LAG_SECONDS después de invalidar un tag,
+# los MISS de entradas con ese tag leen del primario. El costo: ese lapso
+# cada tag invalidado manda sus MISS al primario; si una réplica se atrasa
+# más que REPLICA_LAG_SECONDS, lo viejo puede volver a guardarse.
+#
+# El backend 'memory' es del proceso: con varios workers (gunicorn -w N) una
+# escritura solo invalida la caché del worker que la hizo y los demás siguen
+# sirviendo lo viejo hasta el TTL, y lo mismo pasa con la ventana de réplica.
+# El backend 'shared' comparte las invalidaciones (y sus instantes) por un
+# directorio local, RESPONSE_CACHE_DIR: cada tag es un archivo al que
+# invalidar le agrega un byte, y una entrada se descarta en get() si el
+# tamaño de alguno de sus archivos cambió desde que se empezó a generar.
+
+
+class CachedResponse:
+    __slots__ = ('body', 'status', 'mimetype', 'etag', 'tags', 'expires', 'size', 'versions')
+
+    def __init__(self, body, status, mimetype, etag, tags, expires, versions=None):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.etag = etag
+        self.tags = tags
+        self.expires = expires
+        self.size = len(body)
+        self.versions = versions
+
+
+class NullBackend:
+    """Backend que no guarda nada (caché deshabilitada)."""
+
+    def __init__(self, **options):
+        pass
+
+    def get(self, key):
+        return None
+
+    def set(self, key, entry):
+        pass
+
+    def invalidate_tags(self, tags):
+        pass
+
+    def versions(self, tags):
+        return None
+
+    def invalidated_within(self, tags, seconds):
+        return False
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class MemoryBackend:
+    """
+    LRU en memoria del proceso con expiración por TTL, tope de entradas y
+    tope de bytes. Mantiene un índice tag -> claves para invalidar sin
+    recorrer toda la caché.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, **options):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+
+    def versions(self, tags):
+        """Versión de los tags antes de generar una entrada (None: solo del proceso)."""
+        return None
+
+    def invalidated_within(self, tags, seconds):
+        """Invalidaciones de otros procesos en los últimos `seconds` (no las ve)."""
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedBackend(MemoryBackend):
+    """
+    LRU del proceso como 'memory', pero con invalidaciones compartidas entre
+    procesos por archivos de `directory` (uno por tag, un byte por invalidación).
+    """
+
+    def __init__(self, directory=None, **options):
+        if not directory:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND='shared' requiere RESPONSE_CACHE_DIR")
+        super().__init__(**options)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is not None and entry.versions != self.versions(entry.tags):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+            return None
+        return entry
+
+    def invalidate_tags(self, tags):
+        super().invalidate_tags(tags)
+        for tag in tags:
+            with open(self._ruta(tag), 'ab') as f:
+                f.write(b'.')
+
+    def versions(self, tags):
+        return tuple(sorted((tag, self._stat(tag)[0]) for tag in tags))
+
+    def invalidated_within(self, tags, seconds):
+        desde = time.time() - seconds
+        return any(self._stat(tag)[1] > desde for tag in tags)
+
+    def _ruta(self, tag):
+        return os.path.join(self.directory, quote(tag, safe=''))
+
+    def _stat(self, tag):
+        """(invalidaciones, instante de la última) del tag; (0, 0) si nunca se invalidó."""
+        try:
+            st = os.stat(self._ruta(tag))
+        except FileNotFoundError:
+            return 0, 0
+        return st.st_size, st.st_mtime
+
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'shared': SharedBackend,
+    'null': NullBackend,
+}
+
+
+def _tags_for(obj):
+    """Tags a invalidar cuando `obj` se inserta, modifica o borra."""
+    from app.models import Post, Categoria, Comentario, Usuario
+
+    if isinstance(obj, Post):
+        return {'posts', f'post:{obj.id}'}
+    if isinstance(obj, Comentario):
+        # Un comentario movido de post también cambia las páginas del anterior
+        anteriores = inspect(obj).attrs.post_id.history.deleted
+        return {'posts'} | {f'{prefijo}:{post_id}' for post_id in (obj.post_id, *anteriores)
+                            if post_id is not None for prefijo in ('post', 'comments')}
+    if isinstance(obj, Categoria):
+        return {'categories'}
+    if isinstance(obj, Usuario):
+        # Solo el username se muestra anidado en posts y comentarios.
+        state = inspect(obj)
+        if state.deleted or state.attrs.username.history.has_changes():
+            return {'autores'}
+    return set()
+
+
+class ResponseCache:
+    """Extensión Flask: `response_cache.cached('posts', 'post:{post_id}')`."""
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.ttl = 60
+        self.hits = 0
+        self.misses = 0
+        self.lag = 0
+        self._invalidados = {}  # tag -> monotonic hasta el que sus MISS van al primario
+        self._lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', 'memory')
+        app.config.setdefault('RESPONSE_CACHE_TTL', 60)
+        app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', 1024)
+        app.config.setdefault('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        app.config.setdefault('RESPONSE_CACHE_DIR', None)
+
+        backend = app.config['RESPONSE_CACHE_BACKEND']
+        backend_cls = BACKENDS[backend] if backend in BACKENDS else import_string(backend)
+        self.backend = backend_cls(
+            max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+            max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES'],
+            directory=app.config['RESPONSE_CACHE_DIR'],
+        )
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        # Sin réplicas (replicas.init_app va antes) todo se lee del primario
+        self.lag = app.config.get('REPLICA_LAG_SECONDS', 0) if 'replicas' in app.extensions else 0
+        self._invalidados = {}
+        app.extensions['response_cache'] = self
+        self._listen()
+
+    # --- Invalidación -------------------------------------------------
+
+    def _listen(self):
+        if self._listening:
+            return
+        from sqlalchemy import event
+        from app.extensions import db
+
+        event.listen(db.session, 'after_flush', self._collect)
+        event.listen(db.session, 'after_commit', self._flush_tags)
+        event.listen(db.session, 'after_rollback', self._discard_tags)
+        self._listening = True
+
+    def _collect(self, session, flush_context):
+        tags = session.info.setdefault('cache_tags', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            tags |= _tags_for(obj)
+
+    def _flush_tags(self, session):
+        tags = session.info.pop('cache_tags', None)
+        if tags:
+            self.invalidate(*tags)
+
+    def _discard_tags(self, session):
+        session.info.pop('cache_tags', None)
+
+    def mark_dirty(self, session, *tags):
+        """Para escrituras por Core (sin objetos ORM): invalida al hacer commit."""
+        session.info.setdefault('cache_tags', set()).update(tags)
+
+    def invalidate(self, *tags):
+        self.backend.invalidate_tags(tags)
+        if self.lag:
+            self._marcar(tags)
+
+    def _marcar(self, tags):
+        ahora = time.monotonic()
+        with self._lock:
+            if len(self._invalidados) > 1024:
+                self._invalidados = {t: h for t, h in self._invalidados.items() if h > ahora}
+            for tag in tags:
+                self._invalidados[tag] = ahora + self.lag
+
+    def _recien_invalidado(self, tags):
+        ahora = time.monotonic()
+        return (any(self._invalidados.get(tag, 0) > ahora for tag in tags)
+                or self.backend.invalidated_within(tags, self.lag))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.backend)}
+
+    # --- Decorador ----------------------------------------------------
+
+    def cached(self, *tags):
+        def wrapper(fn):
+            @wraps(fn)
+            def decorated(*args, **kwargs):
+                # Solo lecturas anónimas: con token la respuesta podría variar.
+                if request.method not in ('GET', 'HEAD') or 'Authorization' in request.headers:
+                    return fn(*args, **kwargs)
+
+                key = _cache_key()
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return _respond(entry.body, entry.status, entry.mimetype, entry.etag, 'HIT')
+
+                self.misses += 1
+                entry_tags = frozenset(tag.format(**kwargs) for tag in tags)
+                # Antes de consultar: una invalidación durante fn() deja la entrada vieja
+                versions = self.backend.versions(entry_tags)
+                if self.lag and self._recien_invalidado(entry_tags):
+                    leer_del_primario()
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                body = response.get_data()
+                etag = hashlib.sha256(body).hexdigest()[:32]
+                self.backend.set(key, CachedResponse(
+                    body, response.status_code, response.mimetype, etag, entry_tags,
+                    time.monotonic() + self.ttl, versions
+                ))
+                return _respond(body, response.status_code, response.mimetype, etag, 'MISS')
+            return decorated
+        return wrapper
+
+
+def _cache_key():
+    args = sorted(request.args.items(multi=True))
+    return request.path + ('?' + urlencode(args) if args else '')
+
+
+def _respond(body, status, mimetype, etag, state):
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, status=status, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['X-Cache'] = state
+    return response
@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import select
+
+# -----------------------------------------------------------
+# CACHÉ DE DATOS DE REFERENCIA: CATEGORÍAS
+# -----------------------------------------------------------
+# Las categorías son pocas y casi nunca cambian, pero se consultaban en cada
+# render (context processor), en cada formulario de post y en cada alta de
+# post por API. Se mantiene una "foto" versionada en memoria (id -> nombre y
+# nombre -> id) que se descarta cuando se confirma una escritura sobre
+# Categoria. El TTL acota cuánto puede tardar otro proceso en enterarse; por
+# eso las escrituras (resolve) no confían en la foto y confirman los ids.
+
+CategoriaRef = namedtuple('CategoriaRef', ['id', 'nombre'])
+
+
+class CategoriaSnapshot:
+    def __init__(self, version, rows):
+        self.version = version
+        self.items = [CategoriaRef(id, nombre) for id, nombre in rows]
+        self.por_id = {c.id: c.nombre for c in self.items}
+        self.por_nombre = {c.nombre: c.id for c in self.items}
+        self.loaded_at = time.monotonic()
+
+    def choices(self):
+        """Opciones (id, nombre) para los SelectField de WTForms."""
+        return [(c.id, c.nombre) for c in self.items]
+
+
+class CategoriaCache:
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATEGORIAS_CACHE_TTL', 300)
+        self.ttl = app.config['CATEGORIAS_CACHE_TTL']
+        self.invalidate()
+        app.extensions['categorias_cache'] = self
+        self._listen()
+
+    def _listen(self):
+        if self._listening:
+            return
+        from sqlalchemy import event
+        from app.extensions import db
+
+        event.listen(db.session, 'after_flush', self._collect)
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_rollback', self._discard)
+        self._listening = True
+
+    def _collect(self, session, flush_context):
+        from app.models import Categoria
+        # Los dirty por backref (p.ej. Categoria.posts al asignar categorías
+        # a un post) no cambian la tabla: se ignoran.
+        dirty = [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+        for obj in list(session.new) + dirty + list(session.deleted):
+            if isinstance(obj, Categoria):
+                session.info['categorias_stale'] = True
+                return
+
+    def _after_commit(self, session):
+        if session.info.pop('categorias_stale', False):
+            self.invalidate()
+
+    def _discard(self, session):
+        session.info.pop('categorias_stale', None)
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._version += 1
+
+    def snapshot(self):
+        """Devuelve la foto vigente, recargándola si se invalidó o expiró."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            self.hits += 1
+            return snapshot
+
+        from app.extensions import db
+        from app.models import Categoria
+
+        self.misses += 1
+        version = self._version
+        rows = db.session.execute(
+            db.select(Categoria.id, Categoria.nombre).order_by(Categoria.id)
+        ).all()
+        snapshot = CategoriaSnapshot(version, rows)
+        with self._lock:
+            # Si hubo una invalidación mientras se leía, no se publica la foto vieja.
+            if version == self._version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def resolve(self, ids, session):
+        """
+        Convierte ids en instancias Categoria de `session` para asignarlas a
+        un post. Es un camino de escritura: se confirman en la base con una
+        sola consulta (bloqueadas en modo compartido hasta el commit en
+        MySQL), porque la foto puede tener hasta CATEGORIAS_CACHE_TTL
+        segundos y otro proceso pudo borrar una. Devuelve None si algún id
+        no existe; si la foto lo daba por bueno, se descarta.
+        """
+        from app.models import Categoria
+
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        encontradas = {
+            c.id: c for c in session.scalars(
+                select(Categoria).where(Categoria.id.in_(ids)).with_for_update(read=True)
+            )
+        }
+        if len(encontradas) != len(ids):
+            snapshot = self._snapshot
+            if snapshot is not None and any(i in snapshot.por_id for i in ids if i not in encontradas):
+                self.invalidate()
+            return None
+        return [encontradas[i] for i in ids]
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'version': self._version}
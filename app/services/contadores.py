@@ -0,0 +1,255 @@
+import random
+
+from sqlalchemy import event, func, inspect, select, update, insert, delete, case, or_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# -----------------------------------------------------------
+# CONTADORES MATERIALIZADOS
+# -----------------------------------------------------------
+# /api/stats hacía tres COUNT(*) por llamada, que en InnoDB recorren un
+# índice completo. En su lugar se mantiene la tabla `contador`, actualizada
+# dentro de la MISMA transacción por los eventos de insert/update/delete del
+# ORM. Las escrituras masivas por Core (que no disparan estos eventos) deben
+# llamar a `ajustar()` a mano; `reconstruir()` recalcula todo desde cero.
+#
+# Cada contador son COUNTER_SHARDS filas (nombre, shard) y su valor es la
+# suma: con una sola fila, todas las altas de comentarios se turnarían su
+# lock. Cada conexión suma siempre en el mismo shard (elegido al azar la
+# primera vez), así una transacción no toma dos filas del mismo contador.
+# La suma es un upsert del dialecto: la fila que falte se crea sin carrera.
+#
+# Los mismos eventos mantienen, por post, Post.comment_count (comentarios
+# visibles) y Post.last_comment_at: los listados los leen y ordenan por
+# ellos sin join ni COUNT. `reconstruir_posts()` los recalcula.
+
+POSTS = 'posts'
+COMENTARIOS_VISIBLES = 'comentarios_visibles'
+COMENTARIOS_OCULTOS = 'comentarios_ocultos'
+USUARIOS = 'usuarios'
+
+NOMBRES = (POSTS, COMENTARIOS_VISIBLES, COMENTARIOS_OCULTOS, USUARIOS)
+
+_listening = False
+_shards = 8
+
+
+def _upsert_mysql(tabla, valores, delta):
+    return mysql.insert(tabla).values(valores).on_duplicate_key_update(valor=tabla.c.valor + delta)
+
+
+def _upsert_on_conflict(dialecto):
+    def upsert(tabla, valores, delta):
+        return dialecto.insert(tabla).values(valores).on_conflict_do_update(
+            index_elements=[tabla.c.nombre, tabla.c.shard], set_={'valor': tabla.c.valor + delta})
+    return upsert
+
+
+_UPSERT = {
+    'mysql': _upsert_mysql,
+    'sqlite': _upsert_on_conflict(sqlite),
+    'postgresql': _upsert_on_conflict(postgresql),
+}
+
+
+def ajustar(connection, nombre, delta):
+    """Suma `delta` al contador `nombre` usando la conexión de la transacción actual."""
+    from app.models import Contador
+
+    if not delta:
+        return
+    shard = connection.info.get('contador_shard')
+    if shard is None or shard >= _shards:
+        shard = connection.info['contador_shard'] = random.randrange(_shards)
+    connection.execute(_UPSERT[connection.dialect.name](
+        Contador.__table__, {'nombre': nombre, 'shard': shard, 'valor': delta}, delta))
+
+
+def _ultimo_comentario(post_id):
+    """Subconsulta: fecha del último comentario visible de `post_id`."""
+    from app.models import Comentario
+
+    return (
+        select(func.max(Comentario.created_at))
+        .where(Comentario.post_id == post_id, Comentario.is_visible == True)
+        .scalar_subquery()
+    )
+
+
+def ajustar_post(connection, post_id, delta, creado=None):
+    """
+    Suma `delta` a comment_count de `post_id`. Un comentario nuevo (con su
+    fecha en `creado`) solo puede adelantar last_comment_at; en los demás
+    casos se recalcula (índice ix_comentario_post_visible_created).
+    """
+    from app.models import Post
+
+    if post_id is None or not delta:
+        return
+    valores = {'comment_count': Post.comment_count + delta}
+    if creado is None:
+        valores['last_comment_at'] = _ultimo_comentario(post_id)
+    else:
+        valores['last_comment_at'] = case(
+            (or_(Post.last_comment_at.is_(None), Post.last_comment_at < creado), creado),
+            else_=Post.last_comment_at,
+        )
+    connection.execute(update(Post).where(Post.id == post_id).values(valores))
+
+
+def _comentario_key(visible):
+    # is_visible=None se trata como visible (es el default de la columna).
+    return COMENTARIOS_OCULTOS if visible is False else COMENTARIOS_VISIBLES
+
+
+def _post_insert(mapper, connection, target):
+    ajustar(connection, POSTS, 1)
+
+
+def _post_delete(mapper, connection, target):
+    ajustar(connection, POSTS, -1)
+
+
+def _usuario_insert(mapper, connection, target):
+    ajustar(connection, USUARIOS, 1)
+
+
+def _usuario_delete(mapper, connection, target):
+    ajustar(connection, USUARIOS, -1)
+
+
+def _comentario_insert(mapper, connection, target):
+    ajustar(connection, _comentario_key(target.is_visible), 1)
+    if target.is_visible:
+        ajustar_post(connection, target.post_id, 1, target.created_at)
+
+
+def _anterior(history, actual, sin_cargar):
+    """Valor previo al flush; `sin_cargar` si cambió sin haberse leído antes."""
+    if history.deleted:
+        return history.deleted[0]
+    return sin_cargar if history.has_changes() else actual
+
+
+def _comentario_update(mapper, connection, target):
+    attrs = inspect(target).attrs
+    visible, post = attrs.is_visible.history, attrs.post_id.history
+    if not (visible.has_changes() or post.has_changes()):
+        return
+
+    antes = _anterior(visible, target.is_visible, True)
+    despues = target.is_visible
+    if _comentario_key(antes) != _comentario_key(despues):
+        ajustar(connection, _comentario_key(antes), -1)
+        ajustar(connection, _comentario_key(despues), 1)
+
+    # Por post cuenta lo que muestran los listados: is_visible == True
+    post_antes = _anterior(post, target.post_id, None)
+    if (bool(antes), post_antes) != (bool(despues), target.post_id):
+        if antes:
+            ajustar_post(connection, post_antes, -1)
+        if despues:
+            ajustar_post(connection, target.post_id, 1)
+
+
+def _comentario_delete(mapper, connection, target):
+    ajustar(connection, _comentario_key(target.is_visible), -1)
+    if target.is_visible:
+        ajustar_post(connection, target.post_id, -1)
+
+
+def init_app(app):
+    """Registra los eventos de mapper una sola vez por proceso."""
+    global _listening, _shards
+    app.config.setdefault('COUNTER_SHARDS', 8)
+    _shards = app.config['COUNTER_SHARDS']
+    if _listening:
+        return
+    from app.models import Post, Comentario, Usuario
+
+    event.listen(Post, 'after_insert', _post_insert)
+    event.listen(Post, 'after_delete', _post_delete)
+    event.listen(Usuario, 'after_insert', _usuario_insert)
+    event.listen(Usuario, 'after_delete', _usuario_delete)
+    event.listen(Comentario, 'after_insert', _comentario_insert)
+    event.listen(Comentario, 'after_update', _comentario_update)
+    event.listen(Comentario, 'after_delete', _comentario_delete)
+    _listening = True
+
+
+def leer(session):
+    """Devuelve {nombre: valor} con una sola consulta por clave primaria (suma los shards)."""
+    from app.models import Contador
+
+    valores = dict.fromkeys(NOMBRES, 0)
+    valores.update((nombre, int(valor)) for nombre, valor in session.execute(
+        select(Contador.nombre, func.sum(Contador.valor))
+        .where(Contador.nombre.in_(NOMBRES))
+        .group_by(Contador.nombre)
+    ).all())
+    return valores
+
+
+def reconstruir(session):
+    """Recalcula todos los contadores con COUNT(*) y los reemplaza (en el shard 0)."""
+    from app.models import Contador, Post, Comentario, Usuario
+
+    # SUM(CASE ...) en lugar de COUNT(*) FILTER: MySQL no soporta FILTER.
+    ocultos = func.coalesce(func.sum(case((Comentario.is_visible.is_(False), 1), else_=0)), 0)
+    total, n_ocultos = session.execute(select(func.count(), ocultos).select_from(Comentario)).one()
+    n_visibles = total - n_ocultos
+
+    valores = {
+        POSTS: session.scalar(select(func.count()).select_from(Post)),
+        COMENTARIOS_VISIBLES: n_visibles,
+        COMENTARIOS_OCULTOS: n_ocultos,
+        USUARIOS: session.scalar(select(func.count()).select_from(Usuario)),
+    }
+    session.execute(delete(Contador).where(Contador.nombre.in_(NOMBRES)))
+    session.execute(insert(Contador), [{'nombre': k, 'shard': 0, 'valor': v} for k, v in valores.items()])
+    session.commit()
+    return valores
+
+
+def _recalcular_posts(condicion):
+    """UPDATE que recalcula comment_count y last_comment_at de los posts que cumplen `condicion`."""
+    from app.models import Comentario, Post
+
+    visibles = (
+        select(func.count())
+        .where(Comentario.post_id == Post.id, Comentario.is_visible == True)
+        .scalar_subquery()
+    )
+    return (
+        update(Post).where(condicion)
+        .values(comment_count=visibles, last_comment_at=_ultimo_comentario(Post.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recalcular_posts(connection, post_ids):
+    """Recalcula los contadores de `post_ids` (cambios masivos por Core)."""
+    from app.models import Post
+
+    if post_ids:
+        connection.execute(_recalcular_posts(Post.id.in_(sorted(post_ids))))
+
+
+def reconstruir_posts(session, lote=10000):
+    """
+    Recalcula comment_count y last_comment_at de todos los posts, por rangos
+    de `lote` ids (una transacción por rango). Devuelve los posts recorridos.
+    """
+    from app.models import Post
+
+    total = 0
+    desde = 0
+    while True:
+        hasta = session.scalar(
+            select(Post.id).where(Post.id > desde).order_by(Post.id).offset(lote - 1).limit(1)
+        )
+        rango = Post.id > desde if hasta is None else (Post.id > desde) & (Post.id <= hasta)
+        total += session.execute(_recalcular_posts(rango)).rowcount
+        session.commit()
+        if hasta is None:
+            return total
+        desde = hasta
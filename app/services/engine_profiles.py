@@ -0,0 +1,118 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# -----------------------------------------------------------
+# PERFILES DEL ENGINE (pool y ajustes por motor)
+# -----------------------------------------------------------
+# DB_ENGINE_PROFILE elige un perfil con nombre; 'auto' (por defecto) toma
+# 'mysql' o 'sqlite' según SQLALCHEMY_DATABASE_URI y 'none' deja los valores
+# de SQLAlchemy. Cada perfil aporta SQLALCHEMY_ENGINE_OPTIONS (lo que ya
+# esté en la config tiene prioridad) y, para SQLite, los PRAGMA que se
+# ejecutan en cada conexión nueva (SQLITE_PRAGMAS agrega o reemplaza alguno).
+#
+# SQLite en WAL: los lectores no bloquean al escritor ni el escritor a los
+# lectores; synchronous=NORMAL es seguro en WAL (puede perder la última
+# transacción ante un corte de luz, nunca corromper la base).
+#
+# SQLite no aplica las FOREIGN KEY (ni sus ON DELETE CASCADE) salvo con
+# foreign_keys=ON en cada conexión: sin eso un borrado por Core podía dejar
+# filas de post_categoria o comentarios apuntando a un post que ya no existe.
+
+PERFILES = {
+    'none': {},
+    'mysql': {
+        'engine': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 10,
+            'pool_recycle': 280,   # por debajo de wait_timeout del servidor
+            'pool_pre_ping': True,  # descarta conexiones cortadas antes de usarlas
+        },
+    },
+    # Procesos con poca concurrencia (CLI, tareas): menos conexiones abiertas
+    'mysql-small': {
+        'engine': {
+            'pool_size': 2,
+            'max_overflow': 2,
+            'pool_timeout': 30,
+            'pool_recycle': 280,
+            'pool_pre_ping': True,
+        },
+    },
+    'sqlite': {
+        'engine': {
+            'pool_size': 10,
+            'max_overflow': 20,
+        },
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # negativo = KiB (64 MiB)
+            'busy_timeout': 5000,      # ms esperando un lock antes de "database is locked"
+            'temp_store': 'MEMORY',
+            'foreign_keys': 'ON',
+        },
+    },
+    # Modo histórico (rollback journal), para comparar en los benchmarks
+    'sqlite-rollback': {
+        'pragmas': {
+            'journal_mode': 'DELETE',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+            'foreign_keys': 'ON',
+        },
+    },
+}
+
+
+def nombre_perfil(app):
+    nombre = app.config.get('DB_ENGINE_PROFILE', 'auto')
+    if nombre != 'auto':
+        if nombre not in PERFILES:
+            raise ValueError(f'DB_ENGINE_PROFILE desconocido: {nombre!r} (opciones: {", ".join(PERFILES)})')
+        return nombre
+    backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    return backend if backend in PERFILES else 'none'
+
+
+def aplicar_perfil(app):
+    """Completa SQLALCHEMY_ENGINE_OPTIONS con el perfil. Va ANTES de db.init_app."""
+    app.config.setdefault('DB_ENGINE_PROFILE', 'auto')
+    perfil = PERFILES[nombre_perfil(app)]
+    opciones = dict(perfil.get('engine', {}))
+    if _en_memoria(app.config['SQLALCHEMY_DATABASE_URI']):
+        # SQLite en memoria usa un pool de una sola conexión: sin opciones de pool
+        opciones = {k: v for k, v in opciones.items() if not k.startswith(('pool_', 'max_overflow'))}
+    opciones.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones
+
+
+def init_app(app):
+    """Registra los PRAGMA del perfil en los engines ya creados (DESPUÉS de db.init_app)."""
+    from app.extensions import db
+
+    pragmas = dict(PERFILES[nombre_perfil(app)].get('pragmas') or {})
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _pragmas(pragmas))
+
+
+def _en_memoria(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def _pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nombre, valor in pragmas.items():
+                cursor.execute(f'PRAGMA {nombre}={valor}')
+        finally:
+            cursor.close()
+    return on_connect
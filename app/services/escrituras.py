@@ -0,0 +1,229 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------
+# COLA DE ESCRITURAS CON GROUP COMMIT (SQLite)
+# -----------------------------------------------------------
+# SQLite admite un solo escritor a la vez: con cada vista haciendo su propio
+# commit, los requests concurrentes se pelean por el lock (busy_timeout) y,
+# si la espera se alarga, fallan con "database is locked". Con
+# WRITE_QUEUE_ENABLED las vistas no escriben: encolan una "unidad de
+# trabajo" (función que recibe la sesión) y un único hilo escritor junta las
+# que lleguen en WRITE_QUEUE_WINDOW_MS y las confirma en UNA transacción
+# (un solo fsync para todo el lote). Cada request espera su Future y recibe
+# el resultado de su unidad o la excepción que lanzó, igual que si hubiera
+# hecho el commit él mismo.
+#
+# Si una unidad falla, el lote entero se deshace y cada unidad se vuelve a
+# ejecutar en su propia transacción: solo la que falla recibe el error. Por
+# eso una unidad tiene que poder repetirse (crea sus objetos adentro) y
+# devolver datos planos, no objetos ORM de la sesión del escritor.
+#
+# Los volcados en segundo plano (vistas, tendencias) también son unidades:
+# con la cola activa no compiten con ella por el lock de escritura.
+#
+# Desactivada (por defecto, y siempre con SQLite en memoria) la unidad corre
+# en el hilo del request con db.session y commit, como antes. El escritor es
+# uno por proceso: con varios workers se siguen turnando el lock, pero cada
+# uno llega con un lote en vez de un commit por request.
+
+
+class ColaEscriturasLlena(RuntimeError):
+    """La cola del escritor está llena o no atendió la unidad a tiempo."""
+
+
+class _Pendiente:
+    __slots__ = ('unidad', 'args', 'futuro')
+
+    def __init__(self, unidad, args):
+        self.unidad = unidad
+        self.args = args
+        self.futuro = Future()
+
+
+class ColaEscrituras:
+    def __init__(self, app=None):
+        self.activa = False
+        self.ventana = 0.002
+        self.max_lote = 64
+        self.timeout = 10
+        self.lotes = 0
+        self.unidades = 0
+        self.reintentos = 0
+        self.max_lote_visto = 0
+        self._app = None
+        self._cola = None
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._registrado = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('WRITE_QUEUE_ENABLED', False)
+        app.config.setdefault('WRITE_QUEUE_WINDOW_MS', 2)
+        app.config.setdefault('WRITE_QUEUE_MAX_BATCH', 64)
+        app.config.setdefault('WRITE_QUEUE_MAX_PENDING', 1000)
+        app.config.setdefault('WRITE_QUEUE_TIMEOUT', 10)
+        self.shutdown()
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        # En memoria hay una sola conexión compartida: un segundo hilo no suma nada
+        en_memoria = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+        self.activa = bool(app.config['WRITE_QUEUE_ENABLED']) and not en_memoria
+        self.ventana = app.config['WRITE_QUEUE_WINDOW_MS'] / 1000
+        self.max_lote = app.config['WRITE_QUEUE_MAX_BATCH']
+        self.timeout = app.config['WRITE_QUEUE_TIMEOUT']
+        self._cola = queue.Queue(maxsize=app.config['WRITE_QUEUE_MAX_PENDING'])
+        self._app = app
+        app.extensions['cola_escrituras'] = self
+
+    # --- lado del request ---
+
+    def ejecutar(self, unidad, *args):
+        """
+        Ejecuta unidad(session, *args) y confirma. Devuelve lo que devuelve la
+        unidad o relanza su excepción (ya con la transacción deshecha).
+        """
+        from flask import current_app
+
+        # El escritor atiende solo a su app: con varias en el mismo proceso
+        # (benchmarks), lo que vuelca la anterior al apagarse va en línea.
+        if not self.activa or current_app._get_current_object() is not self._app:
+            from app.extensions import db
+            try:
+                resultado = unidad(db.session, *args)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            return resultado
+
+        # El request termina su transacción de lectura antes de esperar: su
+        # conexión vuelve al pool (si no, N requests esperando pueden agotarlo
+        # y dejar al escritor sin conexión) y, en modo rollback journal,
+        # suelta el lock SHARED que le impediría confirmar al escritor.
+        from app.extensions import db
+        db.session.rollback()
+
+        pendiente = _Pendiente(unidad, args)
+        self._arrancar()
+        try:
+            self._cola.put_nowait(pendiente)
+        except queue.Full:
+            raise ColaEscriturasLlena('Demasiadas escrituras en curso.')
+        try:
+            return pendiente.futuro.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Si el escritor todavía no la tomó, se retira; si ya corre, se espera
+            if pendiente.futuro.cancel():
+                raise ColaEscriturasLlena('El escritor no atendió la escritura a tiempo.')
+            return pendiente.futuro.result()
+
+    def _arrancar(self):
+        if self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, args=(self._app, self._cola),
+                                              name='escritor-sqlite', daemon=True)
+                self._hilo.start()
+                if not self._registrado:
+                    atexit.register(self.shutdown)
+                    self._registrado = True
+
+    # --- hilo escritor ---
+
+    def _bucle(self, app, cola):
+        from app.extensions import db
+
+        with app.app_context():
+            while True:
+                lote = self._tomar_lote(cola)
+                if lote is None:
+                    return
+                try:
+                    self._confirmar(db.session, lote)
+                except Exception as e:  # no debería pasar: _confirmar resuelve cada Future
+                    logger.exception('Error en el escritor')
+                    for pendiente in lote:
+                        if not pendiente.futuro.done():
+                            pendiente.futuro.set_exception(e)
+                finally:
+                    db.session.remove()
+
+    def _tomar_lote(self, cola):
+        """Espera la primera unidad y junta las que lleguen en la ventana. None = apagar."""
+        primero = cola.get()
+        if primero is None:
+            return None
+        lote = [primero]
+        limite = time.monotonic() + self.ventana
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                pendiente = cola.get(timeout=restante) if restante > 0 else cola.get_nowait()
+            except queue.Empty:
+                break
+            if pendiente is None:
+                cola.put(None)  # se procesa este lote y después se apaga
+                break
+            lote.append(pendiente)
+        return lote
+
+    def _confirmar(self, session, lote):
+        # Las que el request ya canceló (timeout) no se ejecutan
+        lote = [p for p in lote if p.futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        self.lotes += 1
+        self.unidades += len(lote)
+        self.max_lote_visto = max(self.max_lote_visto, len(lote))
+
+        try:
+            resultados = [p.unidad(session, *p.args) for p in lote]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(lote) == 1:
+                lote[0].futuro.set_exception(e)
+                return
+            # Cada una en su transacción: el error le llega solo a quien lo causó
+            self.reintentos += 1
+            for pendiente in lote:
+                self._confirmar_una(session, pendiente)
+            return
+
+        for pendiente, resultado in zip(lote, resultados):
+            pendiente.futuro.set_result(resultado)
+
+    def _confirmar_una(self, session, pendiente):
+        try:
+            resultado = pendiente.unidad(session, *pendiente.args)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            pendiente.futuro.set_exception(e)
+        else:
+            pendiente.futuro.set_result(resultado)
+
+    def shutdown(self):
+        """Confirma lo que ya está en la cola y detiene el escritor."""
+        with self._lock:
+            # Lo que llegue después (los volcados finales de atexit) va en línea
+            self.activa = False
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            self._cola.put(None)
+            hilo.join(timeout=self.timeout)
+
+    def stats(self):
+        return {'lotes': self.lotes, 'unidades': self.unidades,
+                'reintentos': self.reintentos, 'max_lote': self.max_lote_visto}
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+# -----------------------------------------------------------
+# EXPORTACIÓN EN STREAMING (NDJSON / CSV)
+# -----------------------------------------------------------
+# Se seleccionan solo columnas (sin instancias ORM ni identity map) y se
+# leen con un cursor del lado del servidor (stream_results + yield_per),
+# así que la memoria del worker no depende de la cantidad de filas.
+
+RECURSOS = ('posts', 'comments', 'users')
+FORMATOS = ('ndjson', 'csv')
+MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+YIELD_PER = 1000
+
+
+def _columnas(recurso):
+    from app.models import Post, Comentario, Usuario
+
+    # password_hash nunca se exporta
+    if recurso == 'posts':
+        return Post.timestamp, [Post.id, Post.titulo, Post.contenido, Post.timestamp,
+                                Post.is_published, Post.usuario_id]
+    if recurso == 'comments':
+        return Comentario.created_at, [Comentario.id, Comentario.post_id, Comentario.usuario_id,
+                                       Comentario.contenido, Comentario.created_at,
+                                       Comentario.updated_at, Comentario.is_visible]
+    if recurso == 'users':
+        return Usuario.created_at, [Usuario.id, Usuario.username, Usuario.email, Usuario.role,
+                                    Usuario.created_at]
+    raise KeyError(recurso)
+
+
+def _valor(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+
+def filas(session, recurso, since=None):
+    """Genera (encabezados, iterador de tuplas) leyendo en bloques de YIELD_PER."""
+    fecha, columnas = _columnas(recurso)
+    stmt = select(*columnas).order_by(columnas[0])
+    if since is not None:
+        stmt = stmt.where(fecha >= since)
+    result = session.execute(stmt.execution_options(stream_results=True, yield_per=YIELD_PER))
+    return [c.key for c in columnas], result
+
+
+def generar(session, recurso, formato='ndjson', since=None):
+    """Generador de trozos de texto listos para enviar (uno por fila)."""
+    encabezados, result = filas(session, recurso, since)
+    try:
+        if formato == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(encabezados)
+            for row in result:
+                writer.writerow([_valor(v) for v in row])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for row in result:
+                yield json.dumps(dict(zip(encabezados, map(_valor, row))), ensure_ascii=False) + '\n'
+    finally:
+        result.close()
+
+
+def parse_since(raw):
+    """Fecha ISO 8601 (p.ej. 2025-01-31 o 2025-01-31T12:00:00) o None."""
+    if not raw:
+        return None
+    return datetime.fromisoformat(raw)
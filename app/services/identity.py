@@ -0,0 +1,134 @@
+import threading
+import time
+
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+
+# -----------------------------------------------------------
+# IDENTIDAD DEL REQUEST
+# -----------------------------------------------------------
+# El token se verifica UNA vez por request y el resultado queda en `g`.
+# El rol sale de los claims del JWT (lo pone LoginAPI), así que los chequeos
+# de permisos no consultan la base; la fila Usuario se carga solo si alguien
+# la pide (p.ej. para mostrar el username).
+
+
+class Identity:
+    def __init__(self, user_id, role, claims):
+        self.user_id = user_id
+        self.role = role
+        self.claims = claims
+        self._usuario = None
+
+    @property
+    def is_staff(self):
+        return self.role in ('admin', 'moderator')
+
+    @property
+    def usuario(self):
+        """Fila Usuario, cargada perezosamente (como mucho una vez por request)."""
+        if self._usuario is None:
+            from app.extensions import db, user_cache
+            self._usuario = user_cache.get(db.session, self.user_id)
+        return self._usuario
+
+
+def current_identity(optional=False):
+    """
+    Devuelve la identidad del request, verificando el JWT si todavía no se
+    hizo. Con optional=True devuelve None si no hay token.
+    """
+    if '_identity' not in g:
+        if verify_jwt_in_request(optional=optional) is None:
+            return None
+        claims = get_jwt()
+        g._identity = Identity(int(claims['sub']), claims.get('role', ''), claims)
+    return g._identity
+
+
+# -----------------------------------------------------------
+# CACHÉ CORTA DE USUARIOS (sesión web / Flask-Login)
+# -----------------------------------------------------------
+# Flask-Login llama a `load_user` en cada request web. Con TTL > 0 se
+# guardan los valores de columna del usuario y se reconstruye la instancia
+# adjunta a la sesión sin SELECT (merge con load=False). Cualquier cambio
+# confirmado sobre el usuario lo saca de la caché.
+
+_COLUMNAS = ('id', 'username', 'email', 'password_hash', 'role', 'created_at')
+
+
+class UserCache:
+    def __init__(self, app=None):
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_TTL', 0)
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.clear()
+        app.extensions['user_cache'] = self
+        self._listen()
+
+    def _listen(self):
+        if self._listening:
+            return
+        from sqlalchemy import event
+        from app.extensions import db
+
+        event.listen(db.session, 'after_flush', self._collect)
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_rollback', self._discard)
+        self._listening = True
+
+    def _collect(self, session, flush_context):
+        from app.models import Usuario
+        dirty = [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+        for obj in dirty + list(session.deleted):
+            if isinstance(obj, Usuario):
+                session.info.setdefault('usuarios_stale', set()).add(obj.id)
+
+    def _after_commit(self, session):
+        for user_id in session.info.pop('usuarios_stale', ()):
+            self.evict(user_id)
+
+    def _discard(self, session):
+        session.info.pop('usuarios_stale', None)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, session, user_id):
+        from sqlalchemy.orm import make_transient_to_detached
+        from app.models import Usuario
+
+        if not self.ttl:
+            return session.get(Usuario, user_id)
+
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            usuario = Usuario(**entry[1])
+            make_transient_to_detached(usuario)
+            return session.merge(usuario, load=False)
+
+        self.misses += 1
+        usuario = session.get(Usuario, user_id)
+        if usuario is not None:
+            valores = {c: getattr(usuario, c) for c in _COLUMNAS}
+            with self._lock:
+                self._entries[user_id] = (time.monotonic() + self.ttl, valores)
+        return usuario
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
@@ -0,0 +1,133 @@
+import logging
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+
+from flask import g, has_app_context, request
+
+# -----------------------------------------------------------
+# INSTRUMENTACIÓN SQL POR REQUEST
+# -----------------------------------------------------------
+# Con SQL_INSTRUMENTATION activado se escuchan before/after_cursor_execute
+# de cada engine y se acumula, por request, la cantidad de sentencias y el
+# tiempo de base. Eso sale en el header Server-Timing (visible en las
+# DevTools del navegador). Además:
+#   - las sentencias que superan SLOW_QUERY_MS se loguean (logger 'app.sql')
+#     normalizadas y con el endpoint;
+#   - si la misma sentencia normalizada se repite SQL_N_PLUS_ONE_THRESHOLD
+#     veces o más en un request, se loguea como probable N+1.
+# Desactivado no se registra ningún listener: costo cero.
+
+logger = logging.getLogger('app.sql')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM = re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+')
+_LISTA = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_FILAS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_ESPACIOS = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def normalizar(statement):
+    """SQL sin literales ni listas de parámetros: la 'forma' de la consulta."""
+    sql = _STRING.sub('?', statement)
+    sql = _PARAM.sub('?', sql)
+    sql = _NUMERO.sub('?', sql)
+    sql = _LISTA.sub('(...)', sql)
+    sql = _FILAS.sub(r'\1', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+class EstadisticasSQL:
+    """Lo medido durante un request (queda en g._sql)."""
+
+    __slots__ = ('consultas', 'segundos', 'inicio', 'repetidas')
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.inicio = time.perf_counter()
+        self.repetidas = Counter()
+
+
+def estadisticas():
+    """EstadisticasSQL del request actual, o None si la instrumentación está apagada."""
+    return g.get('_sql') if has_app_context() else None
+
+
+class SqlInstrumentation:
+    def __init__(self, app=None):
+        self.slow_seconds = 0.1
+        self.n_plus_one = 5
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_INSTRUMENTATION', False)
+        app.config.setdefault('SLOW_QUERY_MS', 100)
+        app.config.setdefault('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        app.extensions['sql_instrumentation'] = self
+        if not app.config['SQL_INSTRUMENTATION']:
+            return
+
+        from sqlalchemy import event
+        from app.extensions import db
+
+        self.slow_seconds = app.config['SLOW_QUERY_MS'] / 1000
+        self.n_plus_one = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    # --- eventos de SQLAlchemy ---
+
+    # El inicio va en el contexto de ejecución (uno por sentencia) y no en una
+    # pila en conn.info: una sentencia que falla no llega a after_cursor_execute
+    # y dejaría su inicio en la pila, corriendo los tiempos de las siguientes.
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._sql_inicio = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        transcurrido = time.perf_counter() - context._sql_inicio
+        stats = estadisticas()
+        if stats is None:
+            # Fuera de un request (CLI, tareas): solo el log de lentas
+            if transcurrido >= self.slow_seconds:
+                logger.warning('Consulta lenta (%.1f ms) fuera de request: %s',
+                               transcurrido * 1000, normalizar(statement))
+            return
+
+        stats.consultas += 1
+        stats.segundos += transcurrido
+        forma = normalizar(statement)
+        stats.repetidas[forma] += 1
+        if transcurrido >= self.slow_seconds:
+            logger.warning('Consulta lenta (%.1f ms) en %s: %s',
+                           transcurrido * 1000, request.endpoint, forma)
+
+    # --- ciclo del request ---
+
+    def _before_request(self):
+        g._sql = EstadisticasSQL()
+
+    def _after_request(self, response):
+        stats = g.pop('_sql', None)
+        if stats is None:
+            return response
+
+        total = time.perf_counter() - stats.inicio
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.segundos * 1000:.1f};desc="{stats.consultas} consultas", '
+            f'app;dur={total * 1000:.1f}'
+        )
+        for forma, veces in stats.repetidas.items():
+            if veces >= self.n_plus_one:
+                logger.warning('Posible N+1 en %s: %d ejecuciones de %s', request.endpoint, veces, forma)
+        return response
@@ -0,0 +1,29 @@
+from sqlalchemy.orm import defer, selectinload, joinedload
+
+from app.models import Post, Comentario
+
+# -----------------------------------------------------------
+# ESTRATEGIAS DE CARGA (evitar N+1 al serializar)
+# -----------------------------------------------------------
+# Cada función devuelve las opciones de carga que necesita un schema o
+# template concreto. selectinload resuelve cada relación con UNA consulta
+# `WHERE ... IN (...)` por página, así que el número de consultas queda fijo
+# sin importar cuántos posts o comentarios haya en la página.
+
+
+def post_schema_options():
+    """Lo que dumpea PostSchema: categorías y comentarios visibles con su autor."""
+    return (
+        selectinload(Post.categorias),
+        selectinload(Post.comentarios_visibles).selectinload(Comentario.autor),
+    )
+
+
+def post_feed_options():
+    """Lo que usa index.html: el autor de cada post; del texto, solo el excerpt."""
+    return (joinedload(Post.autor), defer(Post.contenido))
+
+
+def comentario_schema_options():
+    """Lo que dumpea ComentarioSchema: el autor anidado."""
+    return (selectinload(Comentario.autor),)
@@ -0,0 +1,383 @@
+import atexit
+import fcntl
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, abort, current_app, g, has_app_context, request
+
+# -----------------------------------------------------------
+# MÉTRICAS (GET /metrics, formato de texto de Prometheus)
+# -----------------------------------------------------------
+# Cada proceso acumula en memoria, bajo un único lock que se toma solo
+# para sumar enteros:
+#   - requests por endpoint/método/status,
+#   - histograma de latencia por endpoint/método (buckets fijos),
+#   - requests en curso, checkouts del pool de conexiones,
+# y al exponerse se agregan los hits/misses de las cachés registradas en
+# app.extensions y el estado del pool del engine de `db`.
+#
+# Con varios workers (gunicorn -w N run:app) cada proceso vuelca su estado
+# a METRICS_DIR/metrics-<pid>.json como mucho cada METRICS_FLUSH_SECONDS, y
+# /metrics suma los archivos de todos. Los contadores de procesos que ya
+# terminaron se conservan (un contador no debe bajar); sus gauges no: al
+# salir (o al verlo muerto otro proceso) el archivo del pid se suma a
+# metrics-retirados.json y se borra, así el directorio no crece con cada
+# worker reciclado.
+#
+# /metrics no es público: con METRICS_TOKEN pide `Authorization: Bearer
+# <token>`; sin él, solo responde a las IPs de METRICS_ALLOWED_IPS
+# (por defecto, loopback).
+RETIRADOS = 'metrics-retirados.json'
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIJO = 'miniblog'
+
+
+class Metrics:
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._requests = {}   # (endpoint, método, status) -> n
+        self._latencia = {}   # (endpoint, método) -> [n por bucket..., +Inf, suma]
+        self._en_curso = 0
+        self._checkouts = 0
+        self.directorio = None
+        self.intervalo = 1.0
+        self.token = None
+        self.ips = ()
+        self._ultimo_volcado = 0.0
+        self._registrado = False
+        self._extra = {'pool': {}, 'caches': {}}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_DIR', None)
+        app.config.setdefault('METRICS_FLUSH_SECONDS', 1.0)
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.config.setdefault('METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        from sqlalchemy import event
+        from app.extensions import db
+
+        self.directorio = app.config['METRICS_DIR']
+        self.intervalo = app.config['METRICS_FLUSH_SECONDS']
+        self.token = app.config['METRICS_TOKEN']
+        self.ips = tuple(app.config['METRICS_ALLOWED_IPS'])
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+            if not self._registrado:
+                atexit.register(self._al_salir)
+                self._registrado = True
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'checkout', self._checkout)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.exponer, methods=['GET'])
+        app.extensions['metrics'] = self
+
+    # --- camino caliente ---
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._checkouts += 1
+
+    def _before_request(self):
+        g._metrics_inicio = time.perf_counter()
+        with self._lock:
+            self._en_curso += 1
+
+    def _after_request(self, response):
+        inicio = g.get('_metrics_inicio')
+        if inicio is None:
+            return response
+        segundos = time.perf_counter() - inicio
+        endpoint = request.endpoint or 'sin_ruta'
+        bucket = bisect_left(BUCKETS, segundos)
+        clave = (endpoint, request.method)
+
+        with self._lock:
+            k = clave + (response.status_code,)
+            self._requests[k] = self._requests.get(k, 0) + 1
+            serie = self._latencia.get(clave)
+            if serie is None:
+                serie = self._latencia[clave] = [0] * (len(BUCKETS) + 2)
+            serie[bucket] += 1
+            serie[-1] += segundos
+
+        if self.directorio and time.monotonic() - self._ultimo_volcado >= self.intervalo:
+            self.volcar()
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('_metrics_inicio', None) is not None:
+            with self._lock:
+                self._en_curso -= 1
+
+    # --- estado del proceso ---
+
+    def foto(self):
+        """Estado de este proceso como dict serializable en JSON."""
+        with self._lock:
+            estado = {
+                'pid': os.getpid(),
+                'requests': [list(k) + [n] for k, n in self._requests.items()],
+                'latencia': [list(k) + [list(serie)] for k, serie in self._latencia.items()],
+                'en_curso': self._en_curso,
+                'checkouts': self._checkouts,
+            }
+        if has_app_context():
+            self._extra = {'pool': self._pool(), 'caches': self._caches()}
+        # Sin app context (atexit) se reutiliza lo último leído
+        estado.update(self._extra)
+        return estado
+
+    def _pool(self):
+        try:
+            from app.extensions import db
+            pool = db.engine.pool
+            return {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+            }
+        except Exception:
+            # StaticPool/SingletonThreadPool (SQLite en memoria) no llevan la cuenta
+            return {}
+
+    def _caches(self):
+        caches = {}
+        for nombre, ext in current_app.extensions.items():
+            stats = getattr(ext, 'stats', None)
+            if not callable(stats):
+                continue
+            valores = stats()
+            if isinstance(valores, dict) and 'hits' in valores and 'misses' in valores:
+                caches[nombre] = {'hits': valores['hits'], 'misses': valores['misses']}
+        return caches
+
+    def volcar(self):
+        """Escribe el estado de este proceso en METRICS_DIR (reemplazo atómico)."""
+        if not self.directorio:
+            return
+        self._ultimo_volcado = time.monotonic()
+        estado = self.foto()
+        destino = os.path.join(self.directorio, f'metrics-{estado["pid"]}.json')
+        temporal = f'{destino}.tmp'
+        with open(temporal, 'w') as f:
+            json.dump(estado, f)
+        os.replace(temporal, destino)
+
+    def _al_salir(self):
+        self.volcar()
+        with self._bloqueo():
+            self._retirar([os.path.join(self.directorio, f'metrics-{os.getpid()}.json')])
+
+    def _bloqueo(self):
+        """flock del directorio: retirar y leer no se mezclan entre procesos."""
+        return _Flock(os.path.join(self.directorio, 'metrics.lock'))
+
+    def _retirar(self, rutas):
+        """Suma los archivos de procesos terminados a RETIRADOS y los borra (con _bloqueo)."""
+        rutas = [ruta for ruta in rutas if os.path.exists(ruta)]
+        if not rutas:
+            return
+        destino = os.path.join(self.directorio, RETIRADOS)
+        acumulado = _leer(destino) or {'pid': 0, 'requests': [], 'latencia': [], 'en_curso': 0,
+                                       'checkouts': 0, 'caches': {}}
+        for ruta in rutas:
+            foto = _leer(ruta)
+            if foto is not None:
+                acumulado = _sumar(acumulado, foto)
+        temporal = f'{destino}.tmp'
+        with open(temporal, 'w') as f:
+            json.dump(acumulado, f)
+        os.replace(temporal, destino)
+        for ruta in rutas:
+            os.remove(ruta)
+
+    def _fotos(self):
+        if not self.directorio:
+            return [self.foto()]
+        self.volcar()
+        with self._bloqueo():
+            # Sin el lock, otro proceso podría retirar un archivo entre que se
+            # lee el pid y RETIRADOS, y /metrics lo sumaría dos veces
+            nombres = [n for n in os.listdir(self.directorio) if n.startswith('metrics-') and n.endswith('.json')]
+            muertos = [n for n in nombres if n != RETIRADOS and not _vivo(_pid(n))]
+            self._retirar([os.path.join(self.directorio, n) for n in muertos])
+            vigentes = [n for n in nombres if n not in muertos]
+            if muertos and RETIRADOS not in vigentes:
+                vigentes.append(RETIRADOS)
+            fotos = []
+            for nombre in vigentes:
+                foto = _leer(os.path.join(self.directorio, nombre))
+                if foto is not None:
+                    foto['vivo'] = nombre != RETIRADOS
+                    fotos.append(foto)
+        return fotos
+
+    # --- exposición ---
+
+    def _autorizado(self):
+        if self.token:
+            enviado = request.headers.get('Authorization', '')
+            return hmac.compare_digest(enviado.encode(), f'Bearer {self.token}'.encode())
+        return request.remote_addr in self.ips
+
+    def exponer(self):
+        if not self._autorizado():
+            abort(403)
+        return Response(render(self._fotos()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class _Flock:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+
+    def __enter__(self):
+        self._archivo = open(self.ruta, 'w')
+        fcntl.flock(self._archivo, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self._archivo.close()  # cerrar suelta el flock
+
+
+def _pid(nombre):
+    try:
+        return int(nombre[len('metrics-'):-len('.json')])
+    except ValueError:
+        return os.getpid()  # nombre ajeno: no se retira
+
+
+def _leer(ruta):
+    try:
+        with open(ruta) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _sumar(acumulado, foto):
+    """Suma los contadores de `foto` a `acumulado` (los gauges de un proceso muerto no cuentan)."""
+    requests = {tuple(fila[:3]): fila[3] for fila in acumulado['requests']}
+    for endpoint, metodo, status, n in foto['requests']:
+        k = (endpoint, metodo, status)
+        requests[k] = requests.get(k, 0) + n
+    latencia = {(endpoint, metodo): serie for endpoint, metodo, serie in acumulado['latencia']}
+    for endpoint, metodo, serie in foto['latencia']:
+        total = latencia.setdefault((endpoint, metodo), [0] * len(serie))
+        for i, v in enumerate(serie):
+            total[i] += v
+    caches = dict(acumulado['caches'])
+    for nombre, valores in foto.get('caches', {}).items():
+        total = caches.setdefault(nombre, {'hits': 0, 'misses': 0})
+        caches[nombre] = {'hits': total['hits'] + valores['hits'], 'misses': total['misses'] + valores['misses']}
+    return {
+        'pid': 0,
+        'requests': [list(k) + [n] for k, n in requests.items()],
+        'latencia': [list(k) + [serie] for k, serie in latencia.items()],
+        'en_curso': 0,
+        'checkouts': acumulado['checkouts'] + foto['checkouts'],
+        'caches': caches,
+    }
+
+
+def _vivo(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _etiquetas(**etiquetas):
+    partes = []
+    for k, v in etiquetas.items():
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{k}="{v}"')
+    return '{' + ','.join(partes) + '}'
+
+
+def render(fotos):
+    """Suma las fotos de todos los procesos y las escribe en formato Prometheus."""
+    requests, latencia, caches = {}, {}, {}
+    en_curso = checkouts = 0
+    pool = {'size': 0, 'checked_out': 0, 'overflow': 0}
+
+    for foto in fotos:
+        for endpoint, metodo, status, n in foto['requests']:
+            k = (endpoint, metodo, status)
+            requests[k] = requests.get(k, 0) + n
+        for endpoint, metodo, serie in foto['latencia']:
+            total = latencia.setdefault((endpoint, metodo), [0] * len(serie))
+            for i, v in enumerate(serie):
+                total[i] += v
+        checkouts += foto['checkouts']
+        for nombre, valores in foto.get('caches', {}).items():
+            total = caches.setdefault(nombre, {'hits': 0, 'misses': 0})
+            total['hits'] += valores['hits']
+            total['misses'] += valores['misses']
+        if foto.get('vivo', True):
+            en_curso += foto['en_curso']
+            for k, v in foto.get('pool', {}).items():
+                pool[k] += v
+
+    lineas = []
+
+    def metrica(nombre, tipo, ayuda):
+        lineas.append(f'# HELP {PREFIJO}_{nombre} {ayuda}')
+        lineas.append(f'# TYPE {PREFIJO}_{nombre} {tipo}')
+
+    metrica('http_requests_total', 'counter', 'Requests por endpoint, método y status.')
+    for (endpoint, metodo, status), n in sorted(requests.items()):
+        lineas.append(f'{PREFIJO}_http_requests_total'
+                      f'{_etiquetas(endpoint=endpoint, method=metodo, status=status)} {n}')
+
+    metrica('http_request_duration_seconds', 'histogram', 'Latencia por endpoint y método.')
+    for (endpoint, metodo), serie in sorted(latencia.items()):
+        acumulado = 0
+        for limite, n in zip(BUCKETS + ('+Inf',), serie[:-1]):
+            acumulado += n
+            lineas.append(f'{PREFIJO}_http_request_duration_seconds_bucket'
+                          f'{_etiquetas(endpoint=endpoint, method=metodo, le=limite)} {acumulado}')
+        base = _etiquetas(endpoint=endpoint, method=metodo)
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_sum{base} {serie[-1]:.6f}')
+        lineas.append(f'{PREFIJO}_http_request_duration_seconds_count{base} {acumulado}')
+
+    metrica('http_requests_in_flight', 'gauge', 'Requests en curso.')
+    lineas.append(f'{PREFIJO}_http_requests_in_flight {en_curso}')
+
+    metrica('db_pool_checkouts_total', 'counter', 'Conexiones tomadas del pool.')
+    lineas.append(f'{PREFIJO}_db_pool_checkouts_total {checkouts}')
+    metrica('db_pool_size', 'gauge', 'Tamaño configurado del pool (suma de procesos).')
+    lineas.append(f'{PREFIJO}_db_pool_size {pool["size"]}')
+    metrica('db_pool_checked_out', 'gauge', 'Conexiones en uso.')
+    lineas.append(f'{PREFIJO}_db_pool_checked_out {pool["checked_out"]}')
+    metrica('db_pool_overflow', 'gauge', 'Conexiones abiertas por encima del tamaño del pool.')
+    lineas.append(f'{PREFIJO}_db_pool_overflow {pool["overflow"]}')
+
+    metrica('cache_hits_total', 'counter', 'Aciertos por caché.')
+    for nombre, valores in sorted(caches.items()):
+        lineas.append(f'{PREFIJO}_cache_hits_total{_etiquetas(cache=nombre)} {valores["hits"]}')
+    metrica('cache_misses_total', 'counter', 'Fallos por caché.')
+    for nombre, valores in sorted(caches.items()):
+        lineas.append(f'{PREFIJO}_cache_misses_total{_etiquetas(cache=nombre)} {valores["misses"]}')
+
+    return '\n'.join(lineas) + '\n'
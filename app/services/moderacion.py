@@ -0,0 +1,136 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+# -----------------------------------------------------------
+# COLA DE MODERACIÓN
+# -----------------------------------------------------------
+# La cola lista comentarios (visibles u ocultos) del más nuevo al más viejo,
+# paginada por cursor sobre (created_at, id) y filtrada por visibilidad,
+# post, autor y rango de fechas. Con is_visible usa el índice
+# (is_visible, created_at); con post_id, (post_id, is_visible, created_at).
+#
+# Ocultar o restaurar en lote es UN `UPDATE ... WHERE id IN (...)`. Como un
+# UPDATE de Core no dispara los eventos del ORM, aquí se hace a mano lo que
+# ellos harían: contadores de /api/stats, comment_count/last_comment_at de
+# los posts afectados, la tendencia de esos posts (al confirmar) y los tags
+# de la caché de respuestas, todo en la misma transacción.
+
+
+class FiltrosInvalidos(ValueError):
+    """Un filtro de la cola no se puede interpretar."""
+
+
+_BOOLEANOS = {'1': True, 'true': True, 'si': True, '0': False, 'false': False, 'no': False}
+
+
+def _entero(args, nombre):
+    raw = args.get(nombre)
+    if raw in (None, ''):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise FiltrosInvalidos(f"'{nombre}' debe ser un entero.")
+
+
+def _fecha(args, nombre):
+    raw = args.get(nombre)
+    if raw in (None, ''):
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise FiltrosInvalidos(f"'{nombre}' debe ser una fecha ISO 8601 (p.ej. 2025-01-31).")
+
+
+def parse_filtros(args):
+    """
+    Filtros de la cola desde los parámetros del request: is_visible
+    (1/0/true/false), post_id, autor_id, since y until (ISO 8601, until
+    excluyente). Devuelve un dict sin los ausentes.
+    """
+    filtros = {}
+    raw = args.get('is_visible')
+    if raw not in (None, ''):
+        if raw.lower() not in _BOOLEANOS:
+            raise FiltrosInvalidos("'is_visible' debe ser 1, 0, true o false.")
+        filtros['is_visible'] = _BOOLEANOS[raw.lower()]
+    for nombre in ('post_id', 'autor_id'):
+        valor = _entero(args, nombre)
+        if valor is not None:
+            filtros[nombre] = valor
+    for nombre in ('since', 'until'):
+        valor = _fecha(args, nombre)
+        if valor is not None:
+            filtros[nombre] = valor
+    return filtros
+
+
+def filtrar(query, filtros):
+    """Aplica los filtros de parse_filtros() a una consulta sobre Comentario."""
+    from app.models import Comentario
+
+    if 'is_visible' in filtros:
+        query = query.filter(Comentario.is_visible == filtros['is_visible'])
+    if 'post_id' in filtros:
+        query = query.filter(Comentario.post_id == filtros['post_id'])
+    if 'autor_id' in filtros:
+        query = query.filter(Comentario.usuario_id == filtros['autor_id'])
+    if 'since' in filtros:
+        query = query.filter(Comentario.created_at >= filtros['since'])
+    if 'until' in filtros:
+        query = query.filter(Comentario.created_at < filtros['until'])
+    return query
+
+
+def orden_cola():
+    """Claves de paginate_keyset(): más nuevos primero, con el id como desempate."""
+    from app.models import Comentario
+
+    return [(Comentario.created_at, 'desc'), (Comentario.id, 'desc')]
+
+
+def cambiar_visibilidad(session, ids, visible):
+    """
+    Oculta (visible=False) o restaura comentarios por id con un solo UPDATE.
+    Solo toca los que cambian de estado; devuelve cuántos fueron. No hace
+    commit: el llamador cierra la transacción.
+    """
+    from app.extensions import response_cache, tendencias
+    from app.models import Comentario
+    from app.services import contadores
+
+    ids = sorted(set(ids))
+    if not ids:
+        return 0
+    condicion = (Comentario.id.in_(ids), Comentario.is_visible == (not visible))
+
+    # Qué posts pierden o ganan comentarios (bloqueadas hasta el commit en
+    # MySQL); de paso, la fecha de cada uno va a la tendencia de su post. Por
+    # la conexión: las filas se recorren de a una, sin cargarlas todas.
+    signo = 1 if visible else -1
+    por_post = tendencias.anotar_comentarios(session, session.connection().execute(
+        select(Comentario.post_id, Comentario.created_at)
+        .where(*condicion)
+        .with_for_update()
+    ), signo)
+    if not por_post:
+        return 0
+
+    cambiados = session.execute(
+        update(Comentario).where(*condicion)
+        .values(is_visible=visible)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    connection = session.connection()
+    contadores.ajustar(connection, contadores.COMENTARIOS_VISIBLES, signo * cambiados)
+    contadores.ajustar(connection, contadores.COMENTARIOS_OCULTOS, -signo * cambiados)
+    contadores.recalcular_posts(connection, [p for p in por_post if p is not None])
+
+    tags = {'posts'}
+    for post_id in por_post:
+        tags |= {f'post:{post_id}', f'comments:{post_id}'}
+    response_cache.mark_dirty(session, *tags)
+    return cambiados
@@ -0,0 +1,167 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+# -----------------------------------------------------------
+# PAGINACIÓN POR CURSOR (KEYSET)
+# -----------------------------------------------------------
+# En lugar de OFFSET (que recorre y descarta todas las filas anteriores),
+# cada página arranca "después" de la última fila de la página previa.
+# El cursor es opaco para el cliente: codifica los valores de las columnas
+# de orden de esa última fila. Así la página N cuesta lo mismo que la 1,
+# siempre que exista un índice que cubra el filtro y el orden.
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se puede decodificar o sus valores no son del tipo esperado."""
+
+
+class KeysetPage:
+    """Resultado de una página: filas, cursor siguiente y límite aplicado."""
+
+    def __init__(self, items, next_cursor, limit):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def parse_limit(raw, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    """Convierte el parámetro `limit` a entero dentro de [1, maximum]."""
+    if raw in (None, ''):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:  # p.ej. NullType de una expresión calculada
+        return None
+
+
+def _nombre(column):
+    return getattr(column, 'key', None) or 'la clave de orden'
+
+
+def _decode_value(value, column):
+    """Valida `value` contra el tipo de `column` antes de que llegue al SQL."""
+    if value is None:
+        if getattr(column, 'nullable', False):
+            return None
+        raise ValueError(f'valor nulo para {_nombre(column)}')
+    tipo = _python_type(column)
+    if tipo is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get('dt'), str):
+            raise ValueError(f'se esperaba una fecha para {_nombre(column)}')
+        return datetime.fromisoformat(value['dt'])
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f'valor inesperado para {_nombre(column)}')
+    if tipo is int and not isinstance(value, int):
+        raise ValueError(f'se esperaba un entero para {_nombre(column)}')
+    if tipo in (float, Decimal) and isinstance(value, str):
+        raise ValueError(f'se esperaba un número para {_nombre(column)}')
+    if tipo is str and not isinstance(value, str):
+        raise ValueError(f'se esperaba un texto para {_nombre(column)}')
+    return value
+
+
+def encode_cursor(values, orden=None):
+    """
+    Codifica los valores de orden de una fila en un token URL-safe. Con
+    `orden` (p.ej. el ?sort= pedido) el token queda atado a ese orden.
+    """
+    payload = [_encode_value(v) for v in values]
+    if orden is not None:
+        payload = {'orden': orden, 'valores': payload}
+    payload = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, keys, orden=None):
+    """Decodifica un cursor y valida sus valores contra las columnas de `keys` (y su `orden`)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if orden is not None:
+            if not isinstance(values, dict) or values.get('orden') != orden:
+                raise InvalidCursor(f'El cursor no corresponde al orden {orden!r}: pida la primera página.')
+            values = values.get('valores')
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('tamaño de cursor inesperado')
+        return [_decode_value(v, column) for v, (column, _) in zip(values, keys)]
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f'Cursor inválido: {e}')
+
+
+def _after(keys, values):
+    """
+    Construye la condición "fila posterior al cursor" para un orden
+    compuesto, p.ej. (ts < :ts) OR (ts = :ts AND id < :id) en orden DESC.
+    Se expande en ORs en lugar de usar tuple_() porque MySQL no usa el
+    índice compuesto con comparaciones de tuplas.
+    """
+    clauses = []
+    for i, (column, direction) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        if direction == 'desc':
+            step = column < values[i]
+        else:
+            step = column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def paginate_keyset(query, keys, limit, cursor=None, row_values=None, orden=None):
+    """
+    Pagina `query` por las columnas de `keys` [(columna, 'asc'|'desc'), ...].
+
+    La última clave debe ser única (normalmente el id) para que el orden sea
+    total. `row_values` permite extraer los valores de orden de cada fila
+    cuando no son atributos del objeto (p.ej. un score calculado). Con
+    `orden`, el cursor lleva ese nombre y uno de otro orden es InvalidCursor.
+    """
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, keys, orden)))
+
+    order = [column.desc() if direction == 'desc' else column.asc() for column, direction in keys]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if row_values is None:
+            values = [getattr(last, column.key) for column, _ in keys]
+        else:
+            values = row_values(last)
+        next_cursor = encode_cursor(values, orden)
+
+    return KeysetPage(rows, next_cursor, limit)
+
+
+def paginate_posts(query, limit, cursor=None):
+    """Feed de posts: más recientes primero, con el id como desempate (= ?sort=recent)."""
+    from app.models import Post
+    return paginate_keyset(query, [(Post.timestamp, 'desc'), (Post.id, 'desc')], limit, cursor, orden='recent')
@@ -0,0 +1,165 @@
+import multiprocessing
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt as _bcrypt
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# -----------------------------------------------------------
+# HASHING DE CONTRASEÑAS FUERA DEL HILO DEL REQUEST
+# -----------------------------------------------------------
+# scrypt/bcrypt son deliberadamente caros en CPU y, ejecutados en el hilo
+# del request, retienen el GIL y el worker. Aquí se delegan a un pool de
+# PROCESOS acotado (paralelismo real). Si el pool está saturado se rechaza
+# en lugar de encolar sin límite. El método se configura con el mismo
+# formato que usa werkzeug ('scrypt:32768:8:1', 'pbkdf2:sha256:600000') o
+# 'bcrypt:<rounds>'; los hashes con otros parámetros se actualizan en el
+# siguiente login correcto (ver Usuario.password_needs_rehash).
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasherBusy(RuntimeError):
+    """No hay capacidad para hashear en este momento (pool saturado, lento o caído)."""
+
+
+def _hash(method, password):
+    if method.startswith('bcrypt'):
+        rounds = int(method.split(':')[1]) if ':' in method else 12
+        return _bcrypt.hashpw(password.encode('utf-8'), _bcrypt.gensalt(rounds)).decode('ascii')
+    return generate_password_hash(password, method=method)
+
+
+def _verify(password_hash, password):
+    if password_hash.startswith('$2'):
+        return _bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('ascii'))
+    return check_password_hash(password_hash, password)
+
+
+def method_of(password_hash):
+    """Método con parámetros con el que se generó `password_hash`."""
+    if password_hash.startswith('$2'):
+        # $2b$12$... -> bcrypt:12
+        return 'bcrypt:%d' % int(password_hash.split('$')[2])
+    return password_hash.split('$', 1)[0]
+
+
+def _metodo_completo(method):
+    """`method` normalizado si ya trae todos sus parámetros; si no, None."""
+    partes = method.split(':')
+    try:
+        if partes[0] == 'bcrypt' and len(partes) == 2:
+            return 'bcrypt:%d' % int(partes[1])
+        if partes[0] == 'scrypt' and len(partes) == 4:
+            return 'scrypt:' + ':'.join(str(int(p)) for p in partes[1:])
+        if partes[0] == 'pbkdf2' and len(partes) == 3:
+            return f'pbkdf2:{partes[1]}:{int(partes[2])}'
+    except ValueError:
+        pass
+    return None
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.workers = 0
+        self.timeout = 10
+        self._method_full = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 0)
+        app.config.setdefault('PASSWORD_HASH_QUEUE', 4)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        self.configure(
+            method=app.config['PASSWORD_HASH_METHOD'],
+            workers=app.config['PASSWORD_HASH_WORKERS'],
+            queue=app.config['PASSWORD_HASH_QUEUE'],
+            timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+        )
+        app.extensions['password_hasher'] = self
+
+    def configure(self, method=DEFAULT_METHOD, workers=0, queue=4, timeout=10):
+        """
+        workers=0 hashea en el hilo que llama (CLI, pruebas). Con workers>0
+        se admiten como máximo workers*queue operaciones en vuelo.
+        """
+        self.shutdown()
+        self.method = method
+        # Con los parámetros en el texto no hace falta hashear; 'scrypt' o
+        # 'bcrypt' sin ellos se resuelven con un hash de prueba en el primer
+        # needs_rehash (no en cada create_app: cuesta cientos de ms).
+        self._method_full = _metodo_completo(method)
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers * queue) if workers else None
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # 'spawn': los hijos no heredan sockets de la base de datos del padre.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy('Demasiadas operaciones de contraseña en curso.')
+        executor = self._pool()
+        try:
+            futuro = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._descartar(executor)
+            raise PasswordHasherBusy('El pool de hashing no está disponible.')
+        # El lugar se libera cuando el proceso termina, no cuando el request
+        # deja de esperar: una tarea abandonada por timeout sigue ocupándolo.
+        futuro.add_done_callback(lambda f: self._slots.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeout:
+            futuro.cancel()
+            raise PasswordHasherBusy('La operación de contraseña no terminó a tiempo.')
+        except CancelledError:
+            raise PasswordHasherBusy('La operación de contraseña se canceló.')
+        except BrokenProcessPool:
+            self._descartar(executor)
+            raise PasswordHasherBusy('El pool de hashing no está disponible.')
+
+    def _descartar(self, executor):
+        """Un pool roto (un hijo murió) no se recupera: el próximo pedido crea otro."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def hash(self, password):
+        return self._run(_hash, self.method, password)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        if not password_hash:
+            return False
+        if self._method_full is None:
+            self._method_full = method_of(_hash(self.method, 'x'))
+        return method_of(password_hash) != self._method_full
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
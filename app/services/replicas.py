@@ -0,0 +1,154 @@
+import itertools
+import logging
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+# -----------------------------------------------------------
+# RÉPLICAS DE LECTURA (separación lectura/escritura)
+# -----------------------------------------------------------
+# SQLALCHEMY_REPLICA_URIS agrega una bind 'replica_<n>' por réplica. La
+# sesión de `db` es una RoutingSession: en un request marcado con
+# @solo_lectura las consultas van a UNA réplica, elegida en round-robin al
+# empezar el request. Lo demás queda en el primario:
+#   - los requests sin marcar y todo lo que no es request (CLI, tareas);
+#   - cualquier flush o INSERT/UPDATE/DELETE, y desde ahí el resto del
+#     request (read-your-writes).
+# Una réplica que falla al conectar o pierde la conexión queda fuera de la
+# rotación REPLICA_RETRY_SECONDS; si falló a mitad de un request de solo
+# lectura, ese request se repite una vez en el primario.
+#
+# Una réplica va atrasada respecto del primario. Para que la caché de
+# respuestas no guarde por todo su TTL lo que una réplica todavía no vio,
+# durante REPLICA_LAG_SECONDS después de invalidar un tag los MISS de ese
+# tag leen del primario (ver leer_del_primario y services/cache.py).
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_BIND = 'replica_'
+
+
+class ReplicaRouter:
+    def __init__(self, engines, retry_seconds):
+        self.engines = list(engines)
+        self.retry_seconds = retry_seconds
+        self._turno = itertools.count()
+        self._caidas = {}  # engine -> monotonic hasta el que no se usa
+
+    def elegir(self):
+        """Próxima réplica sana en round-robin, o None si no hay ninguna."""
+        ahora = time.monotonic()
+        n = len(self.engines)
+        inicio = next(self._turno)
+        for i in range(n):
+            engine = self.engines[(inicio + i) % n]
+            if self._caidas.get(engine, 0) <= ahora:
+                return engine
+        return None
+
+    def marcar_caida(self, engine):
+        if self._caidas.get(engine, 0) <= time.monotonic():
+            logger.warning('Réplica %s fuera de rotación por %ss', engine.url.render_as_string(hide_password=True),
+                           self.retry_seconds)
+        self._caidas[engine] = time.monotonic() + self.retry_seconds
+
+    def sanas(self):
+        ahora = time.monotonic()
+        return [e for e in self.engines if self._caidas.get(e, 0) <= ahora]
+
+    def _handle_error(self, context):
+        # Sin conexión (falló el connect) o conexión perdida: la réplica no responde
+        if context.connection is None or context.is_disconnect:
+            self.marcar_caida(context.engine)
+            if has_request_context() and g.get('_replica') is context.engine:
+                g._replica_caida = True
+
+
+def configurar(app):
+    """Agrega las réplicas a SQLALCHEMY_BINDS. Va ANTES de db.init_app."""
+    app.config.setdefault('SQLALCHEMY_REPLICA_URIS', [])
+    app.config.setdefault('REPLICA_RETRY_SECONDS', 30)
+    app.config.setdefault('REPLICA_LAG_SECONDS', 5)
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i, uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS']):
+        binds[f'{PREFIJO_BIND}{i}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def init_app(app):
+    """Crea el router con los engines de las réplicas (DESPUÉS de db.init_app)."""
+    from app.extensions import db
+
+    with app.app_context():
+        engines = [e for k, e in sorted(db.engines.items(), key=lambda kv: str(kv[0]))
+                   if k is not None and k.startswith(PREFIJO_BIND)]
+    if not engines:
+        return
+    router = ReplicaRouter(engines, app.config['REPLICA_RETRY_SECONDS'])
+    for engine in engines:
+        event.listen(engine, 'handle_error', router._handle_error)
+    app.extensions['replicas'] = router
+
+
+def leer_del_primario():
+    """El resto del request lee del primario aunque el handler sea @solo_lectura."""
+    if has_request_context():
+        g._primario = True
+
+
+def _replica_del_request():
+    if not has_request_context() or not g.get('_solo_lectura') or g.get('_primario'):
+        return None
+    if '_replica' not in g:
+        router = current_app.extensions.get('replicas')
+        g._replica = router.elegir() if router is not None else None
+    return g._replica
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('escritura'):
+            if clause is not None and getattr(clause, 'is_dml', False):
+                self.info['escritura'] = True
+            else:
+                replica = _replica_del_request()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _antes_del_flush(session, flush_context, instances):
+    # Desde la primera escritura, el resto del request lee del primario
+    session.info['escritura'] = True
+
+
+def solo_lectura(fn):
+    """
+    Marca un handler como de solo lectura: sus consultas pueden ir a una
+    réplica. Si la réplica se cae durante el request, se repite en el primario.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if 'replicas' not in current_app.extensions:
+            return fn(*args, **kwargs)
+
+        g._solo_lectura = True
+        try:
+            respuesta = fn(*args, **kwargs)
+        except OperationalError:
+            if not g.pop('_replica_caida', False):
+                raise
+        else:
+            if not g.pop('_replica_caida', False):
+                return respuesta
+
+        from app.extensions import db
+        db.session.rollback()
+        g._solo_lectura = False
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,154 @@
+import re
+
+from sqlalchemy import DDL, Float, event, inspect, literal_column, select, text, type_coerce
+from sqlalchemy.dialects.mysql import match
+
+# -----------------------------------------------------------
+# BÚSQUEDA DE TEXTO COMPLETO SOBRE POSTS
+# -----------------------------------------------------------
+# SQLite: tabla virtual FTS5 `post_fts` (rowid = post.id) ordenada por bm25.
+#         Se mantiene sincronizada con los eventos de insert/update/delete de
+#         Post, dentro de la misma transacción que la escritura.
+# MySQL:  índice FULLTEXT sobre post(titulo, contenido); InnoDB lo mantiene
+#         solo, así que los eventos no hacen nada en ese motor.
+# Nunca se recurre a LIKE '%q%'.
+
+FTS_TABLE = 'post_fts'
+FULLTEXT_INDEX = 'ft_post_titulo_contenido'
+
+# Peso relativo del título frente al contenido en bm25.
+PESO_TITULO = 10.0
+PESO_CONTENIDO = 1.0
+
+_CREATE_FTS = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(titulo, contenido, tokenize='unicode61 remove_diacritics 2')"
+)
+_CREATE_FULLTEXT = DDL(
+    f"ALTER TABLE post ADD FULLTEXT INDEX {FULLTEXT_INDEX} (titulo, contenido)"
+)
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+_listening = False
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Filtro para Alembic: la tabla FTS no pertenece a los modelos."""
+    return not (type_ == 'table' and name.startswith(FTS_TABLE))
+
+
+def _is_sqlite(connection):
+    return connection.dialect.name == 'sqlite'
+
+
+# --- Sincronización ---------------------------------------------------
+
+def indexar_posts(connection, rows):
+    """Inserta/reemplaza en el índice filas (id, titulo, contenido). Para escrituras por Core."""
+    if not _is_sqlite(connection) or not rows:
+        return
+    rows = [{'id': id, 'titulo': titulo, 'contenido': contenido} for id, titulo, contenido in rows]
+    connection.execute(text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), rows)
+    connection.execute(
+        text(f'INSERT INTO {FTS_TABLE} (rowid, titulo, contenido) VALUES (:id, :titulo, :contenido)'),
+        rows
+    )
+
+
+def desindexar_posts(connection, ids):
+    if not _is_sqlite(connection) or not ids:
+        return
+    connection.execute(text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), [{'id': i} for i in ids])
+
+
+def _post_insert(mapper, connection, target):
+    indexar_posts(connection, [(target.id, target.titulo, target.contenido)])
+
+
+def _post_update(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.titulo.history.has_changes() or state.attrs.contenido.history.has_changes():
+        indexar_posts(connection, [(target.id, target.titulo, target.contenido)])
+
+
+def _post_delete(mapper, connection, target):
+    desindexar_posts(connection, [target.id])
+
+
+def init_app(app):
+    global _listening
+    if _listening:
+        return
+    from app.models import Post
+
+    # Se crean junto con la tabla `post` (db.create_all); para bases ya
+    # existentes están la migración y `flask search reindex`.
+    event.listen(Post.__table__, 'after_create', _CREATE_FTS.execute_if(dialect='sqlite'))
+    event.listen(Post.__table__, 'after_create', _CREATE_FULLTEXT.execute_if(dialect='mysql'))
+    event.listen(Post, 'after_insert', _post_insert)
+    event.listen(Post, 'after_update', _post_update)
+    event.listen(Post, 'after_delete', _post_delete)
+    _listening = True
+
+
+def reindexar(session):
+    """Reconstruye el índice completo. Devuelve la cantidad de posts indexados."""
+    connection = session.connection()
+    total = session.execute(text('SELECT COUNT(*) FROM post')).scalar()
+    if _is_sqlite(connection):
+        session.execute(_CREATE_FTS)
+        session.execute(text(f'DELETE FROM {FTS_TABLE}'))
+        session.execute(text(
+            f'INSERT INTO {FTS_TABLE} (rowid, titulo, contenido) SELECT id, titulo, contenido FROM post'
+        ))
+        session.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    elif connection.dialect.name == 'mysql':
+        existe = session.execute(text(
+            'SELECT COUNT(*) FROM information_schema.statistics '
+            'WHERE table_schema = DATABASE() AND table_name = :t AND index_name = :i'
+        ), {'t': 'post', 'i': FULLTEXT_INDEX}).scalar()
+        if not existe:
+            session.execute(_CREATE_FULLTEXT)
+    session.commit()
+    return total
+
+
+# --- Consulta ---------------------------------------------------------
+
+def terminos(q):
+    """Palabras de la búsqueda, sin operadores ni comillas del usuario."""
+    return _TOKEN.findall(q or '')
+
+
+def coincidencias(session, q):
+    """
+    Subconsulta (post_id, score) con los posts que coinciden con `q`.
+    Un score mayor es un resultado más relevante en ambos motores. El score
+    es Float: los cursores de la búsqueda se validan contra ese tipo.
+    """
+    from app.models import Post
+
+    palabras = terminos(q)
+    dialect = session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # Cada palabra entre comillas: se buscan todas (AND) y la última
+        # también como prefijo, para resultados mientras se escribe.
+        consulta = ' '.join('"%s"' % p for p in palabras) + '*'
+        bm25 = literal_column(f'bm25({FTS_TABLE}, {PESO_TITULO}, {PESO_CONTENIDO})', Float)
+        # MATERIALIZED evita que SQLite aplane la subconsulta y evalúe bm25()
+        # fuera del contexto de la búsqueda FTS.
+        return (
+            select(literal_column('rowid').label('post_id'), (-bm25).label('score'))
+            .select_from(text(FTS_TABLE))
+            .where(text(f'{FTS_TABLE} MATCH :fts_q').bindparams(fts_q=consulta))
+            .cte('fts_coincidencias')
+            .prefix_with('MATERIALIZED')
+        )
+
+    relevancia = match(Post.titulo, Post.contenido, against=' '.join(palabras)).in_natural_language_mode()
+    return (
+        select(Post.id.label('post_id'), type_coerce(relevancia, Float).label('score'))
+        .where(relevancia > 0)
+        .subquery('fts_coincidencias')
+    )
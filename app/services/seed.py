@@ -0,0 +1,203 @@
+import itertools
+import random
+import time
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+# -----------------------------------------------------------
+# GENERADOR DE DATOS SINTÉTICOS (flask seed)
+# -----------------------------------------------------------
+# Reemplaza a populate_db.py. Genera volúmenes de producción con
+# distribuciones sesgadas (Zipf): pocos autores escriben la mayoría de los
+# posts, pocos posts concentran la mayoría de los comentarios, y una parte
+# de los comentarios queda oculta. Con la misma semilla produce siempre los
+# mismos datos. Todo se inserta con insert() de Core en lotes executemany.
+
+PALABRAS = (
+    'python flask api base datos consulta índice caché servidor cliente usuario '
+    'post comentario categoría rendimiento memoria proceso hilo red latencia '
+    'tecnología deporte comida viaje música cine libro ciencia salud historia '
+    'receta partido equipo ciudad montaña playa invierno verano noche mañana '
+    'rápido lento nuevo viejo grande pequeño fácil difícil mejor peor primero '
+    'último siempre nunca hoy ayer mañana aquí allá porque cuando donde como'
+).split()
+
+CATEGORIAS = [
+    'Tecnología', 'Deportes', 'Comida', 'Viajes', 'Música', 'Cine', 'Libros',
+    'Ciencia', 'Salud', 'Historia', 'Política', 'Economía', 'Arte', 'Juegos',
+]
+
+PASSWORD = '12345678'
+
+
+def _zipf_cum_weights(n, s=1.1):
+    """Pesos acumulados 1/rank^s para elegir con bisect (O(log n) por elección)."""
+    acumulado = 0.0
+    pesos = array('d')
+    for rank in range(1, n + 1):
+        acumulado += 1.0 / rank ** s
+        pesos.append(acumulado)
+    return pesos
+
+
+def _elegir(rng, pesos):
+    return bisect(pesos, rng.random() * pesos[-1])
+
+
+def _texto(rng, minimo, media):
+    # Longitudes log-normales: la mayoría cortas, algunas muy largas.
+    n = max(minimo, int(rng.lognormvariate(0, 0.8) * media))
+    return ' '.join(rng.choice(PALABRAS) for _ in range(n))
+
+
+def _siguiente_id(session, modelo):
+    return (session.scalar(select(func.max(modelo.id))) or 0) + 1
+
+
+def _lotes(iterable, size):
+    it = iter(iterable)
+    while True:
+        lote = list(itertools.islice(it, size))
+        if not lote:
+            return
+        yield lote
+
+
+class Informe:
+    def __init__(self, echo):
+        self.echo = echo
+        self.totales = {}
+        self.segundos = {}
+
+    def insertar(self, session, tabla, filas):
+        inicio = time.perf_counter()
+        session.execute(insert(tabla), filas)
+        session.commit()
+        self.totales[tabla.name] = self.totales.get(tabla.name, 0) + len(filas)
+        self.segundos[tabla.name] = self.segundos.get(tabla.name, 0.0) + time.perf_counter() - inicio
+
+    def reportar(self, *tablas):
+        for tabla in tablas:
+            total = self.totales.get(tabla.name, 0)
+            segundos = self.segundos.get(tabla.name, 0.0)
+            self.echo(f'{tabla.name:<16}{total:>12,} filas  {segundos:>8.2f} s  '
+                      f'{total / max(segundos, 1e-9):>12,.0f} filas/s')
+
+
+def generar(session, usuarios=1000, posts=10000, comentarios=50000, categorias=14,
+            seed=42, batch_size=5000, hidden_ratio=0.05, echo=print):
+    """Inserta los datos sintéticos y devuelve {tabla: filas insertadas}."""
+    from app.extensions import password_hasher
+    from app.models import Usuario, Post, Comentario, Categoria, post_categoria, hacer_excerpt
+
+    rng = random.Random(seed)
+    informe = Informe(echo)
+    ahora = datetime.utcnow().replace(microsecond=0)
+    password_hash = password_hasher.hash(PASSWORD)
+
+    # --- Categorías ---
+    primer_categoria = _siguiente_id(session, Categoria)
+    existentes = set(session.scalars(select(Categoria.nombre)))
+    nombres = [CATEGORIAS[i] if i < len(CATEGORIAS) else f'Categoría {i + 1}' for i in range(categorias)]
+    nombres = [n if n not in existentes else f'{n} ({primer_categoria + i})' for i, n in enumerate(nombres)]
+    if nombres:
+        informe.insertar(session, Categoria.__table__, [
+            {'id': primer_categoria + i, 'nombre': nombre} for i, nombre in enumerate(nombres)
+        ])
+    informe.reportar(Categoria.__table__)
+
+    # --- Usuarios ---
+    primer_usuario = _siguiente_id(session, Usuario)
+
+    def filas_usuarios():
+        for i in range(usuarios):
+            uid = primer_usuario + i
+            r = rng.random()
+            yield {
+                'id': uid,
+                'username': f'user{uid}',
+                'email': f'user{uid}@example.com',
+                'password_hash': password_hash,
+                'role': 'admin' if r < 0.001 else 'moderator' if r < 0.01 else 'user',
+                'created_at': ahora - timedelta(seconds=rng.randrange(730 * 86400)),
+            }
+
+    for lote in _lotes(filas_usuarios(), batch_size):
+        informe.insertar(session, Usuario.__table__, lote)
+    informe.reportar(Usuario.__table__)
+
+    if not usuarios or not posts:
+        return _finalizar(session, informe, echo)
+
+    # --- Posts (y sus filas post_categoria, lote a lote) ---
+    primer_post = _siguiente_id(session, Post)
+    pesos_autores = _zipf_cum_weights(usuarios)
+    pesos_categorias = _zipf_cum_weights(categorias, s=0.8) if categorias else None
+    edades_posts = array('l')  # segundos antes de `ahora`, para fechar comentarios
+
+    def filas_posts():
+        for i in range(posts):
+            edad = rng.randrange(365 * 86400)
+            edades_posts.append(edad)
+            contenido = _texto(rng, 10, 120)
+            yield {
+                'id': primer_post + i,
+                'titulo': _texto(rng, 2, 6)[:140],
+                'contenido': contenido,
+                'excerpt': hacer_excerpt(contenido),
+                'timestamp': ahora - timedelta(seconds=edad),
+                'is_published': rng.random() < 0.95,
+                'usuario_id': primer_usuario + _elegir(rng, pesos_autores),
+            }
+
+    for lote in _lotes(filas_posts(), batch_size):
+        informe.insertar(session, Post.__table__, lote)
+        if pesos_categorias:
+            informe.insertar(session, post_categoria, [
+                {'post_id': fila['id'], 'categoria_id': primer_categoria + c}
+                for fila in lote
+                for c in sorted({_elegir(rng, pesos_categorias) for _ in range(rng.randint(1, 3))})
+            ])
+    informe.reportar(Post.__table__, post_categoria)
+
+    # --- Comentarios: pocos posts "calientes" concentran la mayoría ---
+    primer_comentario = _siguiente_id(session, Comentario)
+    pesos_posts = _zipf_cum_weights(posts)
+
+    def filas_comentarios():
+        for i in range(comentarios):
+            p = _elegir(rng, pesos_posts)
+            fecha = ahora - timedelta(seconds=rng.randrange(edades_posts[p] + 1))
+            yield {
+                'id': primer_comentario + i,
+                'contenido': _texto(rng, 1, 15),
+                'created_at': fecha,
+                'updated_at': fecha,
+                'is_visible': rng.random() >= hidden_ratio,
+                'usuario_id': primer_usuario + _elegir(rng, pesos_autores),
+                'post_id': primer_post + p,
+            }
+
+    for lote in _lotes(filas_comentarios(), batch_size):
+        informe.insertar(session, Comentario.__table__, lote)
+    informe.reportar(Comentario.__table__)
+
+    return _finalizar(session, informe, echo)
+
+
+def _finalizar(session, informe, echo):
+    # Lo que en escrituras normales mantienen los eventos del ORM
+    from app.extensions import categorias_cache, response_cache
+    from app.services import contadores, search, tendencias
+
+    echo('Recalculando contadores, índice de búsqueda y tendencias...')
+    contadores.reconstruir(session)
+    contadores.reconstruir_posts(session)
+    search.reindexar(session)
+    tendencias.reconstruir(session)
+    categorias_cache.invalidate()
+    response_cache.backend.clear()
+    return informe.totales
@@ -0,0 +1,256 @@
+import functools
+
+from marshmallow import fields, missing, utils
+from sqlalchemy.orm import aliased
+
+# -----------------------------------------------------------
+# SERIALIZADORES COMPILADOS (camino rápido de los listados)
+# -----------------------------------------------------------
+# marshmallow resuelve por cada objeto y cada campo get_value, el default y
+# _serialize. Para los listados de solo lectura se genera UNA vez por schema
+# una función Python con un dict literal que hace lo mismo que esos campos
+# (mismo formato de salida, incluido el `format` de cada DateTime).
+#
+# La función solo lee atributos, así que acepta instancias ORM o filas de
+# un select de columnas. Con plano=True lee la forma que arma `consulta()`:
+#   - Nested a-uno aplanado en columnas `<campo>__<subcampo>` (p.ej.
+#     `autor__username`), None si la fila relacionada no existe;
+#   - listas anidadas desde `grupos[campo][obj.id]`, que el llamador carga
+#     aparte con una consulta por página.
+# Con `modelo`, los campos cuyo atributo el modelo no tiene se omiten, como
+# hace marshmallow (p.ej. created_at en PostSchema). Campos de tipos no
+# contemplados caen en field.serialize() de marshmallow.
+
+
+def _identificador(atributo):
+    return atributo.replace('.', '__')
+
+
+def _es_lista_anidada(campo):
+    return isinstance(campo, fields.List) and isinstance(campo.inner, fields.Nested)
+
+
+def _es_coleccion(campo):
+    return _es_lista_anidada(campo) or (isinstance(campo, fields.Nested) and campo.many)
+
+
+def _sub_schema(campo):
+    return campo.inner.schema if _es_lista_anidada(campo) else campo.schema
+
+
+def _destino(modelo, atributo):
+    """Modelo al otro lado de la relación `atributo`, o None sin modelo."""
+    if modelo is None:
+        return None
+    return getattr(modelo, atributo).property.mapper.class_
+
+
+def _campos(schema, modelo):
+    """(clave de salida, nombre, atributo, campo) de lo que schema.dump() emitiría."""
+    for nombre, campo in schema.dump_fields.items():
+        atributo = campo.attribute or nombre
+        if (modelo is not None and not hasattr(modelo, atributo.split('.')[0])
+                and campo.dump_default is missing):
+            continue  # marshmallow omite la clave
+        yield campo.data_key or nombre, nombre, atributo, campo
+
+
+class _Generador:
+    def __init__(self):
+        self.entorno = {'_texto': utils.ensure_text_type}
+        self.n = 0
+
+    def nombre(self, prefijo, valor):
+        self.n += 1
+        nombre = f'_{prefijo}{self.n}'
+        self.entorno[nombre] = valor
+        return nombre
+
+    def funcion(self, schema, modelo, plano, prefijo=''):
+        if schema._hooks.get('pre_dump') or schema._hooks.get('post_dump'):
+            raise ValueError(f'{type(schema).__name__} tiene hooks pre/post dump: no se puede compilar')
+
+        items = []
+        for salida, nombre, atributo, campo in _campos(schema, modelo):
+            items.append(f'{salida!r}: {self.expresion(campo, nombre, atributo, modelo, plano, prefijo)}')
+
+        codigo = 'def dump(obj, grupos=None):\n    return {' + ', '.join(items) + '}\n'
+        espacio = dict(self.entorno)
+        exec(compile(codigo, f'<serializer {type(schema).__name__}>', 'exec'), espacio)
+        dump = espacio['dump']
+        dump.__source__ = codigo
+        return dump
+
+    def expresion(self, campo, nombre, atributo, modelo, plano, prefijo):
+        lectura = f'obj.{prefijo}{_identificador(atributo) if plano else atributo}'
+        valor = f'(v := {lectura})'
+        tipo = type(campo)
+
+        if modelo is not None and not hasattr(modelo, atributo.split('.')[0]):
+            return self.marshmallow(campo, atributo)  # solo su dump_default
+
+        if _es_coleccion(campo):
+            sub_schema = _sub_schema(campo)
+            sub = self.nombre('lista', self.funcion(sub_schema, _destino(modelo, atributo), plano))
+            if plano:
+                return f'[{sub}(x, grupos) for x in grupos[{nombre!r}].get(obj.id, ())]'
+            return f'None if {valor} is None else [{sub}(x) for x in v]'
+
+        if isinstance(campo, fields.Nested):
+            sub_schema = campo.schema
+            if plano:
+                sub_prefijo = f'{prefijo}{_identificador(atributo)}__'
+                sub = self.nombre('uno', self.funcion(sub_schema, _destino(modelo, atributo), plano, sub_prefijo))
+                # Fila relacionada ausente (outer join): su id (o primer campo) es NULL
+                primero = 'id' if 'id' in sub_schema.dump_fields else next(iter(sub_schema.dump_fields))
+                clave = sub_schema.dump_fields[primero].attribute or primero
+                return f'None if obj.{sub_prefijo}{_identificador(clave)} is None else {sub}(obj, grupos)'
+            sub = self.nombre('uno', self.funcion(sub_schema, _destino(modelo, atributo), plano))
+            return f'None if {valor} is None else {sub}(v)'
+
+        if tipo in (fields.Integer, fields.Int) and not campo.as_string:
+            return f'None if {valor} is None else int(v)'
+        if tipo in (fields.String, fields.Str, fields.Email):
+            return f'None if {valor} is None else (v if v.__class__ is str else _texto(v))'
+        if tipo in (fields.Boolean, fields.Bool):
+            return lectura
+        if tipo is fields.DateTime:
+            formato = campo.format or campo.DEFAULT_FORMAT
+            funcion = campo.SERIALIZATION_FUNCS.get(formato)
+            if funcion is not None:
+                return f'None if {valor} is None else {self.nombre("fecha", funcion)}(v)'
+            return f'None if {valor} is None else v.strftime({formato!r})'
+
+        # Cualquier otro campo: el de marshmallow, tal cual
+        return self.marshmallow(campo, atributo)
+
+    def marshmallow(self, campo, atributo):
+        return f'{self.nombre("campo", campo)}.serialize({atributo!r}, obj)'
+
+
+_compilados = {}
+
+
+def compilar(schema, modelo=None, plano=False):
+    """
+    Devuelve dump(obj, grupos=None) -> dict equivalente a schema.dump(obj)
+    (sin many: para listas, una comprensión). Se genera una vez por schema.
+    """
+    clave = (type(schema), tuple(schema.only or ()), tuple(schema.exclude), modelo, plano)
+    dump = _compilados.get(clave)
+    if dump is None:
+        dump = _compilados[clave] = _Generador().funcion(schema, modelo, plano)
+    return dump
+
+
+def columnas(schema, modelo, prefijo=''):
+    """
+    Columnas (con label) y relaciones a-uno que necesita compilar(schema,
+    modelo, plano=True) para leer `modelo`. Las listas anidadas no entran:
+    van en `grupos`.
+    """
+    cols, joins = [], []
+    for _, _, atributo, campo in _campos(schema, modelo):
+        if _es_coleccion(campo) or not hasattr(modelo, atributo.split('.')[0]):
+            continue
+        if isinstance(campo, fields.Nested):
+            relacion = getattr(modelo, atributo)
+            destino = aliased(relacion.property.mapper.class_)
+            joins.append(relacion.of_type(destino))
+            sub_cols, sub_joins = columnas(campo.schema, destino, f'{prefijo}{_identificador(atributo)}__')
+            cols += sub_cols
+            joins += sub_joins
+        else:
+            cols.append(getattr(modelo, atributo).label(f'{prefijo}{_identificador(atributo)}'))
+    return cols, joins
+
+
+def consulta(session, schema, modelo, *extra):
+    """Query de filas planas para compilar(schema, modelo, plano=True); `extra` agrega columnas."""
+    cols, joins = columnas(schema, modelo)
+    query = session.query(*cols, *extra).select_from(modelo)
+    for join in joins:
+        query = query.outerjoin(join)
+    return query
+
+
+def agrupar(filas, clave):
+    """{fila.<clave>: [filas...]} conservando el orden de llegada."""
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault(getattr(fila, clave), []).append(fila)
+    return grupos
+
+
+def cargar_grupos(session, schema, modelo, ids):
+    """
+    Listas anidadas de `schema` para las filas `ids` de `modelo`: una consulta
+    por lista, siguiendo la relación (con su secondary o primaryjoin) y en
+    orden de id. Devuelve {campo: {id_padre: [filas]}}.
+    """
+    grupos = {}
+    for _, nombre, atributo, campo in _campos(schema, modelo):
+        if not _es_coleccion(campo):
+            continue
+        if not ids:
+            grupos[nombre] = {}
+            continue
+        relacion = getattr(modelo, atributo)
+        destino = aliased(relacion.property.mapper.class_)
+        cols, joins = columnas(_sub_schema(campo), destino)
+        query = (
+            session.query(*cols, modelo.id.label('_padre'))
+            .select_from(modelo)
+            .join(relacion.of_type(destino))
+        )
+        for join in joins:
+            query = query.outerjoin(join)
+        filas = query.filter(modelo.id.in_(ids)).order_by(destino.id).all()
+        grupos[nombre] = agrupar(filas, '_padre')
+    return grupos
+
+
+def serializar(session, schema, modelo, filas):
+    """Lista de dicts para filas de consulta(): listas anidadas incluidas."""
+    dump = compilar(schema, modelo, plano=True)
+    grupos = cargar_grupos(session, schema, modelo, [fila.id for fila in filas])
+    return [dump(fila, grupos) for fila in filas]
+
+
+# -----------------------------------------------------------
+# CAMPOS PEDIDOS (?fields=id,titulo,excerpt)
+# -----------------------------------------------------------
+# Un schema parcial (only=...) compila a su propia función y consulta() con
+# él selecciona solo esas columnas: lo que no se pide no sale de la base.
+
+
+class CamposInvalidos(ValueError):
+    """?fields= nombra campos que el schema no serializa."""
+
+
+def campos_pedidos(raw, schema_cls):
+    """
+    Tupla ordenada de campos de `?fields=` (siempre con 'id', que usan la
+    paginación y las listas anidadas), o None si no se pidió ninguno.
+    """
+    if not raw:
+        return None
+    pedidos = {nombre.strip() for nombre in raw.split(',') if nombre.strip()}
+    if not pedidos:
+        return None
+    disponibles = _schema_completo(schema_cls).dump_fields
+    desconocidos = sorted(pedidos - disponibles.keys())
+    if desconocidos:
+        raise CamposInvalidos(f"Campos desconocidos en 'fields': {', '.join(desconocidos)}.")
+    return tuple(sorted(pedidos | {'id'}))
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_completo(schema_cls):
+    return schema_cls()
+
+
+@functools.lru_cache(maxsize=256)
+def schema_parcial(schema_cls, campos, many=False):
+    """Instancia de `schema_cls` limitada a `campos` (una por combinación)."""
+    return schema_cls(only=campos, many=many)
@@ -0,0 +1,472 @@
+import atexit
+import heapq
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, event, inspect, insert, select, update
+from sqlalchemy.orm import object_session
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------
+# POSTS EN TENDENCIA (ranking con decaimiento, mantenido incrementalmente)
+# -----------------------------------------------------------
+# La tendencia de un post es la suma de sus comentarios visibles y vistas,
+# cada uno con peso w * 2^(-edad / TRENDING_HALF_LIFE_HOURS). Calcularla con
+# un GROUP BY sobre comentario en cada request recorre toda la tabla; en su
+# lugar cada comentario nuevo, ocultado o restaurado suma (o resta) su peso
+# al publicarse el commit, y las vistas al volcarse (services/vistas.py).
+#
+# El puntaje se guarda como log2(sum w * 2^((t - EPOCA) / vida_media)), con
+# t la fecha del comentario: no hace falta envejecer nada, el orden entre
+# posts es el mismo en cualquier momento y el valor "de hoy" es
+# 2^(puntaje - x(ahora)). Sumar un evento es un logaddexp en base 2.
+#
+# Cada proceso tiene un tablero acotado (TRENDING_CAPACITY posts; al llenarse
+# sale el de menor puntaje) y acumula lo que cambió desde la última
+# instantánea. Cada TRENDING_SNAPSHOT_SECONDS un hilo fusiona eso en la tabla
+# post_tendencia, poda los posts que ya no llegan a TRENDING_MIN_SCORE y
+# recarga el tablero desde la tabla: así los procesos se ven entre sí con
+# atraso de un intervalo y una caída pierde como mucho eso. Un post que entra
+# al tablero lleno sin estar cargado lo hace con lo que se sabe en el proceso
+# (una cota inferior) hasta la próxima instantánea. Un post despublicado
+# sale del tablero del proceso que lo confirma; los demás lo sacan en su
+# próxima instantánea (mientras, GET /api/posts/trending lo saltea).
+#
+# `flask trending rebuild` recalcula la tabla desde los comentarios. Las
+# vistas no tienen fecha, así que la reconstrucción solo cuenta comentarios.
+
+EPOCA = datetime(2026, 1, 1)
+
+# Comentarios más viejos que esto (en vidas medias) no se leen al reconstruir
+HORIZONTE = 10
+
+
+def _x(momento, vida_media):
+    """Tiempo desde EPOCA medido en vidas medias."""
+    return (momento - EPOCA).total_seconds() / 3600 / vida_media
+
+
+def _sumar(puntaje, peso, x):
+    """log2(2^puntaje + peso * 2^x) sin desbordar; None si no queda nada positivo."""
+    if puntaje is None:
+        return x + math.log2(peso) if peso > 0 else None
+    base = max(puntaje, x)
+    total = 2 ** (puntaje - base) + peso * 2 ** (x - base)
+    if total <= 1e-12:
+        return None
+    return base + math.log2(total)
+
+
+class Tendencias:
+    def __init__(self, app=None):
+        self.vida_media = 24.0
+        self.peso_comentario = 1.0
+        self.peso_vista = 0.05
+        self.top_k = 20
+        self.capacidad = 500
+        self.intervalo = 30.0
+        self.minimo = 0.01
+        self.instantaneas = 0
+        self._app = None
+        self._tablero = {}
+        self._pendiente = {}
+        self._ref = 0.0
+        self._ranking = None
+        self._cargado = False
+        self._hilo = None
+        self._parar = None
+        self._lock = threading.Lock()
+        self._registrado = False
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TRENDING_HALF_LIFE_HOURS', 24)
+        app.config.setdefault('TRENDING_COMMENT_WEIGHT', 1.0)
+        app.config.setdefault('TRENDING_VIEW_WEIGHT', 0.05)
+        app.config.setdefault('TRENDING_TOP_K', 20)
+        app.config.setdefault('TRENDING_CAPACITY', 500)
+        app.config.setdefault('TRENDING_SNAPSHOT_SECONDS', 30.0)
+        app.config.setdefault('TRENDING_MIN_SCORE', 0.01)
+        self.shutdown()  # lo pendiente va a la app anterior
+        self.vida_media = float(app.config['TRENDING_HALF_LIFE_HOURS'])
+        self.peso_comentario = app.config['TRENDING_COMMENT_WEIGHT']
+        self.peso_vista = app.config['TRENDING_VIEW_WEIGHT']
+        self.top_k = app.config['TRENDING_TOP_K']
+        self.capacidad = max(self.top_k, app.config['TRENDING_CAPACITY'])
+        self.intervalo = app.config['TRENDING_SNAPSHOT_SECONDS']
+        self.minimo = app.config['TRENDING_MIN_SCORE']
+        self._app = app
+        self.reiniciar()
+        app.extensions['tendencias'] = self
+        self._listen()
+        if not self._registrado:
+            # Ya desde acá (atexit es LIFO): corre después de que el contador
+            # de vistas vuelque lo suyo, que también suma a la tendencia.
+            atexit.register(self.shutdown)
+            self._registrado = True
+
+    def _x(self, momento):
+        return _x(momento, self.vida_media)
+
+    # --- Eventos: comentarios y posts -----------------------------------
+
+    def _listen(self):
+        if self._listening:
+            return
+        from app.extensions import db
+        from app.models import Comentario, Post
+
+        event.listen(Comentario, 'after_insert', self._comentario_insert)
+        event.listen(Comentario, 'after_update', self._comentario_update)
+        event.listen(Comentario, 'before_delete', self._comentario_delete)
+        event.listen(Post, 'after_update', self._post_update)
+        event.listen(Post, 'before_delete', self._post_delete)
+        event.listen(db.session, 'after_commit', self._after_commit)
+        event.listen(db.session, 'after_rollback', self._discard)
+        self._listening = True
+
+    def _anotar(self, connection, target, post_id, signo):
+        if post_id is None:
+            return
+        from app.models import Comentario
+
+        # Sin cargar (objeto expirado) se lee de la fila: no se dispara un
+        # lazy load en medio del flush.
+        creado = inspect(target).dict.get('created_at')
+        if creado is None:
+            creado = connection.scalar(select(Comentario.created_at).where(Comentario.id == target.id))
+        if creado is not None:
+            object_session(target).info.setdefault('tendencias', []).append(
+                (post_id, signo * self.peso_comentario, creado))
+
+    def _comentario_insert(self, mapper, connection, target):
+        if target.is_visible:
+            self._anotar(connection, target, target.post_id, 1)
+
+    def _comentario_update(self, mapper, connection, target):
+        from app.services.contadores import _anterior
+
+        attrs = inspect(target).attrs
+        visible, post = attrs.is_visible.history, attrs.post_id.history
+        if not (visible.has_changes() or post.has_changes()):
+            return
+        # Igual que comment_count: cuenta lo visible (is_visible == True)
+        antes = bool(_anterior(visible, target.is_visible, True))
+        post_antes = _anterior(post, target.post_id, None)
+        despues = bool(target.is_visible)
+        if (antes, post_antes) == (despues, target.post_id):
+            return
+        if antes:
+            self._anotar(connection, target, post_antes, -1)
+        if despues:
+            self._anotar(connection, target, target.post_id, 1)
+
+    def _comentario_delete(self, mapper, connection, target):
+        if target.is_visible:
+            self._anotar(connection, target, target.post_id, -1)
+
+    def _post_update(self, mapper, connection, target):
+        historia = inspect(target).attrs.is_published.history
+        if historia.has_changes() and not target.is_published:
+            object_session(target).info.setdefault('tendencias_despublicados', set()).add(target.id)
+
+    def _post_delete(self, mapper, connection, target):
+        from app.models import PostTendencia
+
+        # Antes que el post: sin foreign_keys=ON (perfil 'none') no lo borraría nadie
+        connection.execute(delete(PostTendencia).where(PostTendencia.post_id == target.id))
+        object_session(target).info.setdefault('tendencias_borrados', set()).add(target.id)
+
+    def _after_commit(self, session):
+        cambios = session.info.pop('tendencias', None)
+        borrados = session.info.pop('tendencias_borrados', None)
+        despublicados = session.info.pop('tendencias_despublicados', None)
+        if cambios:
+            self.sumar(cambios)
+        if borrados:
+            self.olvidar(borrados)
+        if despublicados:
+            self.retirar(despublicados)
+
+    def _discard(self, session):
+        session.info.pop('tendencias', None)
+        session.info.pop('tendencias_borrados', None)
+        session.info.pop('tendencias_despublicados', None)
+
+    def anotar_comentarios(self, session, filas, signo):
+        """
+        Para escrituras por Core (que no disparan los eventos): `filas` son
+        (post_id, created_at) de comentarios que se hicieron visibles
+        (signo=1) u ocultos (signo=-1). Se recorren una vez, sumando un solo
+        peso por post, que se aplica al confirmar `session`. Devuelve
+        {post_id: comentarios}.
+        """
+        ahora = datetime.utcnow()
+        x = self._x(ahora)
+        por_post, pesos = {}, {}
+        for post_id, creado in filas:
+            por_post[post_id] = por_post.get(post_id, 0) + 1
+            if post_id is not None and creado is not None:
+                pesos[post_id] = pesos.get(post_id, 0.0) + 2 ** (self._x(creado) - x)
+        session.info.setdefault('tendencias', []).extend(
+            (post_id, signo * self.peso_comentario * peso, ahora) for post_id, peso in pesos.items()
+        )
+        return por_post
+
+    # --- Tablero en memoria ---------------------------------------------
+
+    def sumar(self, cambios):
+        """Aplica (post_id, peso, momento) ya confirmados al tablero y a lo pendiente."""
+        with self._lock:
+            ref = self._ref
+            for post_id, peso, momento in cambios:
+                x = self._x(momento)
+                self._pendiente[post_id] = self._pendiente.get(post_id, 0.0) + peso * 2 ** (x - ref)
+                self._aplicar(post_id, peso, x)
+            self._ranking = None
+        if self._hilo is None:
+            self._arrancar()
+
+    def sumar_vistas(self, cuentas):
+        """Vistas volcadas ({post_id: n}): cuentan con fecha de ahora."""
+        if self.peso_vista <= 0:
+            return
+        ahora = datetime.utcnow()
+        self.sumar([(post_id, n * self.peso_vista, ahora) for post_id, n in cuentas.items()])
+
+    def _aplicar(self, post_id, peso, x):
+        # Con self._lock tomado
+        anterior = self._tablero.get(post_id)
+        nuevo = _sumar(anterior, peso, x)
+        if nuevo is None:
+            self._tablero.pop(post_id, None)
+            return
+        if anterior is None and len(self._tablero) >= self.capacidad:
+            piso = min(self._tablero, key=self._tablero.get)
+            if self._tablero[piso] >= nuevo:
+                return
+            del self._tablero[piso]
+        self._tablero[post_id] = nuevo
+
+    def olvidar(self, post_ids):
+        """Saca posts borrados del tablero y de lo pendiente."""
+        with self._lock:
+            for post_id in post_ids:
+                self._tablero.pop(post_id, None)
+                self._pendiente.pop(post_id, None)
+            self._ranking = None
+
+    def retirar(self, post_ids):
+        """
+        Saca posts despublicados del tablero. Lo pendiente se conserva: si
+        se vuelven a publicar, la instantánea los recarga con su puntaje.
+        """
+        with self._lock:
+            for post_id in post_ids:
+                self._tablero.pop(post_id, None)
+            self._ranking = None
+
+    def reiniciar(self):
+        """Vacía el tablero y lo pendiente; la próxima lectura recarga de la tabla."""
+        with self._lock:
+            self._tablero = {}
+            self._pendiente = {}
+            self._ref = self._x(datetime.utcnow())
+            self._ranking = None
+            self._cargado = False
+
+    def ranking(self):
+        """
+        [(post_id, puntaje)] del tablero, de mayor a menor. Ordena solo si
+        algo cambió desde la última lectura (a lo sumo TRENDING_CAPACITY).
+        """
+        if not self._cargado:
+            self._cargar()
+        with self._lock:
+            if self._ranking is None:
+                self._ranking = heapq.nlargest(len(self._tablero), self._tablero.items(),
+                                               key=lambda item: item[1])
+            return self._ranking
+
+    def valor(self, puntaje, momento=None):
+        """Tendencia actual (suma de pesos con decaimiento) de un puntaje."""
+        return 2 ** (puntaje - self._x(momento or datetime.utcnow()))
+
+    # --- Instantáneas -----------------------------------------------------
+
+    def _arrancar(self):
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._parar = threading.Event()
+            self._hilo = threading.Thread(target=self._bucle, args=(self._parar,),
+                                          name='tendencias', daemon=True)
+            self._hilo.start()
+
+    def _bucle(self, parar):
+        while not parar.wait(self.intervalo):
+            self.instantanea()
+
+    def instantanea(self):
+        """
+        Fusiona lo pendiente en post_tendencia, poda lo que quedó bajo
+        TRENDING_MIN_SCORE y recarga el tablero con los mejores posts
+        publicados. Si falla, lo pendiente se conserva para la próxima.
+        """
+        from app.extensions import cola_escrituras
+
+        ahora = datetime.utcnow()
+        with self._lock:
+            pendiente, self._pendiente = self._pendiente, {}
+            ref, self._ref = self._ref, self._x(ahora)
+        try:
+            with self._app.app_context():
+                # Con la cola de escrituras activa, la instantánea es una unidad más
+                filas = cola_escrituras.ejecutar(self._guardar, pendiente, ref, ahora)
+        except Exception:
+            logger.exception('No se pudo guardar la instantánea de tendencias')
+            with self._lock:
+                escala = 2 ** (ref - self._ref)
+                for post_id, valor in pendiente.items():
+                    self._pendiente[post_id] = self._pendiente.get(post_id, 0.0) + valor * escala
+            return False
+
+        self._reemplazar(filas)
+        self.instantaneas += 1
+        return True
+
+    def _cargar(self):
+        """
+        Primera lectura del proceso: solo un SELECT de los mejores (en una
+        réplica si el request es @solo_lectura). Fusionar y podar queda para
+        el hilo de instantáneas, que arranca acá para mantenerlo al día.
+        """
+        from app.extensions import db
+
+        filas = [tuple(fila) for fila in db.session.execute(self._mejores(datetime.utcnow()))]
+        self._reemplazar(filas)
+        if self._hilo is None:
+            self._arrancar()
+
+    def _reemplazar(self, filas):
+        with self._lock:
+            # Lo que se confirmó mientras tanto no está en la tabla: se reaplica
+            self._tablero = dict(filas)
+            for post_id, valor in self._pendiente.items():
+                self._aplicar(post_id, valor, self._ref)
+            self._ranking = None
+            self._cargado = True
+
+    def _mejores(self, ahora):
+        """SELECT de los TRENDING_CAPACITY mejores posts publicados que superan TRENDING_MIN_SCORE."""
+        from app.models import Post, PostTendencia
+
+        return (
+            select(PostTendencia.post_id, PostTendencia.puntaje)
+            .join(Post, Post.id == PostTendencia.post_id)
+            .where(Post.is_published == True,
+                   PostTendencia.puntaje >= self._x(ahora) + math.log2(self.minimo))
+            .order_by(PostTendencia.puntaje.desc())
+            .limit(self.capacidad)
+        )
+
+    def _guardar(self, session, pendiente, ref, ahora):
+        """Unidad de escritura (ver services/escrituras.py) de instantanea()."""
+        from app.models import PostTendencia
+
+        connection = session.connection()
+        if pendiente:
+            self._fusionar(connection, pendiente, ref, ahora)
+        connection.execute(delete(PostTendencia).where(
+            PostTendencia.puntaje < self._x(ahora) + math.log2(self.minimo)))
+        return [tuple(fila) for fila in connection.execute(self._mejores(ahora))]
+
+    def _fusionar(self, connection, pendiente, ref, ahora):
+        from app.models import Post, PostTendencia
+
+        tabla = PostTendencia.__table__
+        # En orden de id y bloqueadas: dos procesos fusionando a la vez no se pisan
+        ids = sorted(pendiente)
+        actuales = dict(connection.execute(
+            select(tabla.c.post_id, tabla.c.puntaje).where(tabla.c.post_id.in_(ids)).with_for_update()
+        ).all())
+        existentes = set(connection.scalars(select(Post.id).where(Post.id.in_(ids))))
+
+        cambios, nuevos, sobran = [], [], []
+        for post_id in ids:
+            puntaje = _sumar(actuales.get(post_id), pendiente[post_id], ref)
+            if post_id in actuales:
+                if puntaje is None:
+                    sobran.append(post_id)
+                else:
+                    cambios.append({'_id': post_id, '_puntaje': puntaje, '_ahora': ahora})
+            elif puntaje is not None and post_id in existentes:
+                nuevos.append({'post_id': post_id, 'puntaje': puntaje, 'actualizado_at': ahora})
+
+        if cambios:
+            connection.execute(
+                update(tabla).where(tabla.c.post_id == bindparam('_id'))
+                .values(puntaje=bindparam('_puntaje'), actualizado_at=bindparam('_ahora')),
+                cambios,
+            )
+        if nuevos:
+            connection.execute(insert(tabla), nuevos)
+        if sobran:
+            connection.execute(delete(tabla).where(tabla.c.post_id.in_(sobran)))
+
+    def shutdown(self):
+        """Detiene el hilo y guarda lo pendiente."""
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+            parar, self._parar = self._parar, None
+        if hilo is not None:
+            parar.set()
+            hilo.join()
+        if self._app is not None and self._pendiente:
+            self.instantanea()
+
+    def stats(self):
+        return {'tablero': len(self._tablero), 'pendientes': len(self._pendiente),
+                'instantaneas': self.instantaneas}
+
+
+def reconstruir(session, lote=10000):
+    """
+    Recalcula post_tendencia desde los comentarios visibles de posts
+    publicados de las últimas HORIZONTE vidas medias (leídos de a `lote`
+    filas) y reemplaza la tabla. Las vistas no se reconstruyen. Devuelve
+    cuántos posts quedaron.
+    """
+    from app.extensions import tendencias
+    from app.models import Comentario, Post, PostTendencia
+
+    ahora = datetime.utcnow()
+    ref = _x(ahora, tendencias.vida_media)
+    desde = ahora - timedelta(hours=tendencias.vida_media * HORIZONTE)
+
+    sumas = {}
+    filas = session.execute(
+        select(Comentario.post_id, Comentario.created_at)
+        .join(Post, Post.id == Comentario.post_id)
+        .where(Comentario.is_visible == True, Comentario.created_at >= desde, Post.is_published == True)
+        .execution_options(yield_per=lote)
+    )
+    for post_id, creado in filas:
+        sumas[post_id] = sumas.get(post_id, 0.0) + 2 ** (_x(creado, tendencias.vida_media) - ref)
+
+    nuevas = [
+        {'post_id': post_id, 'puntaje': ref + math.log2(tendencias.peso_comentario * suma), 'actualizado_at': ahora}
+        for post_id, suma in sorted(sumas.items())
+        if tendencias.peso_comentario * suma >= tendencias.minimo
+    ]
+    session.execute(delete(PostTendencia))
+    for inicio in range(0, len(nuevas), lote):
+        session.execute(insert(PostTendencia), nuevas[inicio:inicio + lote])
+    session.commit()
+    tendencias.reiniciar()
+    return len(nuevas)
@@ -0,0 +1,189 @@
+import atexit
+import logging
+import threading
+from functools import wraps
+
+from flask import make_response
+from sqlalchemy import bindparam, update
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------
+# CONTADOR DE VISTAS CON ESCRITURA DIFERIDA (write-behind)
+# -----------------------------------------------------------
+# El detalle de un post es la lectura más caliente: un UPDATE por vista
+# pondría una escritura (y en SQLite el lock de escritor) en cada request.
+# Las vistas se acumulan en memoria, repartidas en shards por post_id (cada
+# uno con su lock, para que los hilos no se turnen en uno solo), y un hilo
+# las vuelca cada VIEW_COUNTER_FLUSH_SECONDS con un único executemany de
+# UPDATE post SET view_count = view_count + :n en una transacción (por la
+# cola de escrituras si está activa). Al salir
+# del proceso se vuelca lo pendiente; ante una caída se pierde como mucho
+# un intervalo. Cada proceso suma lo suyo: con varios workers no se pisan.
+#
+# Las respuestas cacheadas del detalle muestran view_count con el atraso
+# del TTL de la caché: volcar no invalida (invalidaría en cada intervalo).
+# Lo volcado también suma a la tendencia de cada post (services/tendencias.py).
+
+
+def _sumar_vistas(session, filas):
+    """Unidad de escritura (ver services/escrituras.py): view_count += n por post."""
+    from app.models import Post
+
+    tabla = Post.__table__
+    session.connection().execute(
+        update(tabla)
+        .where(tabla.c.id == bindparam('_id'))
+        .values(view_count=tabla.c.view_count + bindparam('_n')),
+        filas,
+    )
+
+
+class _Shard:
+    __slots__ = ('lock', 'cuentas')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cuentas = {}
+
+
+class ContadorVistas:
+    def __init__(self, app=None):
+        self.activo = False
+        self.intervalo = 5.0
+        self.volcados = 0
+        self.vistas_volcadas = 0
+        self._app = None
+        self._shards = [_Shard()]
+        self._hilo = None
+        self._parar = None
+        self._lock = threading.Lock()
+        self._registrado = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('VIEW_COUNTER_ENABLED', True)
+        app.config.setdefault('VIEW_COUNTER_FLUSH_SECONDS', 5.0)
+        app.config.setdefault('VIEW_COUNTER_SHARDS', 16)
+        self.shutdown()  # lo pendiente va a la app anterior
+        self.activo = bool(app.config['VIEW_COUNTER_ENABLED'])
+        self.intervalo = app.config['VIEW_COUNTER_FLUSH_SECONDS']
+        self._shards = [_Shard() for _ in range(max(1, app.config['VIEW_COUNTER_SHARDS']))]
+        self._app = app
+        app.extensions['contador_vistas'] = self
+
+    # --- camino caliente ---
+
+    def registrar(self, post_id):
+        """Suma una vista a `post_id` en memoria."""
+        if not self.activo:
+            return
+        shard = self._shards[post_id % len(self._shards)]
+        with shard.lock:
+            shard.cuentas[post_id] = shard.cuentas.get(post_id, 0) + 1
+        if self._hilo is None:
+            self._arrancar()
+
+    def contar(self, parametro='post_id'):
+        """
+        Decorador de vistas: registra una vista si la respuesta es 200. Va
+        por encima de @response_cache.cached para contar también los HIT.
+        """
+        def wrapper(fn):
+            @wraps(fn)
+            def decorated(*args, **kwargs):
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200:
+                    self.registrar(kwargs[parametro])
+                return response
+            return decorated
+        return wrapper
+
+    def pendientes(self):
+        """Vistas acumuladas que todavía no se volcaron."""
+        total = 0
+        for shard in self._shards:
+            with shard.lock:
+                total += sum(shard.cuentas.values())
+        return total
+
+    # --- volcado ---
+
+    def _arrancar(self):
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._parar = threading.Event()
+            self._hilo = threading.Thread(target=self._bucle, args=(self._parar,),
+                                          name='contador-vistas', daemon=True)
+            self._hilo.start()
+            if not self._registrado:
+                atexit.register(self.shutdown)
+                self._registrado = True
+
+    def _bucle(self, parar):
+        while not parar.wait(self.intervalo):
+            self.volcar()
+
+    def _tomar(self):
+        cuentas = {}
+        for shard in self._shards:
+            with shard.lock:
+                tomadas, shard.cuentas = shard.cuentas, {}
+            cuentas.update(tomadas)  # los shards no comparten post_id
+        return cuentas
+
+    def _devolver(self, cuentas):
+        for post_id, n in cuentas.items():
+            shard = self._shards[post_id % len(self._shards)]
+            with shard.lock:
+                shard.cuentas[post_id] = shard.cuentas.get(post_id, 0) + n
+
+    def volcar(self, reintentar=True):
+        """
+        Suma lo acumulado a post.view_count en una transacción. Si falla, lo
+        tomado vuelve a los shards para el próximo intervalo (salvo
+        reintentar=False, al apagar). Devuelve cuántas vistas volcó.
+        """
+        cuentas = self._tomar()
+        if not cuentas:
+            return 0
+
+        from app.extensions import cola_escrituras
+
+        # En orden de id: dos procesos volcando a la vez toman los locks de
+        # fila en el mismo orden (MySQL) y no se bloquean mutuamente.
+        filas = [{'_id': post_id, '_n': n} for post_id, n in sorted(cuentas.items())]
+        try:
+            with self._app.app_context():
+                # Con la cola de escrituras activa, el volcado es una unidad más
+                cola_escrituras.ejecutar(_sumar_vistas, filas)
+        except Exception:
+            logger.exception('No se pudieron volcar %d vistas', sum(cuentas.values()))
+            if reintentar:
+                self._devolver(cuentas)
+            return 0
+
+        total = sum(cuentas.values())
+        self.volcados += 1
+        self.vistas_volcadas += total
+
+        from app.extensions import tendencias
+        tendencias.sumar_vistas(cuentas)
+        return total
+
+    def shutdown(self):
+        """Detiene el hilo y vuelca lo pendiente."""
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+            parar, self._parar = self._parar, None
+        if hilo is not None:
+            parar.set()
+            hilo.join()
+        if self._app is not None:
+            self.volcar(reintentar=False)
+
+    def stats(self):
+        return {'pendientes': self.pendientes(), 'volcados': self.volcados,
+                'vistas_volcadas': self.vistas_volcadas}
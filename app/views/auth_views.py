@@ -1,15 +1,22 @@
+import logging
+
 from flask.views import MethodView
-from flask import request, jsonify
-from app.extensions import db, ma, bcrypt, jwt
+from flask import request, jsonify, current_app
+from app.extensions import db, ma, bcrypt, jwt, cola_escrituras, password_hasher
+from ..services import borrado
+from ..services.escrituras import ColaEscriturasLlena
+from ..services.passwords import PasswordHasherBusy
 from ..models import Usuario
 from ..schemas.user_schemas import UsuarioSchema, RegisterSchema, LoginSchema
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import IntegrityError 
 import datetime
 
-# 🚨 Decorador para verificar roles
-from ..decorators.auth_decorators import roles_required 
+# 🚨 Decoradores para verificar identidad y roles
+from ..decorators.auth_decorators import roles_required, identity_required
+from ..services.identity import current_identity
+from ..services.serializers import consulta, serializar
 
 # Schemas
 usuario_dump_schema = UsuarioSchema()
@@ -17,6 +24,8 @@ usuarios_dump_schema = UsuarioSchema(many=True)
 register_load_schema = RegisterSchema()
 login_load_schema = LoginSchema()
 
+logger = logging.getLogger(__name__)
+
 
 class RegisterAPI(MethodView):
     def post(self):
@@ -30,37 +39,44 @@ class RegisterAPI(MethodView):
                 return jsonify({"msg": "El email ya está registrado."}), 409
 
             role_to_assign = validated_data.get('role', 'user')
-
-            new_user = Usuario(
-                username=validated_data['username'],
-                email=validated_data['email'],
-                role=role_to_assign
-            )
-            new_user.set_password(validated_data['password'])
-
-            db.session.add(new_user)
+            # El hash (caro) se calcula aquí, fuera del escritor
+            password_hash = password_hasher.hash(validated_data['password'])
 
             try:
-                db.session.commit()
-                return jsonify({"msg": f"Usuario {new_user.username} registrado exitosamente."}), 201
+                username = cola_escrituras.ejecutar(_crear_usuario, validated_data, role_to_assign, password_hash)
+                return jsonify({"msg": f"Usuario {username} registrado exitosamente."}), 201
+
+            except ColaEscriturasLlena:
+                return jsonify({"msg": "Servidor ocupado, intente nuevamente."}), 503
 
             except IntegrityError as e:
-                db.session.rollback()
-                print("\n--- ERROR EN COMMIT ---")
-                print(str(e.orig))
+                logger.error("Error en commit al registrar usuario: %s", e.orig)
                 return jsonify({"error": "Fallo al guardar en BD."}), 500
             
             except Exception as e:
-                db.session.rollback()
-                print("\n--- ERROR INESPERADO ---")
-                print(str(e))
+                logger.exception("Error inesperado al registrar usuario")
                 return jsonify({"error": "Error inesperado."}), 500
 
+        except PasswordHasherBusy:
+            return jsonify({"msg": "Servidor ocupado, intente nuevamente."}), 503
+
         except Exception as e:
             error_message = str(e) if not hasattr(e, 'messages') else e.messages
             return jsonify({"error": "Error de validación.", "details": error_message}), 400
 
 
+def _crear_usuario(session, validated_data, role, password_hash):
+    """Unidad de escritura (ver services/escrituras.py). Devuelve el username."""
+    new_user = Usuario(
+        username=validated_data['username'],
+        email=validated_data['email'],
+        role=role,
+        password_hash=password_hash
+    )
+    session.add(new_user)
+    session.flush()
+    return new_user.username
+
 
 class LoginAPI(MethodView):
     def post(self):
@@ -74,6 +90,12 @@ class LoginAPI(MethodView):
             usuario = Usuario.query.filter_by(email=email).one()
             
             if usuario.check_password(password):
+                # Si cambió el algoritmo/costo configurado, se actualiza el hash ahora
+                # que tenemos la contraseña en claro.
+                if usuario.password_needs_rehash():
+                    usuario.set_password(password)
+                    db.session.commit()
+
                 expires = datetime.timedelta(hours=24)
 
                 # ✅ TOKEN CORREGIDO: ahora incluye el rol en el JWT
@@ -97,6 +119,9 @@ class LoginAPI(MethodView):
         except NoResultFound:
             return jsonify({"msg": "Usuario no encontrado."}), 404
 
+        except PasswordHasherBusy:
+            return jsonify({"msg": "Servidor ocupado, intente nuevamente."}), 503
+
         except Exception as e:
             error_message = str(e) if not hasattr(e, 'messages') else e.messages
             return jsonify({"error": "Error al iniciar sesión.", "details": error_message}), 400
@@ -104,35 +129,37 @@ class LoginAPI(MethodView):
 
 
 class UserListAPI(MethodView):
-    @jwt_required()
     @roles_required('admin')
     def get(self):
-        usuarios = Usuario.query.all()
-        return jsonify(usuarios_dump_schema.dump(usuarios)), 200
+        usuarios = consulta(db.session, usuarios_dump_schema, Usuario).all()
+        return jsonify(serializar(db.session, usuarios_dump_schema, Usuario, usuarios)), 200
 
 
 
 class UserDetailAPI(MethodView):
 
-    @jwt_required()
-    def get(self, user_id):
-        current_user_id = get_jwt_identity()
-        
-        current_user = Usuario.query.get(current_user_id)
-
-        if current_user_id != user_id and current_user.role not in ['admin', 'moderator']:
+    # Sin user_id (rutas /api/user y /api/users/me) se devuelve el propio perfil.
+    @identity_required()
+    def get(self, user_id=None):
+        identity = current_identity()
+        if user_id is None or user_id == identity.user_id:
+            usuario = identity.usuario
+            if usuario is None:
+                return jsonify({"msg": "Usuario no encontrado."}), 404
+            return jsonify(usuario_dump_schema.dump(usuario)), 200
+
+        if not identity.is_staff:
             return jsonify({"msg": "No tienes permiso para ver este perfil."}), 403
 
         usuario = Usuario.query.get_or_404(user_id)
         return jsonify(usuario_dump_schema.dump(usuario)), 200
 
 
-    @jwt_required()
+    @identity_required()
     def put(self, user_id):
-        current_user_id = get_jwt_identity()
-        current_user = Usuario.query.get(current_user_id)
+        identity = current_identity()
 
-        if current_user.id != user_id and current_user.role not in ['admin', 'moderator']:
+        if identity.user_id != user_id and not identity.is_staff:
             return jsonify({"msg": "No tienes permiso para editar este perfil."}), 403
 
         data = request.json
@@ -140,7 +167,7 @@ class UserDetailAPI(MethodView):
         try:
             usuario = Usuario.query.get_or_404(user_id)
 
-            if 'role' in data and current_user.role != 'admin':
+            if 'role' in data and identity.role != 'admin':
                 del data['role']
 
             validated_data = usuario_dump_schema.load(data, partial=True)
@@ -162,13 +189,11 @@ class UserDetailAPI(MethodView):
 
 
 
-    @jwt_required()
     @roles_required('admin')
     def delete(self, user_id):
         try:
             usuario = Usuario.query.get_or_404(user_id)
-            db.session.delete(usuario)
-            db.session.commit()
+            borrado.borrar_usuario(db.session, usuario, lote=current_app.config.get('DELETE_BATCH_SIZE', borrado.LOTE))
             return jsonify({"msg": "Usuario eliminado correctamente."}), 204
         except:
             db.session.rollback()
@@ -177,14 +202,13 @@ class UserDetailAPI(MethodView):
 
 
 class ProtectedAPI(MethodView):
-    @jwt_required()
-    @roles_required(['admin', 'moderator'])
+    @roles_required('admin', 'moderator')
     def get(self):
-        current_user_id = get_jwt_identity()
-        user = Usuario.query.get(current_user_id)
+        identity = current_identity()
+        user = identity.usuario
         if user:
             return jsonify({
-                "msg": f"Acceso concedido a {user.username} (Rol: {user.role}).",
-                "user_id": current_user_id
+                "msg": f"Acceso concedido a {user.username} (Rol: {identity.role}).",
+                "user_id": identity.user_id
             }), 200
         return jsonify({"msg": "Usuario no encontrado."}), 404
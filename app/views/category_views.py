@@ -1,10 +1,12 @@
 from flask.views import MethodView
-from flask import request, jsonify
-from app.extensions import db, ma, bcrypt, jwt
+from flask import request, jsonify, current_app
+from app.extensions import db, ma, bcrypt, jwt, response_cache, categorias_cache
 from ..models import Categoria
 from ..schemas.category_schemas import CategoriaSchema
 from ..decorators.auth_decorators import roles_required 
-from flask_jwt_extended import jwt_required
+from ..services import borrado
+from ..services.replicas import solo_lectura
+from ..services.serializers import compilar
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import IntegrityError
 
@@ -18,12 +20,13 @@ class CategoryListAPI(MethodView):
     """
 
     # Endpoint público: Obtener todas las categorías
+    @response_cache.cached('categories')
+    @solo_lectura
     def get(self):
-        categorias = Categoria.query.all()
-        return jsonify(categories_schema.dump(categorias)), 200
+        dump = compilar(categories_schema)
+        return jsonify([dump(c) for c in categorias_cache.snapshot().items]), 200
 
     # Endpoint privado: Crear una nueva categoría (Solo Admin)
-    @jwt_required()
     @roles_required('admin', 'moderator')
     def post(self):
         # 1. Validar los datos de entrada
@@ -62,6 +65,8 @@ class CategoryDetailAPI(MethodView):
     """
 
     # Endpoint público: Obtener detalle de una categoría
+    @response_cache.cached('categories')
+    @solo_lectura
     def get(self, category_id):
         try:
             category = Categoria.query.filter_by(id=category_id).one()
@@ -70,7 +75,6 @@ class CategoryDetailAPI(MethodView):
             return jsonify({"msg": "Categoría no encontrada."}), 404
     
     # Endpoint privado: Editar una categoría (Admin o Moderator)
-    @jwt_required()
     @roles_required('admin', 'moderator')  # ✅ Moderadores pueden editar
     def put(self, category_id):
         category = Categoria.query.get_or_404(category_id)
@@ -99,15 +103,13 @@ class CategoryDetailAPI(MethodView):
             return jsonify({"error": "Error al actualizar la categoría.", "details": str(e)}), 500
 
     # Endpoint privado: Eliminar una categoría (Solo Admin)
-    @jwt_required()
     @roles_required('admin')  # Eliminación solo para admins
     def delete(self, category_id):
         category = Categoria.query.get_or_404(category_id)
         
-        # Eliminación directa
-        db.session.delete(category)
+        # Las filas de post_categoria se borran por lotes; después, la categoría
         try:
-            db.session.commit()
+            borrado.borrar_categoria(db.session, category, lote=current_app.config.get('DELETE_BATCH_SIZE', borrado.LOTE))
             return jsonify({"msg": f"Categoría ID {category_id} eliminada exitosamente."}), 204
         except Exception as e:
             db.session.rollback()
@@ -1,72 +1,115 @@
+import logging
+
 from flask import request
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from marshmallow import ValidationError
 from datetime import datetime
 
 from app import db
-from app.models import Comentario, Post, Usuario
-from app.schemas.comment_schemas import comentarios_schema, comentario_schema
-from app.decorators.auth_decorators import roles_required, check_ownership
+from app.extensions import response_cache, cola_escrituras
+from app.models import Comentario, Post
+from app.schemas.comment_schemas import ComentarioSchema, comentarios_schema, comentario_schema
+from app.decorators.auth_decorators import roles_required, check_ownership, identity_required
+from app.services.escrituras import ColaEscriturasLlena
+from app.services.identity import current_identity
+from app.services.replicas import solo_lectura
+from app.services.serializers import consulta, serializar, campos_pedidos, schema_parcial, CamposInvalidos
+
+logger = logging.getLogger(__name__)
+
+
+def schema_de_lectura(many):
+    """Schema para un GET según ?fields= (ver post_views.schema_de_lectura)."""
+    campos = campos_pedidos(request.args.get('fields'), ComentarioSchema)
+    if campos is None:
+        return comentarios_schema if many else comentario_schema
+    return schema_parcial(ComentarioSchema, campos, many)
+
 
 class CommentListAPI(Resource):
+    @response_cache.cached('comments:{post_id}', 'post:{post_id}', 'autores')
+    @solo_lectura
     def get(self, post_id):
         """Retorna la lista de comentarios para un Post específico."""
+        try:
+            schema = schema_de_lectura(many=True)
+        except CamposInvalidos as e:
+            return {'message': str(e)}, 400
         try:
             Post.query.get_or_404(post_id)
-            comentarios = Comentario.query.filter_by(post_id=post_id, is_visible=True).all()
-            result = comentarios_schema.dump(comentarios)
+            comentarios = (
+                consulta(db.session, schema, Comentario)
+                .filter(Comentario.post_id == post_id, Comentario.is_visible == True)
+                .order_by(Comentario.id)
+                .all()
+            )
+            result = serializar(db.session, schema, Comentario, comentarios)
             return {'status': 'success', 'data': result}, 200
         except Exception as e:
-            print(f"Error al obtener comentarios: {e}")
+            logger.exception("Error al obtener comentarios del post %s", post_id)
             return {'message': f'Error al obtener comentarios: {e}'}, 500
 
-    @jwt_required()
+    @identity_required()
     def post(self, post_id):
         """Crea un nuevo comentario para un Post específico."""
         try:
-            current_user_id = int(get_jwt_identity())
+            current_user_id = current_identity().user_id
             Post.query.get_or_404(post_id)
 
             json_data = request.get_json()
             if not json_data:
                 return {'message': 'No input data provided'}, 400
 
-            try:
-                data = comentario_schema.load(json_data)
-                data.usuario_id = current_user_id
-                data.post_id = post_id
-            except ValidationError as err:
-                return {'message': 'Error de validación', 'errors': err.messages}, 400
+            errores = comentario_schema.validate(json_data)
+            if errores:
+                return {'message': 'Error de validación', 'errors': errores}, 400
 
-            db.session.add(data)
-            db.session.commit()
-            result = comentario_schema.dump(data)
+            result = cola_escrituras.ejecutar(_crear_comentario, json_data, current_user_id, post_id)
             return {'status': 'success', 'data': result}, 201
 
+        except ColaEscriturasLlena:
+            return {'message': 'Servidor ocupado, intente nuevamente.'}, 503
         except Exception as e:
             db.session.rollback()
-            print(f"Error al crear comentario: {e}")
+            logger.exception("Error al crear comentario en el post %s", post_id)
             return {'message': f'Error al crear comentario: {e}'}, 500
 
+
+def _crear_comentario(session, json_data, usuario_id, post_id):
+    """Unidad de escritura (ver services/escrituras.py): carga, inserta y serializa."""
+    data = comentario_schema.load(json_data, session=session)
+    data.usuario_id = usuario_id
+    data.post_id = post_id
+    session.add(data)
+    session.flush()
+    return comentario_schema.dump(data)
+
+
 class CommentDetailAPI(Resource):
+    @solo_lectura
     def get(self, comment_id):
-        comment = Comentario.query.get_or_404(comment_id)
-        if not comment or not comment.is_visible:
+        try:
+            schema = schema_de_lectura(many=False)
+        except CamposInvalidos as e:
+            return {'message': str(e)}, 400
+        comment = (
+            consulta(db.session, schema, Comentario)
+            .filter(Comentario.id == comment_id, Comentario.is_visible == True)
+            .first()
+        )
+        if comment is None:
             return {"message": "Comentario no encontrado"}, 404
-        result = comentario_schema.dump(comment)
+        result = serializar(db.session, schema, Comentario, [comment])[0]
         return {'status': 'success', 'data': result}, 200
 
-    @jwt_required()
+    @identity_required()
     def put(self, comment_id):
         """Actualiza un comentario existente."""
         try:
             comentario = Comentario.query.get_or_404(comment_id)
-            current_user_id = int(get_jwt_identity())
-            current_user = Usuario.query.get(current_user_id)
+            identity = current_identity()
 
-            # Permiso: propietario o admin/moderator
-            if comentario.usuario_id != current_user_id and current_user.role not in ['admin', 'moderator']:
+            # Permiso: propietario o admin/moderator (el rol viene del token)
+            if comentario.usuario_id != identity.user_id and not identity.is_staff:
                 return {'message': 'Permiso denegado: No tienes autorización para editar este recurso.'}, 403
 
             json_data = request.get_json()
@@ -81,19 +124,18 @@ class CommentDetailAPI(Resource):
 
         except Exception as e:
             db.session.rollback()
-            print(f"Error al actualizar comentario: {e}")
+            logger.exception("Error al actualizar el comentario %s", comment_id)
             return {'message': f'Error al actualizar comentario: {e}'}, 500
 
-    @jwt_required()
+    @identity_required()
     def delete(self, comment_id):
         """Elimina (oculta) un comentario."""
         try:
             comentario = Comentario.query.get_or_404(comment_id)
-            current_user_id = int(get_jwt_identity())
-            current_user = Usuario.query.get(current_user_id)
+            identity = current_identity()
 
-            # Permiso: propietario o admin/moderator
-            if comentario.usuario_id != current_user_id and current_user.role not in ['admin', 'moderator']:
+            # Permiso: propietario o admin/moderator (el rol viene del token)
+            if comentario.usuario_id != identity.user_id and not identity.is_staff:
                 return {'message': 'Permiso denegado: No tienes autorización para eliminar este recurso.'}, 403
 
             comentario.is_visible = False
@@ -103,5 +145,5 @@ class CommentDetailAPI(Resource):
 
         except Exception as e:
             db.session.rollback()
-            print(f"Error al eliminar comentario: {e}")
+            logger.exception("Error al eliminar el comentario %s", comment_id)
             return {'message': f'Error al eliminar comentario: {e}'}, 500
@@ -0,0 +1,35 @@
+from flask.views import MethodView
+from flask import request, jsonify, Response, stream_with_context
+from app.extensions import db
+from ..decorators.auth_decorators import roles_required
+from ..services import export
+from ..services.replicas import solo_lectura
+
+
+class ExportAPI(MethodView):
+    """
+    GET /api/export/<recurso>?format=ndjson|csv&since=<ISO 8601>
+    Exportación completa en streaming (solo Admin).
+    """
+
+    @roles_required('admin')
+    @solo_lectura
+    def get(self, recurso):
+        if recurso not in export.RECURSOS:
+            return jsonify({"msg": f"Recurso desconocido. Opciones: {', '.join(export.RECURSOS)}."}), 404
+
+        formato = request.args.get('format', 'ndjson')
+        if formato not in export.FORMATOS:
+            return jsonify({"msg": f"Formato inválido. Opciones: {', '.join(export.FORMATOS)}."}), 400
+
+        try:
+            since = export.parse_since(request.args.get('since'))
+        except ValueError:
+            return jsonify({"msg": "Parámetro 'since' inválido: use formato ISO 8601."}), 400
+
+        response = Response(
+            stream_with_context(export.generar(db.session, recurso, formato, since)),
+            mimetype=export.MIMETYPES[formato]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename={recurso}.{formato}'
+        return response
@@ -0,0 +1,70 @@
+from flask.views import MethodView
+from flask import request, jsonify, current_app
+from app.extensions import db
+from ..models import Comentario
+from ..decorators.auth_decorators import roles_required
+from ..schemas.comment_schemas import comentarios_schema
+from ..services import moderacion
+from ..services.pagination import paginate_keyset, parse_limit, InvalidCursor
+from ..services.serializers import consulta, serializar
+
+
+class ModerationQueueAPI(MethodView):
+    """
+    GET /api/moderation/comments?is_visible=0&post_id=&autor_id=&since=&until=&limit=N&cursor=<token>
+    Cola de moderación (moderator/admin): comentarios visibles y ocultos,
+    más nuevos primero, con el autor en la misma consulta.
+    """
+
+    # Sin @solo_lectura: después de ocultar en lote, la cola tiene que
+    # reflejarlo aunque una réplica venga atrasada.
+    @roles_required('admin', 'moderator')
+    def get(self):
+        limit = parse_limit(
+            request.args.get('limit'),
+            default=current_app.config.get('MODERATION_PER_PAGE', 50),
+            maximum=current_app.config.get('MODERATION_MAX_PER_PAGE', 200),
+        )
+        try:
+            filtros = moderacion.parse_filtros(request.args)
+            query = moderacion.filtrar(consulta(db.session, comentarios_schema, Comentario), filtros)
+            page = paginate_keyset(query, moderacion.orden_cola(), limit, request.args.get('cursor'))
+        except (InvalidCursor, moderacion.FiltrosInvalidos) as e:
+            return jsonify({"msg": str(e)}), 400
+
+        return jsonify({
+            "data": serializar(db.session, comentarios_schema, Comentario, page.items),
+            "next_cursor": page.next_cursor,
+            "limit": page.limit
+        }), 200
+
+
+class ModerationBulkAPI(MethodView):
+    """
+    POST /api/moderation/comments/bulk {"ids": [1, 2, ...], "is_visible": false}
+    Oculta o restaura muchos comentarios con un solo UPDATE (moderator/admin).
+    """
+
+    @roles_required('admin', 'moderator')
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        visible = data.get('is_visible')
+        maximo = current_app.config.get('MODERATION_BULK_MAX_IDS', 10000)
+
+        if not isinstance(visible, bool):
+            return jsonify({"msg": "'is_visible' debe ser true o false."}), 400
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+            return jsonify({"msg": "'ids' debe ser una lista no vacía de enteros."}), 400
+        if len(ids) > maximo:
+            return jsonify({"msg": f"Como máximo {maximo} ids por pedido."}), 400
+
+        try:
+            actualizados = moderacion.cambiar_visibilidad(db.session, ids, visible)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"error": "Error al moderar los comentarios.", "details": str(e)}), 500
+
+        return jsonify({"requested": len(set(ids)), "updated": actualizados}), 200
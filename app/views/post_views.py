@@ -1,63 +1,247 @@
 from flask.views import MethodView
-from flask import request, jsonify
-from app.extensions import db
-from ..models import Post, Categoria
+from flask import request, jsonify, current_app
+from app.extensions import db, response_cache, categorias_cache, cola_escrituras, contador_vistas, tendencias
+from ..models import Post, Categoria, post_categoria
 from ..schemas.post_schemas import PostSchema
-from ..decorators.auth_decorators import check_ownership, roles_required, post_owner_required
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.orm.exc import NoResultFound
+from ..decorators.auth_decorators import check_ownership, roles_required, post_owner_required, identity_required
+from ..services.identity import current_identity
+from ..services.pagination import paginate_keyset, parse_limit, InvalidCursor
+from ..services import borrado, search
+from ..services.bulk_import import importar_posts
+from ..services.escrituras import ColaEscriturasLlena
+from ..services.replicas import solo_lectura
+from ..services.serializers import consulta, serializar, campos_pedidos, schema_parcial, CamposInvalidos
 import functools
 
-# Instanciamos los schemas
-post_schema = PostSchema()
-posts_schema = PostSchema(many=True)
+# Instanciamos los schemas (el excerpt solo sale si se pide con ?fields=)
+post_schema = PostSchema(exclude=('excerpt',))
+posts_schema = PostSchema(many=True, exclude=('excerpt',))
+
+
+# ?sort= de /api/posts/: expresión de orden (desc, con el id como desempate).
+# Todas leen columnas de post con su índice (is_published, <orden>, id).
+ORDENES = {
+    'recent': Post.timestamp,
+    'comments': Post.comment_count,
+    'activity': Post.actividad,
+    'views': Post.view_count,
+}
+
+
+def schema_de_lectura(many):
+    """
+    Schema para un GET según ?fields=id,titulo,...: el parcial selecciona
+    solo esas columnas (sin `contenido` no se lee el Text). CamposInvalidos
+    si nombra campos que PostSchema no tiene.
+    """
+    campos = campos_pedidos(request.args.get('fields'), PostSchema)
+    if campos is None:
+        return posts_schema if many else post_schema
+    return schema_parcial(PostSchema, campos, many)
 
 class PostListAPI(MethodView):
     """
     Maneja GET (lista de posts) y POST (crear nuevo post).
     """
 
+    @response_cache.cached('posts', 'categories', 'autores')
+    @solo_lectura
     def get(self):
-        posts = Post.query.filter_by(is_published=True).order_by(Post.timestamp.desc()).all()
-        return jsonify(posts_schema.dump(posts)), 200
+        # Paginación por cursor sobre (timestamp, id): ?limit=N&cursor=<token>
+        limit = parse_limit(
+            request.args.get('limit'),
+            default=current_app.config.get('POSTS_PER_PAGE', 20),
+            maximum=current_app.config.get('POSTS_MAX_PER_PAGE', 100),
+        )
+        sort = request.args.get('sort') or 'recent'
+        orden = ORDENES.get(sort)
+        if orden is None:
+            return jsonify({"msg": f"'sort' debe ser uno de: {', '.join(ORDENES)}."}), 400
 
-    @jwt_required()
+        try:
+            schema = schema_de_lectura(many=True)
+            # Filas planas + serializador compilado (services/serializers.py)
+            query = consulta(db.session, schema, Post, orden.label('_orden')).filter(Post.is_published == True)
+            page = paginate_keyset(
+                query,
+                [(orden, 'desc'), (Post.id, 'desc')],
+                limit,
+                request.args.get('cursor'),
+                row_values=lambda row: [row._orden, row.id],
+                orden=sort,  # el cursor de un ?sort= no sirve para otro
+            )
+        except (InvalidCursor, CamposInvalidos) as e:
+            return jsonify({"msg": str(e)}), 400
+
+        return jsonify({
+            "data": serializar(db.session, schema, Post, page.items),
+            "next_cursor": page.next_cursor,
+            "limit": page.limit
+        }), 200
+
+    @identity_required()
     def post(self):
-        user_id_from_token = get_jwt_identity()
         data = request.json
         try:
             validated_data = post_schema.load(data)
         except Exception as e:
             return jsonify({"errors": str(e)}), 400
-        
+
         try:
-            user_id = int(user_id_from_token)
-        except ValueError:
-            return jsonify({"msg": "Error de token: ID de usuario inválido."}), 400
-
-        new_post = Post(
-            titulo=validated_data['titulo'],
-            contenido=validated_data['contenido'],
-            usuario_id=user_id
-        )
+            post = cola_escrituras.ejecutar(_crear_post, validated_data, current_identity().user_id)
+        except ColaEscriturasLlena:
+            return jsonify({"msg": "Servidor ocupado, intente nuevamente."}), 503
+        except Exception as e:
+            return jsonify({"error": "Error al guardar el post.", "details": str(e)}), 500
+        if post is None:
+            return jsonify({"msg": "Una o más IDs de categoría son inválidas."}), 400
+        return jsonify({
+            "msg": "Post creado exitosamente.",
+            "post": post
+        }), 201
 
-        categoria_ids = validated_data.get('categoria_ids', [])
-        if categoria_ids:
-            categorias = Categoria.query.filter(Categoria.id.in_(categoria_ids)).all()
-            if len(categorias) != len(set(categoria_ids)):
-                return jsonify({"msg": "Una o más IDs de categoría son inválidas."}), 400
-            new_post.categorias.extend(categorias)
 
-        db.session.add(new_post)
+def _crear_post(session, validated_data, user_id):
+    """Unidad de escritura (ver services/escrituras.py). None = categorías inválidas."""
+    new_post = Post(
+        titulo=validated_data['titulo'],
+        contenido=validated_data['contenido'],
+        usuario_id=user_id
+    )
+
+    categoria_ids = validated_data.get('categoria_ids', [])
+    if categoria_ids:
+        categorias = categorias_cache.resolve(categoria_ids, session)
+        if categorias is None:
+            return None
+        new_post.categorias.extend(categorias)
+
+    session.add(new_post)
+    session.flush()
+    return post_schema.dump(new_post)
+
+
+class PostBulkImportAPI(MethodView):
+    """
+    POST /api/posts/bulk con un cuerpo NDJSON (un post por línea).
+    Se lee el stream línea a línea: nunca se carga el archivo completo.
+    """
+
+    @identity_required()
+    def post(self):
+        batch_size = parse_limit(
+            request.args.get('batch_size'),
+            default=current_app.config.get('BULK_IMPORT_BATCH_SIZE', 500),
+            maximum=current_app.config.get('BULK_IMPORT_MAX_BATCH_SIZE', 5000),
+        )
         try:
-            db.session.commit()
-            return jsonify({
-                "msg": "Post creado exitosamente.",
-                "post": post_schema.dump(new_post)
-            }), 201
+            resultado = importar_posts(
+                request.stream,
+                current_identity().user_id,
+                db.session,
+                post_schema,
+                batch_size=batch_size,
+                max_errores=current_app.config.get('BULK_IMPORT_MAX_ERRORS', 1000),
+            )
         except Exception as e:
             db.session.rollback()
-            return jsonify({"error": "Error al guardar el post.", "details": str(e)}), 500
+            return jsonify({"error": "Error al importar los posts.", "details": str(e)}), 500
+
+        # 207: lo creado hasta el lote que falló quedó confirmado (ver 'aborted')
+        return jsonify(resultado.as_dict()), 207 if resultado.abortado else 200
+
+
+class PostSearchAPI(MethodView):
+    """
+    GET /api/posts/search?q=...&categoria=<id|nombre>&limit=N&cursor=<token>
+    Búsqueda de texto completo ordenada por relevancia.
+    """
+
+    @response_cache.cached('posts', 'categories', 'autores')
+    @solo_lectura
+    def get(self):
+        q = request.args.get('q', '')
+        if not search.terminos(q):
+            return jsonify({"msg": "Falta el parámetro de búsqueda 'q'."}), 400
+
+        limit = parse_limit(
+            request.args.get('limit'),
+            default=current_app.config.get('POSTS_PER_PAGE', 20),
+            maximum=current_app.config.get('POSTS_MAX_PER_PAGE', 100),
+        )
+
+        try:
+            schema = schema_de_lectura(many=True)
+        except CamposInvalidos as e:
+            return jsonify({"msg": str(e)}), 400
+
+        coincidencias = search.coincidencias(db.session, q)
+        query = (
+            consulta(db.session, schema, Post, coincidencias.c.score)
+            .join(coincidencias, coincidencias.c.post_id == Post.id)
+            .filter(Post.is_published == True)
+        )
+
+        categoria = request.args.get('categoria')
+        if categoria:
+            snapshot = categorias_cache.snapshot()
+            categoria_id = int(categoria) if categoria.isdecimal() else snapshot.por_nombre.get(categoria)
+            if categoria_id not in snapshot.por_id:
+                return jsonify({"msg": "Categoría no encontrada."}), 404
+            query = query.join(post_categoria, post_categoria.c.post_id == Post.id).filter(
+                post_categoria.c.categoria_id == categoria_id
+            )
+
+        try:
+            page = paginate_keyset(
+                query,
+                [(coincidencias.c.score, 'desc'), (Post.id, 'desc')],
+                limit,
+                request.args.get('cursor'),
+                row_values=lambda row: [row.score, row.id],
+            )
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
+
+        return jsonify({
+            "data": serializar(db.session, schema, Post, page.items),
+            "next_cursor": page.next_cursor,
+            "limit": page.limit
+        }), 200
+
+
+class PostTrendingAPI(MethodView):
+    """
+    GET /api/posts/trending?limit=N&fields=...
+    Posts publicados por tendencia (comentarios y vistas recientes con
+    decaimiento). El ranking sale de memoria (services/tendencias.py): solo
+    se buscan por id los posts de la respuesta, que llevan su "score".
+    """
+
+    @solo_lectura
+    def get(self):
+        limit = parse_limit(request.args.get('limit'), default=tendencias.top_k, maximum=tendencias.top_k)
+        try:
+            schema = schema_de_lectura(many=True)
+        except CamposInvalidos as e:
+            return jsonify({"msg": str(e)}), 400
+
+        # El tablero puede tener posts despublicados en otro proceso desde la
+        # última instantánea: se leen 2*limit candidatos en UNA consulta y se
+        # saltean. Si faltan, la página sale corta (no se recorre el tablero).
+        candidatos = tendencias.ranking()[:2 * limit]
+        filas = (
+            consulta(db.session, schema, Post, Post.id.label('_id'))
+            .filter(Post.id.in_([post_id for post_id, _ in candidatos]), Post.is_published == True)
+            .all()
+        )
+        por_id = {fila._id: fila for fila in filas}
+        elegidos = [(por_id[post_id], puntaje) for post_id, puntaje in candidatos if post_id in por_id][:limit]
+        data = serializar(db.session, schema, Post, [fila for fila, _ in elegidos])
+        for item, (_, puntaje) in zip(data, elegidos):
+            item['score'] = round(tendencias.valor(puntaje), 4)
+
+        return jsonify({"data": data, "limit": limit}), 200
 
 
 class PostDetailAPI(MethodView):
@@ -65,14 +249,25 @@ class PostDetailAPI(MethodView):
     Maneja GET, PUT, DELETE de un post específico.
     """
 
+    @contador_vistas.contar('post_id')
+    @response_cache.cached('post:{post_id}', 'categories', 'autores')
+    @solo_lectura
     def get(self, post_id):
         try:
-            post = Post.query.filter_by(id=post_id, is_published=True).one()
-            return jsonify(post_schema.dump(post)), 200
-        except NoResultFound:
+            schema = schema_de_lectura(many=False)
+        except CamposInvalidos as e:
+            return jsonify({"msg": str(e)}), 400
+
+        # Filas planas: con ?fields= solo las columnas pedidas (sin `contenido` no se lee el Text)
+        fila = (
+            consulta(db.session, schema, Post)
+            .filter(Post.id == post_id, Post.is_published == True)
+            .first()
+        )
+        if fila is None:
             return jsonify({"msg": "Post no encontrado o no publicado."}), 404
+        return jsonify(serializar(db.session, schema, Post, [fila])[0]), 200
 
-    @jwt_required()
     @post_owner_required()
     def put(self, post_id, post):
         data = request.json
@@ -89,8 +284,8 @@ class PostDetailAPI(MethodView):
             categoria_ids = validated_data['categoria_ids']
             post.categorias.clear()
             if categoria_ids:
-                categorias = Categoria.query.filter(Categoria.id.in_(categoria_ids)).all()
-                if len(categorias) != len(set(categoria_ids)):
+                categorias = categorias_cache.resolve(categoria_ids, db.session)
+                if categorias is None:
                     return jsonify({"msg": "IDs de categoría inválidas."}), 400
                 post.categorias.extend(categorias)
 
@@ -101,13 +296,11 @@ class PostDetailAPI(MethodView):
             db.session.rollback()
             return jsonify({"error": "Error al actualizar el post.", "details": str(e)}), 500
 
-    @jwt_required()
     @roles_required('admin')  # Solo admin puede eliminar posts
     def delete(self, post_id):
         try:
             post = Post.query.get_or_404(post_id)
-            db.session.delete(post)
-            db.session.commit()
+            borrado.borrar_post(db.session, post, lote=current_app.config.get('DELETE_BATCH_SIZE', borrado.LOTE))
             return jsonify({"msg": f"Post ID {post_id} eliminado exitosamente."}), 204
         except Exception as e:
             db.session.rollback()
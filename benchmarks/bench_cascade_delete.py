@@ -0,0 +1,161 @@
+"""
+Borrado de un post con muchos comentarios: la cascada del ORM (carga todos
+los comentarios y emite un DELETE por fila, en una sola transacción) contra
+services/borrado.py (DELETE ... WHERE id IN (...) por lotes, un commit por
+lote). Mide tiempo total, pico de memoria de Python y la transacción de
+escritura más larga (lo que otros escritores esperan al lock de SQLite).
+Verifica que después los contadores sigan cuadrando.
+
+La cascada del ORM tarda unos 4 ms por comentario (cada DELETE dispara los
+eventos de contadores): por defecto se mide sobre 10.000 y se compara por
+fila; --orm-comments 100000 la mide completa (varios minutos).
+
+Uso:
+    python benchmarks/bench_cascade_delete.py [--comments 100000] [--orm-comments 10000] [--batch-size 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, insert, select
+
+from app import create_app
+from app.extensions import db
+
+
+class Transacciones:
+    """Duración de cada transacción de la sesión (after_begin -> commit/rollback)."""
+
+    def __init__(self, session):
+        self.duraciones = []
+        self._inicio = None
+        event.listen(session, 'after_begin', self._empieza)
+        event.listen(session, 'after_commit', self._termina)
+        event.listen(session, 'after_rollback', self._termina)
+
+    def _empieza(self, session, transaction, connection):
+        self._inicio = time.perf_counter()
+
+    def _termina(self, session):
+        if self._inicio is not None:
+            self.duraciones.append((time.perf_counter() - self._inicio) * 1000)
+            self._inicio = None
+
+    def reiniciar(self):
+        self.duraciones = []
+
+
+def crear_post(session, comentarios, autor_id):
+    """Un post con `comentarios` comentarios (5% ocultos), insertados por Core."""
+    from app.models import Comentario, Post
+    from app.services import contadores
+
+    post = Post(titulo='Post con muchos comentarios', contenido='Cuerpo. ' * 50,
+                usuario_id=autor_id, is_published=True)
+    session.add(post)
+    session.commit()
+    base = datetime.utcnow() - timedelta(days=30)
+    for inicio in range(0, comentarios, 10000):
+        session.execute(insert(Comentario), [
+            {'contenido': f'Comentario {i}', 'post_id': post.id, 'usuario_id': autor_id,
+             'is_visible': i % 20 != 0, 'created_at': base + timedelta(seconds=i)}
+            for i in range(inicio, min(inicio + 10000, comentarios))
+        ])
+    session.commit()
+    # El insert por Core no pasa por los eventos: se recalculan los contadores
+    contadores.reconstruir(session)
+    contadores.reconstruir_posts(session)
+    session.commit()
+    return post.id
+
+
+def medir(session, transacciones, fn):
+    session.commit()
+    session.expire_all()
+    transacciones.reiniciar()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = fn()
+    ms = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ms, pico, max(transacciones.duraciones, default=0), len(transacciones.duraciones), resultado
+
+
+def cuadran(session):
+    from app.models import Comentario, Post
+    from app.services import contadores
+
+    valores = contadores.leer(session)
+    visibles = session.scalar(select(func.count()).where(Comentario.is_visible == True))
+    total = session.scalar(select(func.count()).select_from(Comentario))
+    return (valores[contadores.COMENTARIOS_VISIBLES] == visibles
+            and valores[contadores.COMENTARIOS_OCULTOS] == total - visibles
+            and valores[contadores.POSTS] == session.scalar(select(func.count()).select_from(Post)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--orm-comments', type=int, default=10000,
+                        help='Comentarios del post que se borra con la cascada del ORM.')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    from app.models import Post, Usuario
+    from app.services import borrado
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app(test_config={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, "bench.db")}',
+            'DB_CREATE_ALL': True,
+            'RESPONSE_CACHE_BACKEND': 'null',
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'PASSWORD_HASH_WORKERS': 0,
+            'METRICS_ENABLED': False,
+        })
+        with app.app_context():
+            session = db.session
+            autor = Usuario(username='bench-autor', email='bench-autor@example.com')
+            autor.set_password('12345678')
+            session.add(autor)
+            session.commit()
+            post_orm = crear_post(session, min(args.orm_comments, args.comments), autor.id)
+            post_lotes = crear_post(session, args.comments, autor.id)
+            transacciones = Transacciones(session())
+
+            def cascada_orm():
+                post = session.get(Post, post_orm)
+                # Lo que hacía cascade="all, delete-orphan" sin passive_deletes
+                comentarios = post.comentarios.all()
+                for comentario in comentarios:
+                    session.delete(comentario)
+                session.delete(post)
+                session.commit()
+                return len(comentarios)
+
+            def por_lotes():
+                post = session.get(Post, post_lotes)
+                return borrado.borrar_post(session, post, lote=args.batch_size)['comments']
+
+            orm = medir(session, transacciones, cascada_orm)
+            lotes = medir(session, transacciones, por_lotes)
+            ok = cuadran(session)
+
+    print(f'{"borrado":<20}{"filas":>9}{"ms":>10}{"ms/1000":>9}{"pico MiB":>10}{"tx":>6}{"tx más larga ms":>17}')
+    for nombre, (ms, pico, tx_max, tx, filas) in (('cascada del ORM', orm), ('por lotes', lotes)):
+        print(f'{nombre:<20}{filas:>9}{ms:>10.0f}{ms * 1000 / filas:>9.1f}{pico / 2**20:>10.1f}{tx:>6}{tx_max:>17.0f}')
+    por_fila = (orm[0] / orm[4]) / (lotes[0] / lotes[4])
+    print(f'\nPor lotes: {por_fila:.0f}x más rápido por fila; pico de memoria y transacción más larga '
+          f'acotados por --batch-size. Contadores: {"OK" if ok else "NO CUADRAN"}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
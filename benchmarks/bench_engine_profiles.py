@@ -0,0 +1,147 @@
+"""
+Lecturas y escrituras por segundo bajo carga concurrente según el perfil del
+engine (DB_ENGINE_PROFILE). Cada perfil corre sobre su propia base sembrada
+con el generador de `flask seed`; lectores y escritores son hilos con su
+propio app context (y por lo tanto su propia sesión).
+
+Lector: un post por id + una página del feed. Escritor: un comentario nuevo
+por transacción. Los "database is locked" se cuentan como errores.
+
+Uso:
+    python benchmarks/bench_engine_profiles.py [--seconds 5] [--readers 8] [--writers 2]
+    python benchmarks/bench_engine_profiles.py --mysql-uri mysql+pymysql://u:p@host/miniblog_bench
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.extensions import db, tendencias
+
+PERFILES_SQLITE = ('sqlite-rollback', 'sqlite')
+PERFILES_MYSQL = ('none', 'mysql-small', 'mysql')
+
+
+def crear_app(uri, perfil):
+    return create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'DB_ENGINE_PROFILE': perfil,
+        'DB_CREATE_ALL': True,
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        'METRICS_ENABLED': False,
+    })
+
+
+def sembrar(app):
+    from app.services import seed
+    with app.app_context():
+        seed.generar(db.session, usuarios=200, posts=2000, comentarios=10000, echo=lambda *a: None)
+
+
+def medir(app, segundos, lectores, escritores):
+    from app.models import Post, Comentario
+
+    with app.app_context():
+        min_post, max_post = db.session.execute(select(func.min(Post.id), func.max(Post.id))).one()
+        min_user = db.session.scalar(select(func.min(Comentario.usuario_id)))
+
+    fin = time.perf_counter() + segundos
+    lock = threading.Lock()
+    totales = {'lecturas': 0, 'escrituras': 0, 'bloqueos': 0, 'latencias_escritura': []}
+
+    def lector(semilla):
+        rng = random.Random(semilla)
+        n = 0
+        with app.app_context():
+            while time.perf_counter() < fin:
+                db.session.get(Post, rng.randint(min_post, max_post))
+                db.session.execute(
+                    select(Post.id, Post.titulo).where(Post.is_published == True)
+                    .order_by(Post.timestamp.desc()).limit(20)
+                ).all()
+                db.session.rollback()  # fin de la transacción de lectura
+                db.session.expunge_all()
+                n += 1
+        with lock:
+            totales['lecturas'] += n
+
+    def escritor(semilla):
+        rng = random.Random(semilla)
+        n = bloqueos = 0
+        latencias = []
+        with app.app_context():
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                try:
+                    db.session.add(Comentario(contenido='comentario de carga',
+                                              post_id=rng.randint(min_post, max_post),
+                                              usuario_id=min_user))
+                    db.session.commit()
+                    n += 1
+                    latencias.append(time.perf_counter() - inicio)
+                except OperationalError:
+                    db.session.rollback()
+                    bloqueos += 1
+        with lock:
+            totales['escrituras'] += n
+            totales['bloqueos'] += bloqueos
+            totales['latencias_escritura'].extend(latencias)
+
+    hilos = [threading.Thread(target=lector, args=(i,)) for i in range(lectores)]
+    hilos += [threading.Thread(target=escritor, args=(1000 + i,)) for i in range(escritores)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    transcurrido = time.perf_counter() - inicio
+
+    latencias = sorted(totales['latencias_escritura'])
+    p95 = latencias[int(len(latencias) * 0.95) - 1] * 1000 if latencias else float('nan')
+    return (totales['lecturas'] / transcurrido, totales['escrituras'] / transcurrido,
+            totales['bloqueos'], p95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--mysql-uri', default=None, help='Base MySQL de pruebas (se le agregan datos).')
+    args = parser.parse_args()
+
+    print(f'{args.readers} lectores, {args.writers} escritores, {args.seconds:.0f} s por perfil\n')
+    print(f"{'perfil':<18}{'lecturas/s':>12}{'escrituras/s':>14}{'bloqueos':>10}{'p95 escr. ms':>14}")
+
+    casos = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for perfil in PERFILES_SQLITE:
+            casos.append((perfil, f'sqlite:///{os.path.join(directorio, perfil + ".db")}', True))
+        if args.mysql_uri:
+            casos += [(perfil, args.mysql_uri, i == 0) for i, perfil in enumerate(PERFILES_MYSQL)]
+
+        for perfil, uri, sembrar_antes in casos:
+            app = crear_app(uri, perfil)
+            if sembrar_antes:
+                sembrar(app)
+            lecturas, escrituras, bloqueos, p95 = medir(app, args.seconds, args.readers, args.writers)
+            print(f'{perfil:<18}{lecturas:>12,.0f}{escrituras:>14,.0f}{bloqueos:>10}{p95:>14.2f}')
+            # Antes de borrar el directorio: si no, su volcado de atexit no encuentra la base
+            tendencias.shutdown()
+            with app.app_context():
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
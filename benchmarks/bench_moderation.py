@@ -0,0 +1,116 @@
+"""
+Moderación: ocultar N comentarios uno por uno (DELETE /api/comments/<id>,
+un request y un commit por comentario) contra un solo POST
+/api/moderation/comments/bulk, y la cola paginada contra cargar todos los
+comentarios con su autor como hacía el panel anterior. Verifica que después
+del lote los contadores de /api/stats y de cada post sigan cuadrando.
+
+Uso:
+    python benchmarks/bench_moderation.py [--comments 20000] [--n 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from app import create_app
+from app.extensions import db
+
+PASSWORD = '12345678'
+
+
+def cronometrar(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def cuadran(session):
+    """Contadores materializados == conteos reales."""
+    from app.models import Comentario, Post
+    from app.services import contadores
+
+    valores = contadores.leer(session)
+    visibles = session.scalar(select(func.count()).where(Comentario.is_visible == True))
+    total = session.scalar(select(func.count()).select_from(Comentario))
+    reales = dict(session.execute(
+        select(Comentario.post_id, func.count()).where(Comentario.is_visible == True).group_by(Comentario.post_id)
+    ).all())
+    guardados = dict(session.execute(select(Post.id, Post.comment_count)).all())
+    return (valores[contadores.COMENTARIOS_VISIBLES] == visibles
+            and valores[contadores.COMENTARIOS_OCULTOS] == total - visibles
+            and all(guardados[p] == reales.get(p, 0) for p in guardados))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--n', type=int, default=2000, help='Comentarios a ocultar.')
+    args = parser.parse_args()
+
+    from app.models import Comentario, Usuario
+    from app.services import seed
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app(test_config={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, "bench.db")}',
+            'DB_CREATE_ALL': True,
+            'JWT_SECRET_KEY': 'bench-moderation-secret-de-32-bytes',
+            'RESPONSE_CACHE_BACKEND': 'null',
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'PASSWORD_HASH_WORKERS': 0,
+            'METRICS_ENABLED': False,
+        })
+        with app.app_context():
+            seed.generar(db.session, usuarios=200, posts=1000, comentarios=args.comments, echo=lambda *a: None)
+            moderador = Usuario(username='bench-mod', email='bench-mod@example.com', role='moderator')
+            moderador.set_password(PASSWORD)
+            db.session.add(moderador)
+            db.session.commit()
+            visibles = db.session.scalars(
+                select(Comentario.id).where(Comentario.is_visible == True).order_by(Comentario.id).limit(2 * args.n)
+            ).all()
+        uno_a_uno, en_lote = visibles[:args.n], visibles[args.n:]
+
+        client = app.test_client()
+        token = client.post('/api/login', json={'email': 'bench-mod@example.com',
+                                                'password': PASSWORD}).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def ocultar_uno_a_uno():
+            for comentario_id in uno_a_uno:
+                assert client.delete(f'/api/comments/{comentario_id}', headers=headers).status_code == 204
+
+        def ocultar_en_lote():
+            r = client.post('/api/moderation/comments/bulk', headers=headers,
+                            json={'ids': en_lote, 'is_visible': False})
+            assert r.status_code == 200, r.status_code
+            return r.get_json()['updated']
+
+        ms_uno, _ = cronometrar(ocultar_uno_a_uno)
+        ms_lote, actualizados = cronometrar(ocultar_en_lote)
+
+        with app.app_context():
+            ms_todo, todos = cronometrar(lambda: Comentario.query.options(selectinload(Comentario.autor))
+                                         .order_by(Comentario.created_at.desc()).all())
+            ok = cuadran(db.session)
+        ms_cola, _ = cronometrar(lambda: client.get('/api/moderation/comments?is_visible=0&limit=50',
+                                                    headers=headers))
+
+    print(f'{"operación":<52}{"ms":>10}')
+    print(f'{f"ocultar {len(uno_a_uno)} uno por uno (DELETE)":<52}{ms_uno:>10.1f}')
+    print(f'{f"ocultar {actualizados} en lote (un UPDATE)":<52}{ms_lote:>10.1f}')
+    print(f'{f"cargar los {len(todos)} comentarios (panel anterior)":<52}{ms_todo:>10.1f}')
+    print(f'{"una página de la cola (50 ocultos)":<52}{ms_cola:>10.1f}')
+    print(f'\nLote: {ms_uno / ms_lote:.0f}x más rápido. Contadores: {"OK" if ok else "NO CUADRAN"}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Logins por segundo según el costo del hash, hasheando en el hilo del
+request (workers=0) frente al pool de procesos de PasswordHasher.
+
+Uso:
+    python benchmarks/bench_password_hashing.py [--seconds 3] [--threads 16]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.passwords import PasswordHasher, PasswordHasherBusy
+
+METODOS = [
+    'pbkdf2:sha256:100000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+    'bcrypt:10',
+    'bcrypt:12',
+]
+
+
+def medir(hasher, password_hash, segundos, hilos):
+    fin = time.perf_counter() + segundos
+    ok = [0]
+    rechazados = [0]
+    lock = threading.Lock()
+
+    def login():
+        while time.perf_counter() < fin:
+            try:
+                hasher.verify(password_hash, 'contraseña-de-prueba')
+                with lock:
+                    ok[0] += 1
+            except PasswordHasherBusy:
+                with lock:
+                    rechazados[0] += 1
+
+    threads = [threading.Thread(target=login) for _ in range(hilos)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return ok[0] / (time.perf_counter() - inicio), rechazados[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f'{"método":<24}{"inline/s":>12}{"pool/s":>12}{"x":>8}')
+    hasher = PasswordHasher()
+    for metodo in METODOS:
+        hasher.configure(method=metodo, workers=0)
+        password_hash = hasher.hash('contraseña-de-prueba')
+        inline, _ = medir(hasher, password_hash, args.seconds, args.threads)
+
+        hasher.configure(method=metodo, workers=args.workers, queue=args.threads)
+        hasher.verify(password_hash, 'calentamiento')  # arranca los procesos
+        pool, rechazados = medir(hasher, password_hash, args.seconds, args.threads)
+        hasher.shutdown()
+
+        extra = f'  ({rechazados} rechazados)' if rechazados else ''
+        print(f'{metodo:<24}{inline:>12.1f}{pool:>12.1f}{pool / inline:>8.2f}{extra}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Listados de 10k filas: ORM + marshmallow contra filas planas + serializador
+compilado (app/services/serializers.py), para usuarios, comentarios y posts
+(con categorías y comentarios anidados). Mide la consulta y la serialización
+juntas y la serialización sola, y reporta la aceleración.
+
+Uso:
+    python benchmarks/bench_serializers.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+
+
+def mejor(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        resultado = fn()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from app.models import Comentario, Post, Usuario
+    from app.services import seed
+    from app.services.loaders import post_schema_options, comentario_schema_options
+    from app.services.serializers import compilar, consulta, serializar
+    from app.views.auth_views import usuarios_dump_schema
+    from app.views.comment_views import comentarios_schema
+    from app.views.post_views import posts_schema
+
+    n = args.rows
+    casos = [
+        ('usuarios', usuarios_dump_schema, Usuario,
+         lambda: Usuario.query.order_by(Usuario.id).limit(n).all(), None),
+        ('comentarios', comentarios_schema, Comentario,
+         lambda: Comentario.query.filter_by(is_visible=True).options(*comentario_schema_options())
+         .order_by(Comentario.id).limit(n).all(),
+         lambda q: q.filter(Comentario.is_visible == True)),
+        ('posts', posts_schema, Post,
+         lambda: Post.query.options(*post_schema_options()).order_by(Post.id).limit(n).all(), None),
+    ]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app(test_config={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, "bench.db")}',
+            'DB_CREATE_ALL': True,
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'METRICS_ENABLED': False,
+        })
+        with app.app_context():
+            print(f'Sembrando {n:,} usuarios, {n:,} posts y {3 * n:,} comentarios...')
+            seed.generar(db.session, usuarios=n, posts=n, comentarios=3 * n, echo=lambda *a: None)
+
+            print(f'\n{"listado":<13}{"ORM+mm ms":>11}{"compilado ms":>14}{"x":>7}'
+                  f'{"solo dump mm":>15}{"solo dump comp":>16}{"x":>7}')
+            for nombre, schema, modelo, orm, filtro in casos:
+                def rapido():
+                    query = consulta(db.session, schema, modelo)
+                    if filtro:
+                        query = filtro(query)
+                    filas = query.order_by(modelo.id).limit(n).all()
+                    return serializar(db.session, schema, modelo, filas)
+
+                t_orm, esperado = mejor(lambda: schema.dump(orm()), args.repeat)
+                t_rapido, obtenido = mejor(rapido, args.repeat)
+                assert esperado == obtenido, f'{nombre}: salida distinta'
+
+                # Serialización sola, sobre objetos ya cargados
+                objetos = orm()
+                t_dump_mm, _ = mejor(lambda: schema.dump(objetos), args.repeat)
+                dump = compilar(schema, modelo)
+                t_dump_comp, _ = mejor(lambda: [dump(o) for o in objetos], args.repeat)
+
+                print(f'{nombre:<13}{t_orm:>11.1f}{t_rapido:>14.1f}{t_orm / t_rapido:>7.1f}'
+                      f'{t_dump_mm:>15.1f}{t_dump_comp:>16.1f}{t_dump_mm / t_dump_comp:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Posts largos: payload y tiempo de GET /api/posts/ completo contra
+?fields=id,titulo,excerpt,autor_id (solo columnas pedidas, el excerpt
+guardado en lugar del contenido) y bytes que cada consulta lee de la base
+(sin las listas anidadas). También el listado web (index), que difiere
+`contenido`.
+
+Uso:
+    python benchmarks/bench_sparse_fields.py [--posts 2000] [--kb 20] [--limit 100] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.extensions import db
+
+CAMPOS = 'id,titulo,excerpt,autor_id'
+
+
+def alargar(cantidad_kb):
+    """Reemplaza el contenido de todos los posts por ~cantidad_kb KiB de texto."""
+    from app.models import Post, hacer_excerpt
+
+    parrafo = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 18 + '\n'
+    contenido = (parrafo * (cantidad_kb * 1024 // len(parrafo) + 1))[:cantidad_kb * 1024]
+    db.session.execute(db.update(Post).values(contenido=contenido, excerpt=hacer_excerpt(contenido)))
+    db.session.commit()
+
+
+def bytes_leidos(schema, limit):
+    """Bytes de las filas que consulta() trae de la base para una página."""
+    from app.models import Post
+    from app.services.serializers import consulta
+
+    filas = consulta(db.session, schema, Post).order_by(Post.id).limit(limit).all()
+    return sum(len(str(valor).encode()) for fila in filas for valor in fila if valor is not None)
+
+
+def medir(client, url, repeticiones):
+    client.get(url)  # compila el serializador y calienta la caché de sentencias
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = client.get(url)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        assert respuesta.status_code == 200, (url, respuesta.status_code)
+    return statistics.median(tiempos), len(respuesta.data)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--kb', type=int, default=20, help='Tamaño del contenido de cada post.')
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from app.models import Post
+    from app.routes import bp as web
+    from app.schemas.post_schemas import PostSchema
+    from app.services import seed
+    from app.services.serializers import schema_parcial
+    from app.views.post_views import posts_schema
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app(test_config={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, "bench.db")}',
+            'DB_CREATE_ALL': True,
+            'RESPONSE_CACHE_BACKEND': 'null',
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'METRICS_ENABLED': False,
+        })
+        app.register_blueprint(web)
+        with app.app_context():
+            seed.generar(db.session, usuarios=50, posts=args.posts, comentarios=0, echo=lambda *a: None)
+            alargar(args.kb)
+
+            ancho = db.session.scalar(select(func.avg(func.length(Post.contenido))))
+            parcial = schema_parcial(PostSchema, tuple(sorted(CAMPOS.split(','))), True)
+            leidos = {
+                'API completo': bytes_leidos(posts_schema, args.limit),
+                f'API ?fields={CAMPOS}': bytes_leidos(parcial, args.limit),
+            }
+
+        client = app.test_client()
+        casos = [
+            ('API completo', f'/api/posts/?limit={args.limit}'),
+            (f'API ?fields={CAMPOS}', f'/api/posts/?limit={args.limit}&fields={CAMPOS}'),
+            ('web index', '/index'),
+        ]
+        print(f'{args.posts} posts de ~{ancho / 1024:.0f} KiB, limit={args.limit}\n')
+        print(f'{"caso":<44}{"p50 ms":>10}{"payload":>14}{"leído de la base":>20}')
+        resultados = {}
+        for nombre, url in casos:
+            p50, tamano = medir(client, url, args.repeat)
+            resultados[nombre] = (p50, tamano)
+            leido = f'{leidos[nombre]:,} B' if nombre in leidos else '-'
+            print(f'{nombre:<44}{p50:>10.2f}{tamano:>12,} B{leido:>20}')
+
+        completo, parcial = resultados['API completo'], resultados[f'API ?fields={CAMPOS}']
+        print(f'\n?fields=: payload {completo[1] / parcial[1]:.0f}x menor, '
+              f'{leidos["API completo"] / leidos[f"API ?fields={CAMPOS}"]:.0f}x menos leído de la base, '
+              f'{completo[0] / parcial[0]:.1f}x más rápido')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Posts en tendencia: un GROUP BY sobre los comentarios con el decaimiento
+calculado en SQL en cada request (lo ingenuo) contra GET /api/posts/trending,
+que lee el ranking mantenido en memoria por services/tendencias.py. Los
+comentarios se reparten en los últimos --days días; después se agregan
+--new comentarios por el ORM y se ocultan algunos por moderación, y se
+verifica que el ranking incremental coincida con el del GROUP BY.
+
+Necesita SQLite con funciones matemáticas (power, 3.35+) para la versión
+ingenua.
+
+Uso:
+    python benchmarks/bench_trending.py [--posts 2000] [--comments 100000] [--days 7] [--iterations 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, func, select, update
+
+from app import create_app
+from app.extensions import db, tendencias
+
+
+def agrupado(limit):
+    """El ranking calculado desde cero: SUM(peso * 2^(-edad/vida_media)) por post."""
+    from app.models import Comentario, Post
+
+    ahora = datetime.utcnow()
+    horas = (func.julianday(ahora) - func.julianday(Comentario.created_at)) * 24
+    puntaje = func.sum(tendencias.peso_comentario * func.power(2, -horas / tendencias.vida_media))
+    return db.session.execute(
+        select(Comentario.post_id, puntaje.label('puntaje'))
+        .join(Post, Post.id == Comentario.post_id)
+        .where(Comentario.is_visible == True, Post.is_published == True,
+               Comentario.created_at >= ahora - timedelta(hours=tendencias.vida_media * 10))
+        .group_by(Comentario.post_id)
+        .order_by(puntaje.desc())
+        .limit(limit)
+    ).all()
+
+
+def medir(fn, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=7, help='Antigüedad máxima de los comentarios.')
+    parser.add_argument('--new', type=int, default=500, help='Comentarios agregados por el ORM.')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    from app.models import Comentario, Post, Usuario
+    from app.services import moderacion, seed
+    from app.services.tendencias import reconstruir
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app(test_config={
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, "bench.db")}',
+            'DB_CREATE_ALL': True,
+            'RESPONSE_CACHE_BACKEND': 'null',
+            'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+            'PASSWORD_HASH_WORKERS': 0,
+            'METRICS_ENABLED': False,
+            # Solo comentarios: el GROUP BY no ve las vistas
+            'TRENDING_VIEW_WEIGHT': 0,
+            'TRENDING_SNAPSHOT_SECONDS': 3600,
+        })
+        rng = random.Random(42)
+        with app.app_context():
+            print(f'Sembrando {args.posts} posts y {args.comments} comentarios...')
+            seed.generar(db.session, usuarios=100, posts=args.posts, comentarios=args.comments,
+                         hidden_ratio=0.05, echo=lambda *a: None)
+            # Fechas recientes para que los comentarios cuenten
+            ahora = datetime.utcnow()
+            ids = db.session.scalars(select(Comentario.id)).all()
+            db.session.execute(
+                update(Comentario.__table__).where(Comentario.__table__.c.id == bindparam('_id'))
+                .values(created_at=bindparam('_creado')),
+                [{'_id': i, '_creado': ahora - timedelta(seconds=rng.randrange(args.days * 86400))}
+                 for i in ids],
+            )
+            db.session.commit()
+
+            inicio = time.perf_counter()
+            posts_con_tendencia = reconstruir(db.session)
+            print(f'flask trending rebuild: {posts_con_tendencia} posts en '
+                  f'{time.perf_counter() - inicio:.2f} s\n')
+
+            # Cambios incrementales: comentarios nuevos en unos pocos posts y moderación
+            post_ids = db.session.scalars(select(Post.id).where(Post.is_published == True)).all()
+            calientes = rng.sample(post_ids, 10)
+            usuario_id = db.session.scalars(select(Usuario.id)).first()
+            nuevos = []
+            for n in range(args.new):
+                comentario = Comentario(contenido='nuevo', usuario_id=usuario_id,
+                                        post_id=rng.choice(calientes), created_at=datetime.utcnow())
+                db.session.add(comentario)
+                nuevos.append(comentario)
+                if n % 20 == 19:
+                    db.session.commit()
+            db.session.commit()
+            moderacion.cambiar_visibilidad(db.session, [c.id for c in nuevos[::5]], False)
+            db.session.commit()
+            tendencias.instantanea()
+
+            cliente = app.test_client()
+            url = f'/api/posts/trending?limit={tendencias.top_k}&fields=id,titulo'
+            respuesta = cliente.get(url).get_json()
+            incremental = [item['id'] for item in respuesta['data']]
+            esperado = [fila.post_id for fila in agrupado(tendencias.top_k)]
+
+            ms_agrupado = medir(lambda: agrupado(tendencias.top_k), args.iterations)
+            ms_endpoint = medir(lambda: cliente.get(url), args.iterations)
+            ms_ranking = medir(tendencias.ranking, args.iterations)
+
+        tendencias.shutdown()
+
+    print(f'{"top " + str(tendencias.top_k):<40}{"ms (mediana)":>14}')
+    print(f'{"GROUP BY sobre comentario":<40}{ms_agrupado:>14.2f}')
+    print(f'{"GET /api/posts/trending (request)":<40}{ms_endpoint:>14.2f}')
+    print(f'{"  ranking en memoria":<40}{ms_ranking:>14.4f}')
+    ok = incremental == esperado
+    print(f'\nEndpoint {ms_agrupado / ms_endpoint:.1f}x más rápido que el GROUP BY. '
+          f'Ranking: {"OK" if ok else "NO COINCIDE"}')
+    if not ok:
+        print(f'  incremental: {incremental}\n  GROUP BY:    {esperado}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
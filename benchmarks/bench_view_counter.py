@@ -0,0 +1,142 @@
+"""
+Contador de vistas: un UPDATE + commit por cada GET /api/posts/<id> (lo
+ingenuo) contra la escritura diferida de services/vistas.py (acumula en
+memoria y vuelca por lotes). N hilos leen posts al azar; se mide lecturas
+por segundo, latencia p50/p99 y escrituras a la base. Al final verifica que
+la suma de view_count sea igual a la cantidad de lecturas servidas.
+
+Uso:
+    python benchmarks/bench_view_counter.py [--threads 8] [--reads 200] [--posts 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import make_response
+from sqlalchemy import event, func, select, update
+
+from app import create_app
+from app.extensions import contador_vistas, db
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def un_update_por_vista(app):
+    """Envuelve el detalle con lo que haría un contador sin buffer."""
+    from app.models import Post
+
+    vista = app.view_functions['api.post_detail_api']
+
+    def contada(**kwargs):
+        response = make_response(vista(**kwargs))
+        if response.status_code == 200:
+            db.session.execute(update(Post).where(Post.id == kwargs['post_id'])
+                               .values(view_count=Post.view_count + 1))
+            db.session.commit()
+        return response
+
+    app.view_functions['api.post_detail_api'] = contada
+
+
+def correr(directorio, args, diferido):
+    from app.models import Post
+    from app.services import seed
+
+    app = create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, f"bench-{diferido}.db")}',
+        'DB_CREATE_ALL': True,
+        'RESPONSE_CACHE_BACKEND': 'memory',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        'METRICS_ENABLED': False,
+        'VIEW_COUNTER_ENABLED': diferido,
+        'VIEW_COUNTER_FLUSH_SECONDS': 0.5,
+    })
+    with app.app_context():
+        seed.generar(db.session, usuarios=20, posts=args.posts, comentarios=args.posts * 5,
+                     hidden_ratio=0, echo=lambda *a: None)
+        db.session.execute(update(Post).values(is_published=True))
+        db.session.commit()
+        ids = db.session.scalars(select(Post.id)).all()
+    if not diferido:
+        un_update_por_vista(app)
+
+    escrituras = []
+    with app.app_context():
+        event.listen(db.engine, 'commit', lambda conn: escrituras.append(1))
+
+    latencias, servidas = [], []
+    lock = threading.Lock()
+    barrera = threading.Barrier(args.threads + 1)
+
+    def lector(semilla):
+        rng = random.Random(semilla)
+        cliente = app.test_client()
+        propias, ok = [], 0
+        barrera.wait()
+        for _ in range(args.reads):
+            inicio = time.perf_counter()
+            r = cliente.get(f'/api/posts/{rng.choice(ids)}?fields=id,titulo')
+            propias.append((time.perf_counter() - inicio) * 1000)
+            ok += r.status_code == 200
+        with lock:
+            latencias.extend(propias)
+            servidas.append(ok)
+
+    hilos = [threading.Thread(target=lector, args=(n,)) for n in range(args.threads)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    durante = len(escrituras)
+    contador_vistas.shutdown()  # vuelca lo pendiente, como al apagar
+
+    with app.app_context():
+        db.session.remove()
+        total = db.session.scalar(select(func.sum(Post.view_count)))
+    return {
+        'ok': total == sum(servidas),
+        'por_segundo': len(latencias) / segundos,
+        'p50': percentil(latencias, 0.50),
+        'p99': percentil(latencias, 0.99),
+        'commits': durante,
+        'vistas': total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--reads', type=int, default=200, help='Lecturas por hilo.')
+    parser.add_argument('--posts', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        directo = correr(directorio, args, diferido=False)
+        diferido = correr(directorio, args, diferido=True)
+
+    print(f'{args.threads} hilos x {args.reads} lecturas sobre {args.posts} posts\n')
+    print(f'{"contador":<24}{"lect/s":>9}{"p50 ms":>9}{"p99 ms":>9}{"commits":>9}{"vistas":>9}')
+    for nombre, r in (('UPDATE por vista', directo), ('escritura diferida', diferido)):
+        print(f'{nombre:<24}{r["por_segundo"]:>9.0f}{r["p50"]:>9.1f}{r["p99"]:>9.1f}'
+              f'{r["commits"]:>9}{r["vistas"]:>9}')
+    ok = directo['ok'] and diferido['ok']
+    print(f'\nDiferido: {diferido["por_segundo"] / directo["por_segundo"]:.1f}x lecturas/s, '
+          f'{directo["commits"]} -> {diferido["commits"]} commits. Vistas: {"OK" if ok else "NO CUADRAN"}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
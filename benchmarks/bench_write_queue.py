@@ -0,0 +1,137 @@
+"""
+Escrituras concurrentes sobre SQLite: cada request con su propio commit
+contra la cola con group commit (WRITE_QUEUE_ENABLED, services/escrituras.py).
+N hilos crean comentarios con POST /api/posts/<id>/comments; se mide
+escrituras por segundo, latencia p50/p99 y errores, contando aparte los
+"database is locked" (la espera por el lock superó --busy-timeout). Al
+final verifica que los contadores cuadren.
+
+Uso:
+    python benchmarks/bench_write_queue.py [--threads 16] [--writes 50]
+        [--profile sqlite|sqlite-rollback] [--busy-timeout 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.extensions import cola_escrituras, contador_vistas, db, tendencias
+
+PASSWORD = '12345678'
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def correr(directorio, args, cola):
+    from app.models import Comentario, Post
+    from app.services import contadores
+
+    app = create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(directorio, f"bench-{cola}.db")}',
+        'DB_CREATE_ALL': True,
+        'DB_ENGINE_PROFILE': args.profile,
+        'JWT_SECRET_KEY': 'bench-write-queue-secret-de-32-bytes',
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        'METRICS_ENABLED': False,
+        'WRITE_QUEUE_ENABLED': cola,
+        'SQLITE_PRAGMAS': {'busy_timeout': args.busy_timeout},
+    })
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'bench', 'email': 'bench@example.com', 'password': PASSWORD})
+    token = client.post('/api/login', json={'email': 'bench@example.com',
+                                            'password': PASSWORD}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    post_id = client.post('/api/posts/', headers=headers, json={
+        'titulo': 'Post del benchmark', 'contenido': 'Contenido del benchmark.'}).get_json()['post']['id']
+
+    latencias, errores = [], []
+    lock = threading.Lock()
+    barrera = threading.Barrier(args.threads + 1)
+
+    def escritor(n):
+        cliente = app.test_client()
+        propias, fallidas = [], []
+        barrera.wait()
+        for i in range(args.writes):
+            inicio = time.perf_counter()
+            r = cliente.post(f'/api/posts/{post_id}/comments', headers=headers,
+                             json={'contenido': f'Comentario {n}-{i}'})
+            propias.append((time.perf_counter() - inicio) * 1000)
+            if r.status_code != 201:
+                fallidas.append(str((r.get_json() or {}).get('message', r.status_code)))
+        with lock:
+            latencias.extend(propias)
+            errores.extend(fallidas)
+
+    hilos = [threading.Thread(target=escritor, args=(n,)) for n in range(args.threads)]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+    stats = cola_escrituras.stats()
+    cola_escrituras.shutdown()
+    # Antes de borrar el directorio: si no, sus volcados de atexit no encuentran la base
+    contador_vistas.shutdown()
+    tendencias.shutdown()
+
+    with app.app_context():
+        total = db.session.scalar(select(func.count()).select_from(Comentario))
+        valores = contadores.leer(db.session)
+        ok = (valores[contadores.COMENTARIOS_VISIBLES] == total
+              and db.session.get(Post, post_id).comment_count == total)
+    return {
+        'ok': ok and total == len(latencias) - len(errores),
+        'por_segundo': (len(latencias) - len(errores)) / segundos,
+        'p50': percentil(latencias, 0.50),
+        'p99': percentil(latencias, 0.99),
+        'errores': errores,
+        'locked': sum('locked' in e for e in errores),
+        'lote_medio': stats['unidades'] / stats['lotes'] if stats['lotes'] else 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=50, help='Comentarios por hilo.')
+    parser.add_argument('--profile', default='sqlite', choices=('sqlite', 'sqlite-rollback'))
+    parser.add_argument('--busy-timeout', type=int, default=5000,
+                        help='PRAGMA busy_timeout en ms (el del perfil es 5000).')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        directo = correr(directorio, args, cola=False)
+        en_cola = correr(directorio, args, cola=True)
+
+    print(f'{args.threads} hilos x {args.writes} comentarios, perfil {args.profile}, '
+          f'busy_timeout {args.busy_timeout} ms\n')
+    print(f'{"modo":<26}{"escr/s":>9}{"p50 ms":>9}{"p99 ms":>9}{"errores":>9}{"locked":>8}{"lote":>7}')
+    for nombre, r in (('commit por request', directo), ('cola + group commit', en_cola)):
+        print(f'{nombre:<26}{r["por_segundo"]:>9.0f}{r["p50"]:>9.1f}{r["p99"]:>9.1f}'
+              f'{len(r["errores"]):>9}{r["locked"]:>8}{r["lote_medio"]:>7.1f}')
+    for nombre, r in (('commit por request', directo), ('cola + group commit', en_cola)):
+        if r['errores']:
+            print(f'  {nombre}: {r["errores"][0].splitlines()[0]}')
+    ok = directo['ok'] and en_cola['ok']
+    print(f'\nCola: {en_cola["por_segundo"] / directo["por_segundo"]:.1f}x escrituras/s. '
+          f'Contadores: {"OK" if ok else "NO CUADRAN"}')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
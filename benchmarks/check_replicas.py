@@ -0,0 +1,167 @@
+"""
+Verifica el enrutamiento a réplicas usando archivos SQLite como réplicas
+(copias del primario): round-robin de los GET de solo lectura, escrituras en
+el primario, read-your-writes dentro de un request y failover cuando una
+réplica no responde; con la caché de respuestas, que un MISS justo después de
+invalidar no guarde lo que la réplica (atrasada) todavía no vio. Sale con
+código 1 ante cualquier falla.
+
+Uso:
+    python benchmarks/check_replicas.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g
+from sqlalchemy import event, select
+
+from app import create_app
+from app.extensions import db
+
+
+def crear_app(primario, replicas=(), **config):
+    return create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primario}',
+        'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{r}' for r in replicas],
+        'DB_CREATE_ALL': True,
+        'JWT_SECRET_KEY': 'check-replicas-secret-de-al-menos-32-bytes',
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        'METRICS_ENABLED': False,
+        **config,
+    })
+
+
+def contar_por_engine(app):
+    """{bind: consultas} actualizado por before_cursor_execute."""
+    cuenta = {}
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            cuenta[bind] = 0
+
+            def contar(*args, bind=bind):
+                cuenta[bind] += 1
+            event.listen(engine, 'before_cursor_execute', contar)
+    return cuenta
+
+
+def main():
+    from app.models import Post, Usuario
+    from app.services import seed
+
+    fallas = []
+
+    def verificar(condicion, mensaje):
+        print(('OK     ' if condicion else 'FALLA  ') + mensaje)
+        if not condicion:
+            fallas.append(mensaje)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        primario = os.path.join(directorio, 'primario.db')
+        replicas = [os.path.join(directorio, f'replica{i}.db') for i in range(2)]
+
+        app = crear_app(primario)
+        with app.app_context():
+            seed.generar(db.session, usuarios=20, posts=100, comentarios=300, echo=lambda *a: None)
+            admin = Usuario(username='admin-replicas', email='admin-replicas@example.com', role='admin')
+            admin.set_password('12345678')
+            db.session.add(admin)
+            db.session.commit()
+            admin_id = admin.id
+            db.engine.dispose()
+        # API de backup: copia consistente aunque el primario esté en WAL
+        for replica in replicas:
+            with sqlite3.connect(primario) as origen, sqlite3.connect(replica) as destino:
+                origen.backup(destino)
+
+        # --- Round-robin de lecturas, escrituras al primario ---
+        app = crear_app(primario, replicas)
+        cuenta = contar_por_engine(app)
+        client = app.test_client()
+        token = client.post('/api/login', json={'email': 'admin-replicas@example.com',
+                                                'password': '12345678'}).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for bind in cuenta:
+            cuenta[bind] = 0
+        for _ in range(4):
+            assert client.get('/api/posts/?limit=5').status_code == 200
+        verificar(cuenta[None] == 0, f'GET /api/posts/ no toca el primario ({cuenta[None]} consultas)')
+        verificar(cuenta['replica_0'] == cuenta['replica_1'] > 0,
+                  f"GET /api/posts/ reparte entre réplicas ({cuenta['replica_0']} / {cuenta['replica_1']})")
+
+        for bind in cuenta:
+            cuenta[bind] = 0
+        r = client.post('/api/posts/', headers=headers, json={'titulo': 'Post nuevo', 'contenido': 'contenido nuevo'})
+        verificar(r.status_code == 201, 'POST /api/posts/ responde 201')
+        verificar(cuenta['replica_0'] == cuenta['replica_1'] == 0,
+                  'POST /api/posts/ no toca las réplicas')
+
+        for bind in cuenta:
+            cuenta[bind] = 0
+        client.get('/api/stats', headers=headers)
+        verificar(cuenta[None] == 0, 'GET /api/stats lee de una réplica')
+
+        # --- Read-your-writes dentro de un request ---
+        with app.test_request_context('/'):
+            g._solo_lectura = True
+            for bind in cuenta:
+                cuenta[bind] = 0
+            db.session.scalar(select(Post.id).limit(1))
+            antes = cuenta[None]
+            post = Post(titulo='Escrito en el request', contenido='contenido', usuario_id=admin_id)
+            db.session.add(post)
+            db.session.commit()
+            leidas_replica = cuenta['replica_0'] + cuenta['replica_1']
+            visto = db.session.scalar(select(Post.titulo).where(Post.id == post.id))
+            verificar(antes == 0, 'lectura inicial del request en réplica')
+            verificar(visto == 'Escrito en el request'
+                      and cuenta['replica_0'] + cuenta['replica_1'] == leidas_replica,
+                      'después de escribir, el request lee del primario')
+            db.session.remove()
+
+        # --- Caché + réplica atrasada: las réplicas son copias que no ven las escrituras ---
+        with app.app_context():
+            post_id = db.session.scalar(select(Post.id).where(Post.is_published == True).order_by(Post.id))
+        for lag, nombre in ((5, 'con REPLICA_LAG_SECONDS'), (0, 'sin REPLICA_LAG_SECONDS')):
+            app = crear_app(primario, replicas, RESPONSE_CACHE_BACKEND='memory', REPLICA_LAG_SECONDS=lag)
+            client = app.test_client()
+            url = f'/api/posts/{post_id}?fields=id,titulo'
+            client.get(url)
+            titulo = f'Editado ({nombre})'
+            r = client.put(f'/api/posts/{post_id}', headers=headers, json={'titulo': titulo})
+            assert r.status_code == 200, r.get_json()
+            visto = [client.get(url).get_json()['titulo'] for _ in range(2)]
+            if lag:
+                verificar(visto == [titulo] * 2,
+                          f'{nombre}: después de invalidar, el MISS lee del primario ({visto})')
+            else:
+                verificar(visto[0] != titulo,
+                          f'{nombre}: la réplica atrasada queda en caché ({visto[0]!r})')
+
+        # --- Failover: una réplica inaccesible ---
+        caida = os.path.join(directorio, 'no-existe', 'replica.db')
+        app = crear_app(primario, [caida, replicas[0]])
+        cuenta = contar_por_engine(app)
+        client = app.test_client()
+        estados = [client.get('/api/posts/?limit=5').status_code for _ in range(6)]
+        verificar(estados == [200] * 6, f'con una réplica caída todos los GET responden 200 ({estados})')
+        sanas = app.extensions['replicas'].sanas()
+        verificar(len(sanas) == 1, 'la réplica caída queda fuera de la rotación')
+
+        # --- Todas caídas: todo al primario ---
+        app = crear_app(primario, [caida])
+        client = app.test_client()
+        estados = [client.get('/api/posts/?limit=5').status_code for _ in range(3)]
+        verificar(estados == [200] * 3, f'sin réplicas sanas se lee del primario ({estados})')
+
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
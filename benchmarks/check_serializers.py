@@ -0,0 +1,166 @@
+"""
+Paridad de los serializadores compilados (app/services/serializers.py) con
+marshmallow: para usuarios, categorías, comentarios y posts compara
+schema.dump() sobre instancias ORM con el camino rápido (filas planas +
+función compilada), incluidos valores nulos, textos no ASCII, posts sin
+categorías ni comentarios y comentarios sin autor. Sale con código 1 ante
+cualquier diferencia. También los schemas parciales de ?fields= y las
+respuestas de los endpoints con ?fields= (incluido el 400 ante campos
+desconocidos).
+
+Uso:
+    python benchmarks/check_serializers.py
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db, categorias_cache
+
+
+def crear_app(db_path):
+    return create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'DB_CREATE_ALL': True,
+        'JWT_SECRET_KEY': 'check-serializers-secret-de-32-bytes',
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        'METRICS_ENABLED': False,
+    })
+
+
+def casos_borde():
+    """Filas que el generador no produce: nulos, Unicode, relaciones vacías."""
+    from app.models import Categoria, Comentario, Post, Usuario
+
+    raro = Usuario(username='ñandú «raro»', email='nandu@example.com', role=None)
+    raro.set_password('12345678')
+    db.session.add(raro)
+    db.session.flush()
+    raro.created_at = None
+    vacio = Post(titulo='Post sin nada', contenido='ni categorías ni comentarios', usuario_id=raro.id)
+    huerfano = Post(titulo='Post con huérfano', contenido='comentario sin autor 🚀', usuario_id=None,
+                    timestamp=datetime(2024, 2, 29, 23, 59, 59, 123456))
+    db.session.add_all([vacio, huerfano, Categoria(nombre='Categoría ñ')])
+    db.session.flush()
+    db.session.add_all([
+        Comentario(contenido='sin autor', post_id=huerfano.id, usuario_id=None,
+                   created_at=datetime(2024, 1, 1, 0, 0, 0, 1), updated_at=None),
+        Comentario(contenido='oculto', post_id=huerfano.id, usuario_id=raro.id, is_visible=False),
+        Comentario(contenido='visible con "comillas"', post_id=huerfano.id, usuario_id=raro.id),
+    ])
+    db.session.commit()
+    return huerfano.id
+
+
+def main():
+    from app.models import Comentario, Post, Usuario, hacer_excerpt
+    from app.services import seed
+    from app.services.loaders import post_schema_options, comentario_schema_options
+    from app.schemas.post_schemas import PostSchema
+    from app.schemas.comment_schemas import ComentarioSchema
+    from app.services.serializers import compilar, consulta, serializar, schema_parcial
+    from app.views.auth_views import usuarios_dump_schema
+    from app.views.category_views import categories_schema
+    from app.views.comment_views import comentarios_schema
+    from app.views.post_views import posts_schema
+
+    fallas = []
+
+    def verificar(nombre, esperado, obtenido):
+        if esperado == obtenido:
+            print(f'OK     {nombre} ({len(esperado)} filas)')
+            return
+        fallas.append(nombre)
+        print(f'FALLA  {nombre}')
+        for i, (a, b) in enumerate(zip(esperado, obtenido)):
+            if a != b:
+                print(f'       fila {i}:\n         marshmallow: {a}\n         compilado:   {b}')
+                break
+        else:
+            print(f'       {len(esperado)} filas contra {len(obtenido)}')
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = crear_app(os.path.join(directorio, 'paridad.db'))
+        with app.app_context():
+            seed.generar(db.session, usuarios=50, posts=400, comentarios=3000, echo=lambda *a: None)
+            post_borde = casos_borde()
+            db.session.expire_all()
+
+            # --- Usuarios ---
+            usuarios = Usuario.query.order_by(Usuario.id).all()
+            filas = consulta(db.session, usuarios_dump_schema, Usuario).order_by(Usuario.id).all()
+            verificar('usuarios', usuarios_dump_schema.dump(usuarios),
+                      serializar(db.session, usuarios_dump_schema, Usuario, filas))
+            dump = compilar(usuarios_dump_schema, Usuario)
+            verificar('usuarios (instancias ORM)', usuarios_dump_schema.dump(usuarios), [dump(u) for u in usuarios])
+
+            # --- Categorías (foto en memoria) ---
+            items = categorias_cache.snapshot().items
+            dump = compilar(categories_schema)
+            verificar('categorías', categories_schema.dump(items), [dump(c) for c in items])
+
+            # --- Comentarios de un post ---
+            for post_id in (post_borde, db.session.scalar(db.select(Post.id).order_by(Post.id))):
+                comentarios = (Comentario.query.filter_by(post_id=post_id, is_visible=True)
+                               .options(*comentario_schema_options()).order_by(Comentario.id).all())
+                filas = (consulta(db.session, comentarios_schema, Comentario)
+                         .filter(Comentario.post_id == post_id, Comentario.is_visible == True)
+                         .order_by(Comentario.id).all())
+                verificar(f'comentarios del post {post_id}', comentarios_schema.dump(comentarios),
+                          serializar(db.session, comentarios_schema, Comentario, filas))
+
+            # --- Posts con categorías y comentarios anidados ---
+            posts = Post.query.options(*post_schema_options()).order_by(Post.id).all()
+            filas = consulta(db.session, posts_schema, Post).order_by(Post.id).all()
+            verificar('posts', posts_schema.dump(posts), serializar(db.session, posts_schema, Post, filas))
+            dump = compilar(posts_schema, Post)
+            verificar('posts (instancias ORM)', posts_schema.dump(posts), [dump(p) for p in posts])
+
+            # --- Schemas parciales (?fields=) ---
+            for campos in (('excerpt', 'id', 'titulo'), ('autor_id', 'categorias', 'id'), ('comentarios', 'id')):
+                parcial = schema_parcial(PostSchema, campos, True)
+                filas = consulta(db.session, parcial, Post).order_by(Post.id).all()
+                verificar(f'posts fields={",".join(campos)}', parcial.dump(posts),
+                          serializar(db.session, parcial, Post, filas))
+            verificar('excerpt = models.hacer_excerpt(contenido)',
+                      [hacer_excerpt(p.contenido) for p in posts], [p.excerpt for p in posts])
+            parcial = schema_parcial(ComentarioSchema, ('autor', 'id'), True)
+            comentarios = Comentario.query.options(*comentario_schema_options()).order_by(Comentario.id).all()
+            filas = consulta(db.session, parcial, Comentario).order_by(Comentario.id).all()
+            verificar('comentarios fields=autor,id', parcial.dump(comentarios),
+                      serializar(db.session, parcial, Comentario, filas))
+
+        # --- De punta a punta: la respuesta JSON del endpoint ---
+        client = app.test_client()
+        respuesta = client.get('/api/posts/?limit=100').get_json()['data']
+        with app.app_context():
+            ids = [p['id'] for p in respuesta]
+            por_id = {p.id: p for p in Post.query.filter(Post.id.in_(ids)).options(*post_schema_options())}
+            esperado = posts_schema.dump([por_id[i] for i in ids])
+        verificar('GET /api/posts/', json.loads(json.dumps(esperado)), respuesta)
+
+        parcial = client.get('/api/posts/?limit=100&fields=titulo,excerpt').get_json()['data']
+        verificar('GET /api/posts/?fields=titulo,excerpt',
+                  [{'id': p['id'], 'titulo': p['titulo'], 'excerpt': hacer_excerpt(por_id[p['id']].contenido)}
+                   for p in respuesta], parcial)
+        detalle = client.get(f'/api/posts/{ids[0]}?fields=id,contenido').get_json()
+        verificar(f'GET /api/posts/{ids[0]}?fields=id,contenido',
+                  [{'id': ids[0], 'contenido': por_id[ids[0]].contenido}], [detalle])
+        estados = [client.get(url).status_code for url in (
+            '/api/posts/?fields=titulo,clave', '/api/posts/1?fields=nada',
+            '/api/posts/search?q=post&fields=nada', f'/api/posts/{ids[0]}/comments?fields=nada',
+        )]
+        verificar('?fields= con campos desconocidos responde 400', [400] * 4, estados)
+
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,526 @@
+"""
+Benchmark de todos los endpoints (rutas de api_routes.py, rutas de la app y
+blueprint web `main`) contra una base SQLite sembrada con `flask seed`.
+
+Por endpoint registra latencia p50/p95/p99, cantidad de sentencias SQL por
+request y pico de memoria asignada (tracemalloc) durante un request. El
+resultado se escribe en JSON y se compara con un baseline guardado: falla
+(código 1) si un endpoint ejecuta MÁS consultas que en el baseline (N+1) o si
+su pico de memoria crece más allá de la tolerancia (p.ej. un `.all()` sin
+límite). Un p95 peor que la tolerancia de latencia solo se avisa: depende de
+la máquina y de su carga (con --strict-latency también falla).
+
+Uso:
+    python benchmarks/endpoints.py                     # corre y compara con baseline.json
+    python benchmarks/endpoints.py --update-baseline   # acepta los valores actuales
+    python benchmarks/endpoints.py --only posts --iterations 100
+    python benchmarks/endpoints.py --strict-latency    # el p95 también es regresión
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, select
+
+from app import create_app
+from app.extensions import db
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(DIRECTORIO, 'baseline.json')
+PASSWORD = '12345678'
+
+ESCALAS = {
+    'small': dict(usuarios=500, posts=5000, comentarios=25000),
+    'medium': dict(usuarios=5000, posts=50000, comentarios=250000),
+    'large': dict(usuarios=50000, posts=500000, comentarios=2500000),
+}
+
+
+def test_config(db_path):
+    return {
+        'TESTING': True,
+        'SECRET_KEY': 'bench',
+        'JWT_SECRET_KEY': 'bench-jwt-secret-de-al-menos-32-bytes',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'DB_CREATE_ALL': True,
+        'WTF_CSRF_ENABLED': False,
+        # Se mide el trabajo real de cada vista, no la caché de respuestas
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'USER_CACHE_TTL': 0,
+        # El costo del hash se mide aparte (bench_password_hashing.py)
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PASSWORD_HASH_WORKERS': 0,
+        # El volcado de vistas corre en otro hilo: que no caiga dentro de la
+        # medición de un escenario (se mide aparte, bench_view_counter.py)
+        'VIEW_COUNTER_FLUSH_SECONDS': 3600,
+        'TRENDING_SNAPSHOT_SECONDS': 3600,
+    }
+
+
+# -----------------------------------------------------------
+# PREPARACIÓN
+# -----------------------------------------------------------
+
+class Contexto:
+    """Ids de datos sembrados, clientes autenticados y contador de SQL."""
+
+    def __init__(self, app):
+        self.app = app
+        self.ids = {}
+        self.tokens = {}
+        self.web = {}
+        self.anon = app.test_client()
+        self.contando = False
+        self.consultas = 0
+        self.secuencia = 0
+
+    def unico(self):
+        self.secuencia += 1
+        return f'{os.getpid()}-{self.secuencia}'
+
+    def headers(self, rol):
+        return {'Authorization': f'Bearer {self.tokens[rol]}'} if rol else {}
+
+    def login_web(self, rol):
+        client = self.web.setdefault(rol, self.app.test_client())
+        r = client.post('/login', data={'email': f'bench-{rol}@example.com', 'password': PASSWORD})
+        assert r.status_code == 302, f'login web {rol}: {r.status_code}'
+        return client
+
+
+def sembrar(app, escala, seed):
+    from app.models import Usuario, Post, Comentario, Categoria
+    from app.services import seed as generador
+
+    with app.app_context():
+        generador.generar(db.session, seed=seed, echo=lambda *a: None, **ESCALAS[escala])
+
+        # Un usuario conocido por rol, con un post y un comentario propios
+        usuarios = {}
+        for rol in ('admin', 'moderator', 'user', 'temp'):
+            u = Usuario(username=f'bench-{rol}', email=f'bench-{rol}@example.com',
+                        role='user' if rol == 'temp' else rol)
+            u.set_password(PASSWORD)
+            usuarios[rol] = u
+        db.session.add_all(usuarios.values())
+        categoria = db.session.scalars(select(Categoria).order_by(Categoria.id)).first()
+        propio = Post(titulo='Post del benchmark', contenido='contenido ' * 30,
+                      autor=usuarios['user'], categorias=[categoria])
+        db.session.add(propio)
+        db.session.flush()
+        comentario = Comentario(contenido='comentario del benchmark', autor=usuarios['user'], post=propio)
+        db.session.add(comentario)
+        db.session.commit()
+
+        primer_post, ultimo_post = db.session.execute(select(func.min(Post.id), func.max(Post.id))).one()
+        return {
+            # El generador concentra los comentarios en los primeros posts (Zipf)
+            'post_caliente': primer_post,
+            'post_tipico': (primer_post + ultimo_post) // 2,
+            'post_propio': propio.id,
+            'comentario': db.session.scalar(select(func.min(Comentario.id))),
+            'comentario_propio': comentario.id,
+            'categoria': categoria.id,
+            'categoria_nombre': categoria.nombre,
+            'usuario': usuarios['user'].id,
+            # Lote para moderar: los 1000 comentarios más recientes del post caliente
+            'lote_moderacion': db.session.scalars(
+                select(Comentario.id).where(Comentario.post_id == primer_post)
+                .order_by(Comentario.id.desc()).limit(1000)
+            ).all(),
+        }
+
+
+def preparar_contexto(app, escala, seed):
+    from app.routes import bp as main_bp
+
+    # El blueprint web no se registra en create_app; el benchmark lo necesita.
+    if 'main' not in app.blueprints:
+        app.register_blueprint(main_bp)
+
+    ctx = Contexto(app)
+    ctx.ids = sembrar(app, escala, seed)
+
+    for rol in ('admin', 'moderator', 'user'):
+        r = ctx.anon.post('/api/login', json={'email': f'bench-{rol}@example.com', 'password': PASSWORD})
+        assert r.status_code == 200, f'login api {rol}: {r.status_code}'
+        ctx.tokens[rol] = r.get_json()['access_token']
+        ctx.login_web(rol)
+
+    r = ctx.anon.get('/api/posts/?limit=20')
+    ctx.ids['cursor'] = r.get_json()['next_cursor']
+
+    with app.app_context():
+        def contar(*args):
+            if ctx.contando:
+                ctx.consultas += 1
+        event.listen(db.engine, 'before_cursor_execute', contar)
+    return ctx
+
+
+# -----------------------------------------------------------
+# ESCENARIOS
+# -----------------------------------------------------------
+# ruta: plantilla con los ids del contexto (más lo que devuelva `preparar`).
+# como: None (anónimo), 'api:<rol>' (Bearer JWT) o 'web:<rol>' (sesión).
+# preparar(ctx): crea lo que el request consume (p.ej. el post a borrar);
+#                no entra en la medición.
+
+class Escenario:
+    def __init__(self, nombre, metodo, ruta, como=None, esperado=200, json=None, data=None,
+                 body=None, preparar=None, omitir=None):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.ruta = ruta
+        self.como = como
+        self.esperado = esperado
+        self.json = json
+        self.data = data
+        self.body = body
+        self.preparar = preparar
+        self.omitir = omitir
+
+    def request(self, ctx):
+        valores = dict(ctx.ids)
+        if self.preparar:
+            valores.update(self.preparar(ctx) or {})
+
+        kwargs = {}
+        if self.json is not None:
+            kwargs['json'] = self.json(ctx) if callable(self.json) else self.json
+        if self.data is not None:
+            kwargs['data'] = self.data(ctx) if callable(self.data) else self.data
+        if self.body is not None:
+            kwargs['data'] = self.body(ctx)
+            kwargs['content_type'] = 'application/x-ndjson'
+
+        client = ctx.anon
+        if self.como and self.como.startswith('api:'):
+            kwargs['headers'] = ctx.headers(self.como[4:])
+        elif self.como and self.como.startswith('web:'):
+            client = ctx.web[self.como[4:]]
+
+        ruta = self.ruta.format(**valores)
+        return lambda: _consumir(client.open(ruta, method=self.metodo, buffered=False, **kwargs))
+
+
+def _consumir(response):
+    # Sin buffer del cliente de test: en las respuestas en streaming se mide
+    # la memoria de la app, no la del cuerpo acumulado por el cliente.
+    for _ in response.iter_encoded():
+        pass
+    response.close()
+    return response
+
+
+def _crear_post(ctx, rol='user'):
+    r = ctx.anon.post('/api/posts/', headers=ctx.headers(rol),
+                      json={'titulo': 'Post a borrar', 'contenido': 'contenido temporal'})
+    return {'nuevo_post': r.get_json()['post']['id']}
+
+
+def _crear_categoria(ctx):
+    r = ctx.anon.post('/api/categories/', headers=ctx.headers('admin'), json={'nombre': f'tmp-{ctx.unico()}'})
+    return {'nueva_categoria': r.get_json()['category']['id']}
+
+
+def _crear_comentario(ctx):
+    r = ctx.anon.post(f"/api/posts/{ctx.ids['post_propio']}/comments", headers=ctx.headers('user'),
+                      json={'contenido': 'comentario a borrar'})
+    return {'nuevo_comentario': r.get_json()['data']['id']}
+
+
+def _restaurar_lote(ctx):
+    # Cada iteración mide ocultar el lote completo: antes se vuelve a mostrar
+    from app.services import moderacion
+
+    with ctx.app.app_context():
+        moderacion.cambiar_visibilidad(db.session, ctx.ids['lote_moderacion'], True)
+        db.session.commit()
+
+
+def _ndjson(ctx, n=100):
+    return ''.join(json.dumps({'titulo': f'Importado {i}', 'contenido': 'contenido importado ' * 5,
+                               'categoria_ids': [ctx.ids['categoria']]}) + '\n' for i in range(n))
+
+
+ESCENARIOS = [
+    # --- App ---
+    Escenario('app.hello', 'GET', '/hello'),
+    Escenario('app.home', 'GET', '/'),
+    Escenario('app.user', 'GET', '/api/user', como='api:user'),
+
+    # --- Auth / usuarios ---
+    Escenario('api.register', 'POST', '/api/register', esperado=201,
+              json=lambda ctx: {'username': f'u{ctx.unico()}', 'email': f'u{ctx.unico()}@example.com',
+                                'password': PASSWORD}),
+    Escenario('api.login', 'POST', '/api/login',
+              json={'email': 'bench-user@example.com', 'password': PASSWORD}),
+    Escenario('api.users.me', 'GET', '/api/users/me', como='api:user'),
+    Escenario('api.users.list', 'GET', '/api/users/', como='api:admin'),
+
+    # --- Categorías ---
+    Escenario('api.categories.list', 'GET', '/api/categories/'),
+    Escenario('api.categories.create', 'POST', '/api/categories/', como='api:moderator', esperado=201,
+              json=lambda ctx: {'nombre': f'cat-{ctx.unico()}'}),
+    Escenario('api.categories.detail', 'GET', '/api/categories/{categoria}'),
+    Escenario('api.categories.update', 'PUT', '/api/categories/{nueva_categoria}', como='api:moderator',
+              json=lambda ctx: {'nombre': f'ren-{ctx.unico()}'}, preparar=_crear_categoria),
+    Escenario('api.categories.delete', 'DELETE', '/api/categories/{nueva_categoria}', como='api:admin',
+              esperado=204, preparar=_crear_categoria),
+
+    # --- Posts ---
+    Escenario('api.posts.list', 'GET', '/api/posts/?limit=20'),
+    Escenario('api.posts.list.limit100', 'GET', '/api/posts/?limit=100'),
+    Escenario('api.posts.list.cursor', 'GET', '/api/posts/?limit=20&cursor={cursor}'),
+    Escenario('api.posts.list.fields', 'GET', '/api/posts/?limit=20&fields=id,titulo,excerpt,autor_id'),
+    Escenario('api.posts.list.sort.comments', 'GET', '/api/posts/?limit=20&sort=comments&fields=titulo,comment_count,last_comment_at'),
+    Escenario('api.posts.list.sort.activity', 'GET', '/api/posts/?limit=20&sort=activity&fields=titulo,comment_count,last_comment_at'),
+    Escenario('api.posts.create', 'POST', '/api/posts/', como='api:user', esperado=201,
+              json=lambda ctx: {'titulo': 'Post del benchmark', 'contenido': 'contenido ' * 30,
+                                'categoria_ids': [ctx.ids['categoria']]}),
+    Escenario('api.posts.bulk', 'POST', '/api/posts/bulk', como='api:user', body=_ndjson),
+    Escenario('api.posts.search', 'GET', '/api/posts/search?q=python+flask'),
+    Escenario('api.posts.search.categoria', 'GET', '/api/posts/search?q=python&categoria={categoria}'),
+    Escenario('api.posts.trending', 'GET', '/api/posts/trending?limit=20&fields=id,titulo,excerpt,comment_count,view_count'),
+    Escenario('api.posts.detail.hot', 'GET', '/api/posts/{post_caliente}'),
+    Escenario('api.posts.detail', 'GET', '/api/posts/{post_tipico}'),
+    Escenario('api.posts.detail.fields', 'GET', '/api/posts/{post_caliente}?fields=titulo,excerpt'),
+    Escenario('api.posts.update', 'PUT', '/api/posts/{post_propio}', como='api:user',
+              json=lambda ctx: {'titulo': f'Editado {ctx.unico()}', 'contenido': 'contenido editado ' * 10}),
+    Escenario('api.posts.delete', 'DELETE', '/api/posts/{nuevo_post}', como='api:admin', esperado=204,
+              preparar=_crear_post),
+
+    # --- Comentarios ---
+    Escenario('api.comments.list.hot', 'GET', '/api/posts/{post_caliente}/comments'),
+    Escenario('api.comments.list', 'GET', '/api/posts/{post_tipico}/comments'),
+    Escenario('api.comments.create', 'POST', '/api/posts/{post_tipico}/comments', como='api:user', esperado=201,
+              json={'contenido': 'comentario del benchmark'}),
+    Escenario('api.comments.detail', 'GET', '/api/comments/{comentario}'),
+    Escenario('api.comments.update', 'PUT', '/api/comments/{comentario_propio}', como='api:user',
+              json=lambda ctx: {'contenido': f'editado {ctx.unico()}'}),
+    Escenario('api.comments.delete', 'DELETE', '/api/comments/{nuevo_comentario}', como='api:user',
+              esperado=204, preparar=_crear_comentario),
+
+    # --- Moderación ---
+    Escenario('api.moderation.queue', 'GET', '/api/moderation/comments?limit=50', como='api:moderator'),
+    Escenario('api.moderation.queue.hidden', 'GET', '/api/moderation/comments?is_visible=0&limit=50',
+              como='api:moderator'),
+    Escenario('api.moderation.queue.post', 'GET', '/api/moderation/comments?post_id={post_caliente}&limit=50',
+              como='api:moderator'),
+
+    # --- Exportación y estadísticas ---
+    Escenario('api.export.posts', 'GET', '/api/export/posts?format=ndjson', como='api:admin'),
+    Escenario('api.export.comments.csv', 'GET', '/api/export/comments?format=csv', como='api:admin'),
+    Escenario('api.stats', 'GET', '/api/stats', como='api:moderator'),
+
+    # --- Web (blueprint main) ---
+    Escenario('web.index', 'GET', '/index'),
+    Escenario('web.index.cursor', 'GET', '/index?cursor={cursor}'),
+    Escenario('web.login.form', 'GET', '/login'),
+    Escenario('web.login', 'POST', '/login', como='web:nuevo', esperado=302,
+              data={'email': 'bench-temp@example.com', 'password': PASSWORD},
+              preparar=lambda ctx: ctx.web.update(nuevo=ctx.app.test_client())),
+    Escenario('web.logout', 'GET', '/logout', como='web:temp', esperado=302,
+              preparar=lambda ctx: ctx.login_web('temp') and None),
+    Escenario('web.register.form', 'GET', '/register'),
+    Escenario('web.register', 'POST', '/register', esperado=302,
+              data=lambda ctx: {'username': f'w{ctx.unico()}', 'email': f'w{ctx.unico()}@example.com',
+                                'password': PASSWORD, 'password2': PASSWORD}),
+    Escenario('web.post.new.form', 'GET', '/post/nuevo', como='web:user'),
+    Escenario('web.post.new', 'POST', '/post/nuevo', como='web:user', esperado=302,
+              data=lambda ctx: {'titulo': 'Post web', 'contenido': 'contenido web',
+                                'categorias': ctx.ids['categoria']}),
+    Escenario('web.post.hot', 'GET', '/post/{post_caliente}'),
+    Escenario('web.post', 'GET', '/post/{post_tipico}'),
+    Escenario('web.post.moderator', 'GET', '/post/{post_caliente}', como='web:moderator'),
+    Escenario('web.post.comment', 'POST', '/post/{post_tipico}', como='web:user', esperado=302,
+              data={'contenido': 'comentario web del benchmark'}),
+    Escenario('web.post.edit.form', 'GET', '/post/editar/{post_propio}', como='web:user'),
+    Escenario('web.post.edit', 'POST', '/post/editar/{post_propio}', como='web:user', esperado=302,
+              data=lambda ctx: {'titulo': f'Editado {ctx.unico()}', 'contenido': 'contenido editado',
+                                'categorias': ctx.ids['categoria']}),
+    Escenario('web.post.delete', 'POST', '/post/eliminar/{nuevo_post}', como='web:admin', esperado=302,
+              preparar=_crear_post),
+    Escenario('web.comment.delete', 'POST', '/comentario/eliminar/{nuevo_comentario}', como='web:user',
+              esperado=302, preparar=_crear_comentario),
+    Escenario('web.categoria', 'GET', '/categoria/{categoria_nombre}'),
+    Escenario('web.admin', 'GET', '/admin', como='web:admin',
+              omitir='falta la plantilla admin_panel.html'),
+    Escenario('web.moderator', 'GET', '/moderator', como='web:moderator'),
+    Escenario('web.moderator.hidden', 'GET', '/moderator?is_visible=0', como='web:moderator'),
+
+    # Al final: deja 1000 comentarios del post caliente ocultos
+    Escenario('api.moderation.bulk', 'POST', '/api/moderation/comments/bulk', como='api:moderator',
+              json=lambda ctx: {'ids': ctx.ids['lote_moderacion'], 'is_visible': False},
+              preparar=_restaurar_lote),
+]
+
+
+# -----------------------------------------------------------
+# MEDICIÓN
+# -----------------------------------------------------------
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    k = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[k]
+
+
+def medir(ctx, escenario, iteraciones, calentamiento):
+    latencias = []
+    consultas = []
+    for i in range(calentamiento + iteraciones):
+        enviar = escenario.request(ctx)
+        ctx.consultas = 0
+        ctx.contando = True
+        inicio = time.perf_counter()
+        response = enviar()
+        transcurrido = time.perf_counter() - inicio
+        ctx.contando = False
+        if response.status_code != escenario.esperado:
+            raise AssertionError(f'{escenario.nombre}: status {response.status_code}, '
+                                 f'se esperaba {escenario.esperado}')
+        if i >= calentamiento:
+            latencias.append(transcurrido * 1000)
+            consultas.append(ctx.consultas)
+
+    # Pico de memoria: un request aparte, porque tracemalloc distorsiona la latencia
+    enviar = escenario.request(ctx)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    enviar()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'status': escenario.esperado,
+        'p50_ms': round(percentil(latencias, 50), 3),
+        'p95_ms': round(percentil(latencias, 95), 3),
+        'p99_ms': round(percentil(latencias, 99), 3),
+        'mean_ms': round(statistics.fmean(latencias), 3),
+        'queries': max(consultas),
+        'peak_alloc_bytes': pico,
+    }
+
+
+def comparar(actual, baseline, args):
+    """
+    Devuelve (regresiones, avisos) respecto del baseline. Consultas y memoria
+    son deterministas y siempre cuentan como regresión; la latencia depende
+    de la máquina y de su carga, así que solo es un aviso salvo con
+    --strict-latency.
+    """
+    fallas, avisos = [], []
+    for nombre, r in actual['endpoints'].items():
+        b = baseline.get('endpoints', {}).get(nombre)
+        if b is None:
+            continue
+        if r['queries'] > b['queries']:
+            fallas.append(f"{nombre}: {r['queries']} consultas (baseline {b['queries']})")
+        limite = b['peak_alloc_bytes'] * (1 + args.alloc_tolerance)
+        if r['peak_alloc_bytes'] > max(limite, b['peak_alloc_bytes'] + args.alloc_floor):
+            fallas.append(f"{nombre}: pico de memoria {r['peak_alloc_bytes']:,} B "
+                          f"(baseline {b['peak_alloc_bytes']:,} B)")
+        limite = b['p95_ms'] * (1 + args.latency_tolerance)
+        if r['p95_ms'] > max(limite, b['p95_ms'] + args.latency_floor):
+            (fallas if args.strict_latency else avisos).append(
+                f"{nombre}: p95 {r['p95_ms']} ms (baseline {b['p95_ms']} ms)")
+    return fallas, avisos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', choices=ESCALAS, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', default=None, help='Solo escenarios cuyo nombre contenga este texto.')
+    parser.add_argument('--output', default=None, help='Archivo JSON de resultados.')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--alloc-tolerance', type=float, default=0.5, help='Crecimiento relativo admitido.')
+    parser.add_argument('--alloc-floor', type=int, default=64 * 1024, help='Crecimiento absoluto admitido (bytes).')
+    parser.add_argument('--latency-tolerance', type=float, default=1.0, help='Crecimiento relativo del p95 admitido.')
+    parser.add_argument('--latency-floor', type=float, default=2.0, help='Crecimiento absoluto del p95 admitido (ms).')
+    parser.add_argument('--strict-latency', action='store_true',
+                        help='Un p95 fuera de tolerancia también falla (por defecto solo avisa).')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        app = create_app(test_config=test_config(os.path.join(directorio, 'bench.db')))
+        ctx = preparar_contexto(app, args.scale, args.seed)
+        print(f'Base sembrada ({args.scale}) en {time.perf_counter() - inicio:.1f} s\n')
+
+        resultados = {}
+        omitidos = {}
+        print(f"{'endpoint':<32}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>6}{'pico KiB':>11}")
+        for escenario in ESCENARIOS:
+            if args.only and args.only not in escenario.nombre:
+                continue
+            if escenario.omitir:
+                omitidos[escenario.nombre] = escenario.omitir
+                print(f'{escenario.nombre:<32}omitido: {escenario.omitir}')
+                continue
+            r = resultados[escenario.nombre] = medir(ctx, escenario, args.iterations, args.warmup)
+            print(f"{escenario.nombre:<32}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                  f"{r['queries']:>6}{r['peak_alloc_bytes'] / 1024:>11.1f}")
+
+    actual = {
+        'meta': {
+            'scale': args.scale,
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'endpoints': resultados,
+        'skipped': omitidos,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(actual, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(actual, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\nBaseline actualizado: {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('\nSin baseline para comparar (usar --update-baseline).')
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('meta', {}).get('scale') != args.scale:
+        print(f"\nEl baseline es de escala {baseline['meta'].get('scale')}: no se compara.")
+        return 0
+
+    fallas, avisos = comparar(actual, baseline, args)
+    if avisos:
+        print('\nLatencia (aviso, depende de la máquina; --strict-latency para que falle):')
+        for aviso in avisos:
+            print(f'  - {aviso}')
+    if fallas:
+        print('\nREGRESIONES:')
+        for falla in fallas:
+            print(f'  - {falla}')
+        return 1
+    print('\nOK: sin regresiones respecto del baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
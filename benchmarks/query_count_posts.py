@@ -0,0 +1,65 @@
+"""
+Verifica que GET /api/posts/ ejecute un número FIJO de consultas SQL sin
+importar el tamaño de la página (categorías, comentarios y autores se
+cargan en lote). Falla con código 1 si aparece un N+1.
+
+Uso:
+    python benchmarks/query_count_posts.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['DB_CREATE_ALL'] = '1'
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import Usuario, Post, Comentario, Categoria
+
+
+def poblar(n_posts=200):
+    autores = [Usuario(username=f'autor{i}', email=f'autor{i}@example.com') for i in range(20)]
+    categorias = [Categoria(nombre=f'categoria{i}') for i in range(5)]
+    db.session.add_all(autores + categorias)
+    for i in range(n_posts):
+        post = Post(titulo=f'Post {i}', contenido='contenido ' * 20, autor=autores[i % 20],
+                    categorias=[categorias[i % 5], categorias[(i + 1) % 5]])
+        db.session.add(post)
+        for j in range(3):
+            db.session.add(Comentario(contenido=f'comentario {j}', autor=autores[(i + j) % 20],
+                                      post=post, is_visible=(j != 2)))
+    db.session.commit()
+
+
+def main():
+    app = create_app()
+    contador = {'n': 0}
+
+    with app.app_context():
+        def contar(*args):
+            contador['n'] += 1
+        event.listen(db.engine, 'before_cursor_execute', contar)
+        poblar()
+
+    client = app.test_client()
+    resultados = {}
+    for limit in (1, 10, 50, 100):
+        contador['n'] = 0
+        response = client.get(f'/api/posts/?limit={limit}')
+        assert response.status_code == 200, response.status_code
+        assert len(response.get_json()['data']) == limit
+        resultados[limit] = contador['n']
+        print(f'limit={limit:>3}  consultas={contador["n"]}')
+
+    if len(set(resultados.values())) != 1:
+        print('ERROR: la cantidad de consultas crece con el tamaño de página (N+1).')
+        return 1
+    print('OK: cantidad de consultas constante.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Arranque en frío de un worker: cuánto tarda un proceso nuevo en importar
+`app`, construir la aplicación con create_app() y responder su primer
+request, y qué carga cada etapa. Cada corrida es un intérprete nuevo (los
+.pyc cuentan, como en un worker real).
+
+Falla con código 1 si:
+  - `import app` construye una aplicación o carga vistas, schemas o alembic;
+  - import + create_app() se conectan a la base (corren contra una URI
+    SQLite imposible de abrir) o cargan alembic;
+  - la mediana de import + create_app + primer request supera --budget-ms.
+
+Uso:
+    python benchmarks/startup.py [--runs 5] [--budget-ms 1500] [--importtime]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Lo que un `import app` no debe arrastrar: se carga al registrar rutas o al
+# usar `flask db`.
+PROHIBIDOS_IMPORT = ('alembic', 'flask_migrate', 'flask_restful', 'wtforms',
+                     'app.api_routes', 'app.routes', 'app.views', 'app.schemas')
+# Lo que un worker no necesita nunca
+PROHIBIDOS_CREATE = ('alembic', 'flask_migrate', 'mako')
+
+SONDA_SIN_BASE = '''
+import json, sys
+sys.path.insert(0, sys.argv[1])
+
+def cargados(prefijos):
+    return sorted(m for m in sys.modules if any(m == p or m.startswith(p + '.') for p in prefijos))
+
+import app
+resultado = {'construida': app._app is not None,
+             'import': cargados(tuple(sys.argv[2].split(',')))}
+app.create_app()
+resultado['create'] = cargados(tuple(sys.argv[3].split(',')))
+print(json.dumps(resultado))
+'''
+
+SONDA_TIEMPOS = '''
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+aplicacion = app.create_app()
+t2 = time.perf_counter()
+respuesta = aplicacion.test_client().get('/api/posts/?limit=20')
+t3 = time.perf_counter()
+assert respuesta.status_code == 200, respuesta.status_code
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'primer_request': t3 - t2}))
+'''
+
+SONDA_IMPORTTIME = 'import sys; sys.path.insert(0, sys.argv[1]); import app; app.create_app()'
+
+
+def entorno(database_url):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': database_url,
+        'DB_CREATE_ALL': '0',
+        'PASSWORD_HASH_WORKERS': '0',
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'METRICS_DIR': '',
+    })
+    env.pop('DATABASE_REPLICA_URLS', None)
+    return env
+
+
+def correr(codigo, env, *args, flags=()):
+    r = subprocess.run([sys.executable, *flags, '-c', codigo, RAIZ, *args],
+                       env=env, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise SystemExit(f'La sonda falló:\n{r.stderr}')
+    return r
+
+
+def sembrar(db_path):
+    from app import create_app
+    from app.extensions import db
+    from app.services import seed
+
+    app = create_app(test_config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'DB_CREATE_ALL': True,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'METRICS_ENABLED': False,
+    })
+    with app.app_context():
+        seed.generar(db.session, usuarios=50, posts=500, comentarios=2000, echo=lambda *a: None)
+        db.engine.dispose()
+
+
+def importtime(env, top=15):
+    """Imports directos (de la sonda y de `app`) que más tardan, con sus dependencias."""
+    r = correr(SONDA_IMPORTTIME, env, flags=('-X', 'importtime'))
+    filas = []
+    for linea in r.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        # Sangría: 2 espacios por nivel; nivel 1 = importado por la sonda
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        if nivel <= 2 and nombre.strip() != 'app':
+            filas.append((int(acumulado), nombre.strip()))
+    print('\nimport más lentos (acumulado, import app + create_app):')
+    for acumulado, nombre in sorted(filas, reverse=True)[:top]:
+        print(f'  {acumulado / 1000:>8.1f} ms  {nombre}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500,
+                        help='Tope para la mediana de import + create_app + primer request.')
+    parser.add_argument('--importtime', action='store_true', help='Detalle de python -X importtime.')
+    args = parser.parse_args()
+
+    fallas = []
+
+    # --- Sin efectos secundarios: una base imposible de abrir ---
+    with tempfile.TemporaryDirectory() as directorio:
+        imposible = f'sqlite:///{os.path.join(directorio, "no-existe", "app.db")}'
+        r = correr(SONDA_SIN_BASE, entorno(imposible),
+                   ','.join(PROHIBIDOS_IMPORT), ','.join(PROHIBIDOS_CREATE))
+    sonda = json.loads(r.stdout)
+    if sonda['construida']:
+        fallas.append('`import app` construyó una aplicación')
+    if sonda['import']:
+        fallas.append(f"`import app` cargó {', '.join(sonda['import'])}")
+    if sonda['create']:
+        fallas.append(f"create_app() cargó {', '.join(sonda['create'])}")
+    if not fallas:
+        print('OK: import y create_app no tocan la base ni cargan vistas, schemas o alembic')
+
+    # --- Tiempos ---
+    with tempfile.TemporaryDirectory() as directorio:
+        db_path = os.path.join(directorio, 'startup.db')
+        sembrar(db_path)
+        env = entorno(f'sqlite:///{db_path}')
+
+        tiempos, procesos = [], []
+        for _ in range(args.runs):
+            inicio = time.perf_counter()
+            r = correr(SONDA_TIEMPOS, env)
+            procesos.append(time.perf_counter() - inicio)
+            tiempos.append(json.loads(r.stdout))
+
+        if args.importtime:
+            importtime(env)
+
+    print(f'\n{"etapa":<28}{"mediana ms":>12}{"máx ms":>10}')
+    for etapa in ('import', 'create_app', 'primer_request'):
+        valores = [t[etapa] * 1000 for t in tiempos]
+        print(f'{etapa:<28}{statistics.median(valores):>12.1f}{max(valores):>10.1f}')
+    total = statistics.median(sum(t.values()) * 1000 for t in tiempos)
+    print(f'{"hasta el primer request":<28}{total:>12.1f}')
+    print(f'{"proceso completo":<28}{statistics.median(procesos) * 1000:>12.1f}')
+
+    if total > args.budget_ms:
+        fallas.append(f'hasta el primer request: {total:.0f} ms > presupuesto {args.budget_ms:.0f} ms')
+
+    for falla in fallas:
+        print(f'FALLA  {falla}')
+    if fallas:
+        return 1
+    print(f'\nOK: dentro del presupuesto ({args.budget_ms:.0f} ms)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,26 @@
+"""Indice compuesto para el feed paginado de posts
+
+Revision ID: a1c3e5f7b901
+Revises: 5407ad989e45
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b901'
+down_revision = '5407ad989e45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index('ix_post_published_timestamp_id', ['is_published', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_published_timestamp_id')
@@ -0,0 +1,35 @@
+"""Tabla contador para estadisticas materializadas
+
+Revision ID: b2d4f6a8c012
+Revises: a1c3e5f7b901
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c012'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('contador',
+        sa.Column('nombre', sa.String(length=64), nullable=False),
+        sa.Column('valor', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('nombre')
+    )
+    # Valores iniciales a partir de los datos existentes
+    op.execute("INSERT INTO contador (nombre, valor) SELECT 'posts', COUNT(*) FROM post")
+    op.execute("INSERT INTO contador (nombre, valor) SELECT 'usuarios', COUNT(*) FROM usuario")
+    op.execute("INSERT INTO contador (nombre, valor) "
+               "SELECT 'comentarios_ocultos', COUNT(*) FROM comentario WHERE is_visible = 0")
+    op.execute("INSERT INTO contador (nombre, valor) "
+               "SELECT 'comentarios_visibles', COUNT(*) FROM comentario WHERE is_visible IS NULL OR is_visible <> 0")
+
+
+def downgrade():
+    op.drop_table('contador')
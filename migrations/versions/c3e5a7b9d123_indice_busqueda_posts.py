@@ -0,0 +1,34 @@
+"""Indice de texto completo para la busqueda de posts
+
+Revision ID: c3e5a7b9d123
+Revises: b2d4f6a8c012
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d123'
+down_revision = 'b2d4f6a8c012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS post_fts "
+                   "USING fts5(titulo, contenido, tokenize='unicode61 remove_diacritics 2')")
+        op.execute("INSERT INTO post_fts (rowid, titulo, contenido) SELECT id, titulo, contenido FROM post")
+    elif dialect == 'mysql':
+        op.execute("ALTER TABLE post ADD FULLTEXT INDEX ft_post_titulo_contenido (titulo, contenido)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS post_fts")
+    elif dialect == 'mysql':
+        op.execute("ALTER TABLE post DROP INDEX ft_post_titulo_contenido")
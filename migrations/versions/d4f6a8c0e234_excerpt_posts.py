@@ -0,0 +1,37 @@
+"""Columna excerpt en post (resumen del contenido para listados)
+
+Revision ID: d4f6a8c0e234
+Revises: c3e5a7b9d123
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6a8c0e234'
+down_revision = 'c3e5a7b9d123'
+branch_labels = None
+depends_on = None
+
+# Igual que models.hacer_excerpt: 200 caracteres y '...' si se cortó
+EXCERPT_LONGITUD = 200
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('excerpt', sa.String(length=EXCERPT_LONGITUD + 3), nullable=True))
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(f"UPDATE post SET excerpt = CASE WHEN length(contenido) > {EXCERPT_LONGITUD} "
+                   f"THEN substr(contenido, 1, {EXCERPT_LONGITUD}) || '...' ELSE contenido END")
+    elif dialect == 'mysql':
+        op.execute(f"UPDATE post SET excerpt = IF(CHAR_LENGTH(contenido) > {EXCERPT_LONGITUD}, "
+                   f"CONCAT(LEFT(contenido, {EXCERPT_LONGITUD}), '...'), contenido)")
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('excerpt')
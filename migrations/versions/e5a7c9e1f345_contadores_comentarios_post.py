@@ -0,0 +1,54 @@
+"""comment_count y last_comment_at en post, con sus indices
+
+Revision ID: e5a7c9e1f345
+Revises: d4f6a8c0e234
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9e1f345'
+down_revision = 'd4f6a8c0e234'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comentario', schema=None) as batch_op:
+        batch_op.create_index('ix_comentario_post_visible_created', ['post_id', 'is_visible', 'created_at'], unique=False)
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_comment_at', sa.DateTime(), nullable=True))
+
+    # Mismo cálculo que contadores.reconstruir_posts (flask counters rebuild)
+    op.execute(
+        "UPDATE post SET "
+        "comment_count = (SELECT COUNT(*) FROM comentario "
+        "WHERE comentario.post_id = post.id AND comentario.is_visible = 1), "
+        "last_comment_at = (SELECT MAX(comentario.created_at) FROM comentario "
+        "WHERE comentario.post_id = post.id AND comentario.is_visible = 1)"
+    )
+
+    op.create_index('ix_post_published_comment_count_id', 'post',
+                    ['is_published', 'comment_count', 'id'], unique=False)
+    op.create_index('ix_post_published_actividad_id', 'post',
+                    [sa.column('is_published'),
+                     sa.func.coalesce(sa.column('last_comment_at'), sa.column('timestamp')),
+                     sa.column('id')],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_post_published_actividad_id', table_name='post')
+    op.drop_index('ix_post_published_comment_count_id', table_name='post')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('last_comment_at')
+        batch_op.drop_column('comment_count')
+
+    with op.batch_alter_table('comentario', schema=None) as batch_op:
+        batch_op.drop_index('ix_comentario_post_visible_created')
@@ -0,0 +1,26 @@
+"""Indice (is_visible, created_at) para la cola de moderacion
+
+Revision ID: f6b8d0a2c456
+Revises: e5a7c9e1f345
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0a2c456'
+down_revision = 'e5a7c9e1f345'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comentario', schema=None) as batch_op:
+        batch_op.create_index('ix_comentario_visible_created', ['is_visible', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comentario', schema=None) as batch_op:
+        batch_op.drop_index('ix_comentario_visible_created')
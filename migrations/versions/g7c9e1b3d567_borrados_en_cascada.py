@@ -0,0 +1,78 @@
+"""ON DELETE en las FK de post, comentario y post_categoria; indice por categoria
+
+Revision ID: g7c9e1b3d567
+Revises: f6b8d0a2c456
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'g7c9e1b3d567'
+down_revision = 'f6b8d0a2c456'
+branch_labels = None
+depends_on = None
+
+
+# (tabla, columna, tabla referida, ondelete)
+FKS = [
+    ('post', 'usuario_id', 'usuario', 'SET NULL'),
+    ('comentario', 'usuario_id', 'usuario', 'SET NULL'),
+    ('comentario', 'post_id', 'post', 'CASCADE'),
+    ('post_categoria', 'post_id', 'post', 'CASCADE'),
+    ('post_categoria', 'categoria_id', 'categoria', 'CASCADE'),
+]
+
+# SQLite no guarda nombre para estas FK: batch las encuentra por convención
+CONVENCION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _indice_actividad(crear):
+    # SQLite no refleja índices sobre expresiones: la copia de la tabla post
+    # en modo batch lo perdería, así que se quita antes y se crea después.
+    if crear:
+        op.create_index('ix_post_published_actividad_id', 'post',
+                        [sa.column('is_published'),
+                         sa.func.coalesce(sa.column('last_comment_at'), sa.column('timestamp')),
+                         sa.column('id')],
+                        unique=False)
+    else:
+        op.drop_index('ix_post_published_actividad_id', table_name='post')
+
+
+def _recrear_fks(ondelete):
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        _indice_actividad(crear=False)
+        for tabla in ('post', 'comentario', 'post_categoria'):
+            with op.batch_alter_table(tabla, schema=None, naming_convention=CONVENCION) as batch_op:
+                for fk_tabla, columna, referida, accion in FKS:
+                    if fk_tabla != tabla:
+                        continue
+                    nombre = CONVENCION['fk'] % {'table_name': tabla, 'column_0_name': columna,
+                                                 'referred_table_name': referida}
+                    batch_op.drop_constraint(nombre, type_='foreignkey')
+                    batch_op.create_foreign_key(nombre, referida, [columna], ['id'],
+                                                ondelete=accion if ondelete else None)
+        _indice_actividad(crear=True)
+        return
+
+    inspector = sa.inspect(bind)
+    for tabla, columna, referida, accion in FKS:
+        for fk in inspector.get_foreign_keys(tabla):
+            if fk['constrained_columns'] == [columna] and fk['referred_table'] == referida:
+                op.drop_constraint(fk['name'], tabla, type_='foreignkey')
+                op.create_foreign_key(fk['name'], tabla, referida, [columna], ['id'],
+                                      ondelete=accion if ondelete else None)
+
+
+def upgrade():
+    op.create_index('ix_post_categoria_categoria_id', 'post_categoria', ['categoria_id'], unique=False)
+    _recrear_fks(ondelete=True)
+
+
+def downgrade():
+    _recrear_fks(ondelete=False)
+    op.drop_index('ix_post_categoria_categoria_id', table_name='post_categoria')
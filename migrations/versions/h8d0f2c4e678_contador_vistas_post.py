@@ -0,0 +1,40 @@
+"""view_count en post, con su indice para ?sort=views
+
+Revision ID: h8d0f2c4e678
+Revises: g7c9e1b3d567
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'h8d0f2c4e678'
+down_revision = 'g7c9e1b3d567'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('view_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_index('ix_post_published_view_count_id', 'post',
+                    ['is_published', 'view_count', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_post_published_view_count_id', table_name='post')
+    # En SQLite drop_column copia la tabla y la copia pierde los índices sobre
+    # expresiones (no se reflejan): se quita antes y se vuelve a crear.
+    op.drop_index('ix_post_published_actividad_id', table_name='post')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('view_count')
+
+    op.create_index('ix_post_published_actividad_id', 'post',
+                    [sa.column('is_published'),
+                     sa.func.coalesce(sa.column('last_comment_at'), sa.column('timestamp')),
+                     sa.column('id')],
+                    unique=False)
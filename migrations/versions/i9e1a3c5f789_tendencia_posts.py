@@ -0,0 +1,33 @@
+"""Tabla post_tendencia para /api/posts/trending
+
+Revision ID: i9e1a3c5f789
+Revises: h8d0f2c4e678
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i9e1a3c5f789'
+down_revision = 'h8d0f2c4e678'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_tendencia',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('puntaje', sa.Float(), nullable=False),
+        sa.Column('actualizado_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+    )
+    op.create_index(op.f('ix_post_tendencia_puntaje'), 'post_tendencia', ['puntaje'], unique=False)
+    # Se llena con `flask trending rebuild` (desde los comentarios existentes)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_post_tendencia_puntaje'), table_name='post_tendencia')
+    op.drop_table('post_tendencia')
@@ -0,0 +1,40 @@
+"""Contadores repartidos en shards (nombre, shard)
+
+Revision ID: j0f2b4d6e890
+Revises: i9e1a3c5f789
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j0f2b4d6e890'
+down_revision = 'i9e1a3c5f789'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cambia la clave primaria: tabla nueva, copia (todo al shard 0) y renombre
+    op.create_table('contador_nuevo',
+        sa.Column('nombre', sa.String(length=64), nullable=False),
+        sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('valor', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('nombre', 'shard')
+    )
+    op.execute("INSERT INTO contador_nuevo (nombre, shard, valor) SELECT nombre, 0, valor FROM contador")
+    op.drop_table('contador')
+    op.rename_table('contador_nuevo', 'contador')
+
+
+def downgrade():
+    op.create_table('contador_viejo',
+        sa.Column('nombre', sa.String(length=64), nullable=False),
+        sa.Column('valor', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('nombre')
+    )
+    op.execute("INSERT INTO contador_viejo (nombre, valor) SELECT nombre, SUM(valor) FROM contador GROUP BY nombre")
+    op.drop_table('contador')
+    op.rename_table('contador_viejo', 'contador')